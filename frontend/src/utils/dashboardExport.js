@@ -216,9 +216,9 @@ export async function exportChartsGrid(elements, options = {}) {
 }
 
 /**
- * Export metrics data in CSV, Excel, or JSON format
+ * Export metrics data in CSV, Excel, JSON, Parquet or Arrow format
  * @param {Object} options - Export options
- * @param {string} options.format - Format: 'csv', 'excel', or 'json'
+ * @param {string} options.format - Format: 'csv', 'excel', 'json', 'parquet' or 'arrow'
  * @param {Array|string} options.metrics - Metrics to export or 'all'
  * @param {number} options.start - Start timestamp (Unix)
  * @param {number} options.end - End timestamp (Unix)
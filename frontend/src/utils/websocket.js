@@ -33,6 +33,8 @@ export class WebSocketClient {
     this.listeners = new Map()
     this.subscriptions = new Set()
     this.dashboardId = null
+    this.maxRate = null
+    this.backfill = 0 // Seconds of history requested with the snapshot
 
     // Performance: Batch metric updates to reduce re-renders
     this._metricUpdateBuffer = {}
@@ -111,6 +113,7 @@ export class WebSocketClient {
     this.connectionState = ConnectionState.DISCONNECTED
     this.subscriptions.clear()
     this.dashboardId = null
+    this.backfill = 0
     this._emitStateChange()
   }
 
@@ -119,22 +122,47 @@ export class WebSocketClient {
    *
    * @param {Array<string>} metrics - Array of metric names to subscribe to
    * @param {string} dashboardId - Dashboard ID (optional)
+   * @param {number} backfill - Seconds of history for the metrics_snapshot (optional)
    */
-  subscribe(metrics, dashboardId = null) {
+  subscribe(metrics, dashboardId = null, backfill = 0) {
     // Store subscriptions
     metrics.forEach((m) => this.subscriptions.add(m))
     if (dashboardId) {
       this.dashboardId = dashboardId
     }
+    // Re-subscribing after a reconnect backfills the gap for all charts
+    this.backfill = Math.max(this.backfill, backfill)
 
     if (!this.socket?.connected) {
       return
     }
 
-    this.socket.emit('subscribe', {
-      metrics,
-      dashboard_id: dashboardId
-    })
+    this.socket.emit('subscribe', this._subscribePayload(metrics, dashboardId, backfill))
+  }
+
+  /**
+   * Build the subscribe message, including delivery options
+   * @private
+   */
+  _subscribePayload(metrics, dashboardId, backfill = 0) {
+    const payload = { metrics, dashboard_id: dashboardId, ack: true }
+    if (this.maxRate) {
+      payload.max_rate = this.maxRate
+    }
+    if (backfill > 0) {
+      payload.backfill = backfill
+    }
+    return payload
+  }
+
+  /**
+   * Limit the update rate (frames per second), e.g. on slow connections.
+   * Takes effect with the next subscription.
+   *
+   * @param {number|null} rate - Frames per second, null for every update
+   */
+  setMaxRate(rate) {
+    this.maxRate = rate
   }
 
   /**
@@ -235,10 +263,10 @@ export class WebSocketClient {
 
       // Re-subscribe to previous subscriptions
       if (this.subscriptions.size > 0 || this.dashboardId) {
-        this.socket.emit('subscribe', {
-          metrics: Array.from(this.subscriptions),
-          dashboard_id: this.dashboardId
-        })
+        this.socket.emit(
+          'subscribe',
+          this._subscribePayload(Array.from(this.subscriptions), this.dashboardId, this.backfill)
+        )
       }
     })
 
@@ -281,6 +309,29 @@ export class WebSocketClient {
       this._handleMetricUpdate(data)
     })
 
+    // One frame per poll cycle with all changed, subscribed metrics
+    this.socket.on('metrics_batch', (frame, ack) => {
+      // Acknowledge so the server can track our backlog
+      if (typeof ack === 'function') ack()
+      if (!frame || !frame.metrics) return
+      const updates = {}
+      for (const [metric, value] of Object.entries(frame.metrics)) {
+        updates[metric] = { metric, value, timestamp: frame.timestamp }
+      }
+      this._handleMetricUpdate(updates)
+    })
+
+    // Sent right after subscribing: current values and recent history
+    this.socket.on('metrics_snapshot', (snapshot) => {
+      this._emit('metrics_snapshot', snapshot)
+      if (!snapshot || !snapshot.metrics) return
+      const updates = {}
+      for (const [metric, value] of Object.entries(snapshot.metrics)) {
+        updates[metric] = { metric, value, timestamp: snapshot.timestamp }
+      }
+      this._handleMetricUpdate(updates)
+    })
+
     this.socket.on('dashboard_update', (data) => {
       this._emit('dashboard_update', data)
     })
@@ -368,7 +419,8 @@ export function useWebSocket(onMetricUpdate = null, onStateChange = null) {
 
   return {
     client: wsClient,
-    subscribe: (metrics, dashboardId) => wsClient.subscribe(metrics, dashboardId),
+    subscribe: (metrics, dashboardId, backfill) =>
+      wsClient.subscribe(metrics, dashboardId, backfill),
     unsubscribe: (metrics, dashboardId) => wsClient.unsubscribe(metrics, dashboardId),
     disconnect: () => wsClient.disconnect(),
     isConnected: () => wsClient.isConnected(),
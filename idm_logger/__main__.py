@@ -2,9 +2,20 @@
 # SPDX-License-Identifier: MIT
 """
 IDM Heat Pump Logger - Entry point for Python module execution.
+
+gevent (WEB_SERVER=gevent) must patch the standard library before anything
+imports it, so the application is only imported after the patch.
 """
 
-from .logger import main
+from .server_mode import apply_monkey_patch
+
+
+def run():
+    apply_monkey_patch()
+    from .logger import main
 
-if __name__ == "__main__":
     main()
+
+
+if __name__ == "__main__":
+    run()
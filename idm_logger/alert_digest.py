@@ -0,0 +1,165 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Coalescing of alert notifications.
+
+When the heat pump goes into a fault, many rules trigger at once and each
+would become its own message on every provider. The digest collects the
+alerts of one poll cycle (or of ``alerts.digest_window`` seconds, if set)
+and sends a single combined message, grouped by severity and sensor. The
+same alert triggering repeatedly within the window is listed once with a
+count. A batch with a single alert is sent unchanged.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("critical", "warning", "info")
+DEFAULT_SEVERITY = "warning"
+
+SEVERITY_LABELS = {
+    "critical": "Kritisch",
+    "warning": "Warnung",
+    "info": "Info",
+}
+
+
+class DigestEntry:
+    __slots__ = ("alert_id", "name", "sensor", "severity", "message", "count")
+
+    def __init__(self, alert: Dict, message: str):
+        self.alert_id = alert.get("id")
+        self.name = alert.get("name")
+        self.sensor = alert.get("sensor")
+        severity = alert.get("severity") or DEFAULT_SEVERITY
+        self.severity = severity if severity in SEVERITIES else DEFAULT_SEVERITY
+        self.message = message
+        self.count = 1
+
+
+def render_digest(entries: List[DigestEntry], timestamp: float) -> str:
+    """Combined message text, most severe first, then by sensor."""
+    counts = {}
+    for entry in entries:
+        counts[entry.severity] = counts.get(entry.severity, 0) + 1
+    summary = ", ".join(
+        f"{counts[s]} {SEVERITY_LABELS[s]}" for s in SEVERITIES if s in counts
+    )
+    lines = [
+        f"{len(entries)} Alarme um {time.strftime('%H:%M:%S', time.localtime(timestamp))}"
+        f" ({summary})"
+    ]
+
+    for severity in SEVERITIES:
+        group = [e for e in entries if e.severity == severity]
+        if not group:
+            continue
+        lines.append("")
+        lines.append(f"[{SEVERITY_LABELS[severity]}]")
+        group.sort(key=lambda e: (e.sensor or "", e.name or ""))
+        current_sensor = object()
+        for entry in group:
+            if entry.sensor != current_sensor:
+                current_sensor = entry.sensor
+                lines.append(entry.sensor or "Allgemein")
+            repeat = f" ({entry.count}x)" if entry.count > 1 else ""
+            lines.append(f"- {entry.message}{repeat}")
+    return "\n".join(lines)
+
+
+class AlertDigest:
+    """Batches triggered alerts and hands combined messages to ``send``."""
+
+    def __init__(
+        self,
+        send: Callable[..., None],
+        window: Callable[[], float] = lambda: 0.0,
+    ):
+        """
+        Args:
+            send: Called as ``send(message, subject=...)``.
+            window: Returns the batching window in seconds (0 = per cycle).
+        """
+        self._send = send
+        self._window = window
+        self._lock = threading.Lock()
+        self._entries: Dict[object, DigestEntry] = {}
+        self._opened: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self.digests_sent = 0
+        self.messages_sent = 0
+        self.alerts_batched = 0
+        self.repeats_collapsed = 0
+
+    def add(self, alert: Dict, message: str):
+        """Collect one triggered alert."""
+        with self._lock:
+            key = alert.get("id") or id(alert)
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Repeat within the window: keep the latest text, count it
+                entry.message = message
+                entry.count += 1
+                self.repeats_collapsed += 1
+                return
+            self._entries[key] = DigestEntry(alert, message)
+            self.alerts_batched += 1
+            if self._opened is None:
+                self._opened = time.time()
+                window = self._window()
+                if window > 0:
+                    self._timer = threading.Timer(window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def end_cycle(self):
+        """Called after each alert check; flushes unless a window is open."""
+        if self._timer is None:
+            self.flush()
+
+    def flush(self):
+        """Send everything collected so far."""
+        with self._lock:
+            entries = list(self._entries.values())
+            opened = self._opened
+            self._entries = {}
+            self._opened = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not entries:
+            return
+
+        if len(entries) == 1 and entries[0].count == 1:
+            entry = entries[0]
+            self._deliver(entry.message, f"IDM Alert: {entry.name}")
+            return
+
+        self._deliver(
+            render_digest(entries, opened),
+            f"IDM Alert: {len(entries)} Alarme",
+        )
+        self.digests_sent += 1
+
+    def _deliver(self, message: str, subject: str):
+        try:
+            self._send(message, subject=subject)
+            self.messages_sent += 1
+        except Exception as e:
+            logger.error(f"Failed to send alert notification: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = len(self._entries)
+        return {
+            "window": self._window(),
+            "pending": pending,
+            "messages_sent": self.messages_sent,
+            "digests_sent": self.digests_sent,
+            "alerts_batched": self.alerts_batched,
+            "repeats_collapsed": self.repeats_collapsed,
+        }
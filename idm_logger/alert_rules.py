@@ -0,0 +1,352 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Compiled alert rules.
+
+Alerts are stored as plain dicts (database rows). Evaluating them directly
+means converting the threshold string and dispatching on the condition for
+every alert on every poll cycle. Instead, each enabled alert is compiled once
+(on load, add and update) into a ``CompiledRule`` with a prebuilt float
+threshold and comparison operator.
+
+``RuleIndex`` groups threshold rules by sensor, so a cycle only evaluates the
+rules whose sensor value changed, plus the rules whose condition currently
+holds (they re-trigger when their interval has passed). Status alerts only
+depend on time and sit in a ``TimerWheel`` until they are due.
+
+Windowed rules compare an aggregate of the last ``window_seconds`` (mean,
+max, min or delta) instead of the single sample. Each sensor/window pair
+has one ``SensorWindow`` shared by all its rules, updated in O(1) amortized
+per sample (running sum and monotonic deques). ``for_seconds`` requires the
+condition to hold continuously for that long before the alert fires.
+"""
+
+import logging
+import operator
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_NUMERIC_OPERATORS = {
+    ">": operator.gt,
+    "<": operator.lt,
+    "=": operator.eq,
+    "!=": operator.ne,
+}
+
+# Only equality works on non-numeric values (e.g. mode strings)
+_STRING_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+}
+
+
+# Value a rule compares against its threshold
+AGGREGATES = ("value", "mean", "max", "min", "delta")
+
+
+def _to_float(v) -> Optional[float]:
+    """Helper to convert to float if possible."""
+    if type(v) is float or type(v) is int:
+        return v
+    try:
+        return float(v)
+    except (ValueError, TypeError):
+        return None
+
+
+class SensorWindow:
+    """Sliding time window over the numeric samples of one sensor."""
+
+    __slots__ = ("seconds", "_samples", "_sum", "_max", "_min")
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._samples = deque()  # (timestamp, value)
+        self._sum = 0.0
+        # Monotonic deques: candidates for max (decreasing) and min (increasing)
+        self._max = deque()
+        self._min = deque()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def push(self, timestamp: float, value: float):
+        self._samples.append((timestamp, value))
+        self._sum += value
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        self.expire(timestamp)
+
+    def expire(self, now: float):
+        """Drop samples older than the window."""
+        cutoff = now - self.seconds
+        samples = self._samples
+        while samples and samples[0][0] < cutoff:
+            self._sum -= samples.popleft()[1]
+        while self._max and self._max[0][0] < cutoff:
+            self._max.popleft()
+        while self._min and self._min[0][0] < cutoff:
+            self._min.popleft()
+        if not samples:
+            self._sum = 0.0  # no float drift across empty periods
+
+    def aggregate(self, kind: str) -> Optional[float]:
+        if not self._samples:
+            return None
+        if kind == "mean":
+            return self._sum / len(self._samples)
+        if kind == "max":
+            return self._max[0][1]
+        if kind == "min":
+            return self._min[0][1]
+        if kind == "delta":
+            return self._samples[-1][1] - self._samples[0][1]
+        return self._samples[-1][1]
+
+
+class CompiledRule:
+    """
+    Predicate of one alert.
+
+    Keeps a reference to the alert dict, which stays the source of truth for
+    name, message and ``last_triggered``.
+    """
+
+    __slots__ = (
+        "alert",
+        "id",
+        "type",
+        "sensor",
+        "interval",
+        "_numeric_op",
+        "_string_op",
+        "_threshold",
+        "_threshold_str",
+        "aggregate",
+        "window_seconds",
+        "for_seconds",
+        "window",
+        "holds_since",
+        "last_value",
+    )
+
+    def __init__(self, alert: Dict[str, Any]):
+        self.alert = alert
+        self.id = alert.get("id")
+        self.type = alert.get("type")
+        self.sensor = alert.get("sensor")
+        self.interval = int(alert.get("interval_seconds") or 0)
+
+        condition = alert.get("condition")
+        self._numeric_op = _NUMERIC_OPERATORS.get(condition)
+        self._string_op = _STRING_OPERATORS.get(condition)
+        self._threshold_str = str(alert.get("threshold"))
+        self._threshold = _to_float(self._threshold_str)
+
+        self.aggregate = alert.get("aggregate") or "value"
+        if self.aggregate not in AGGREGATES:
+            raise ValueError(f"unknown aggregate {self.aggregate!r}")
+        self.window_seconds = int(alert.get("window_seconds") or 0)
+        if self.aggregate != "value" and self.window_seconds <= 0:
+            raise ValueError(f"aggregate {self.aggregate} needs window_seconds")
+        self.for_seconds = int(alert.get("for_seconds") or 0)
+        self.window: Optional[SensorWindow] = None
+        self.holds_since: Optional[float] = None
+        self.last_value = None
+
+    @property
+    def windowed(self) -> bool:
+        return self.aggregate != "value"
+
+    def matches(self, value) -> bool:
+        """True if the condition holds for the given sensor value."""
+        if self._threshold is not None:
+            value_f = _to_float(value)
+            if value_f is not None:
+                return self._numeric_op is not None and self._numeric_op(
+                    value_f, self._threshold
+                )
+        return self._string_op is not None and self._string_op(
+            str(value), self._threshold_str
+        )
+
+    def ready(self, now: float) -> bool:
+        """Condition held long enough and the interval has passed."""
+        if self.holds_since is None or now - self.holds_since < self.for_seconds:
+            return False
+        return not self.cooling_down(now)
+
+    def cooling_down(self, now: float) -> bool:
+        if self.interval <= 0:
+            return False
+        return now - self.alert.get("last_triggered", 0) < self.interval
+
+    def next_due(self) -> float:
+        return self.alert.get("last_triggered", 0) + self.interval
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel.
+
+    Scheduling and expiring are O(1) per timer; advancing only looks at the
+    slots of the ticks that passed. Timers further away than one revolution
+    share slots and stay there until their tick is reached.
+    """
+
+    def __init__(self, now: float, resolution: float = 1.0, slots: int = 512):
+        self.resolution = resolution
+        self._slots: List[List[Tuple[int, Any]]] = [[] for _ in range(slots)]
+        self._tick = self._to_tick(now) - 1  # last processed tick
+        self._size = 0
+
+    def _to_tick(self, when: float) -> int:
+        return int(when // self.resolution)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, when: float, item):
+        """Schedule ``item``; times in the past fire on the next advance."""
+        tick = max(self._to_tick(when), self._tick + 1)
+        self._slots[tick % len(self._slots)].append((tick, item))
+        self._size += 1
+
+    def advance(self, now: float) -> List[Any]:
+        """Remove and return all items due at ``now``, earliest first."""
+        target = self._to_tick(now)
+        if target <= self._tick:
+            return []
+
+        slot_count = len(self._slots)
+        if target - self._tick >= slot_count:
+            indices: Iterable[int] = range(slot_count)
+        else:
+            indices = (t % slot_count for t in range(self._tick + 1, target + 1))
+
+        expired = []
+        for index in indices:
+            slot = self._slots[index]
+            if not slot:
+                continue
+            remaining = []
+            for entry in slot:
+                (expired if entry[0] <= target else remaining).append(entry)
+            self._slots[index] = remaining
+
+        self._tick = target
+        self._size -= len(expired)
+        expired.sort(key=lambda entry: entry[0])
+        return [item for _, item in expired]
+
+
+class RuleIndex:
+    """Compiled, sensor-indexed view of a list of alerts."""
+
+    def __init__(
+        self,
+        alerts: Iterable[Dict[str, Any]],
+        now: float,
+        previous: Optional["RuleIndex"] = None,
+    ):
+        """
+        Args:
+            alerts: Alert dicts.
+            now: Current time (for the status timer wheel).
+            previous: Index being replaced; its sensor windows are kept, so
+                editing one alert does not reset the history of the others.
+        """
+        self.by_sensor: Dict[str, List[CompiledRule]] = {}
+        self.windowed: Dict[str, List[CompiledRule]] = {}
+        self.windows: Dict[Tuple[str, int], SensorWindow] = {}
+        self.status = TimerWheel(now)
+        self.active: Dict[str, CompiledRule] = {}  # condition currently holds
+        self._last_values: Dict[str, Any] = {}
+        self.rule_count = 0
+        old_windows = previous.windows if previous is not None else {}
+
+        for alert in alerts:
+            if not alert.get("enabled"):
+                continue
+            try:
+                rule = CompiledRule(alert)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Invalid alert {alert.get('name')}: {e}")
+                continue
+
+            if rule.type == "status":
+                # Status reports trigger based on interval only
+                # If interval is 0, it would trigger every loop (bad), so skip it
+                if rule.interval <= 0:
+                    logger.warning(
+                        f"Status alert {alert.get('name')} has invalid interval 0, skipping"
+                    )
+                    continue
+                self.status.schedule(rule.next_due(), rule)
+            elif rule.type == "threshold" and rule.sensor:
+                if rule.windowed:
+                    key = (rule.sensor, rule.window_seconds)
+                    window = self.windows.get(key) or old_windows.get(key)
+                    rule.window = self.windows[key] = window or SensorWindow(
+                        rule.window_seconds
+                    )
+                    self.windowed.setdefault(rule.sensor, []).append(rule)
+                else:
+                    self.by_sensor.setdefault(rule.sensor, []).append(rule)
+            else:
+                continue
+            self.rule_count += 1
+
+    def _set_state(self, rule: CompiledRule, holds: bool, value, now: float):
+        if holds:
+            if rule.id not in self.active:
+                rule.holds_since = now
+                self.active[rule.id] = rule
+            rule.last_value = value
+        elif self.active.pop(rule.id, None) is not None:
+            rule.holds_since = None
+
+    def update(self, current_data: Dict[str, Any], now: float):
+        """
+        Re-evaluate the rules of sensors whose value changed.
+
+        Windowed rules are evaluated every cycle, since their aggregate
+        moves with time even if the sensor value does not.
+        """
+        last_values = self._last_values
+        for sensor, rules in self.by_sensor.items():
+            value = current_data.get(sensor, _MISSING)
+            if last_values.get(sensor, _MISSING) == value:
+                continue
+            last_values[sensor] = value
+            for rule in rules:
+                try:
+                    holds = value is not _MISSING and rule.matches(value)
+                except Exception as e:
+                    logger.error(f"Error checking alert {rule.alert.get('name')}: {e}")
+                    holds = False
+                self._set_state(rule, holds, value, now)
+
+        if not self.windowed:
+            return
+        for (sensor, _), window in self.windows.items():
+            value = _to_float(current_data.get(sensor))
+            if value is None or value != value:  # missing or NaN
+                window.expire(now)
+            else:
+                window.push(now, value)
+        for rules in self.windowed.values():
+            for rule in rules:
+                aggregate = rule.window.aggregate(rule.aggregate)
+                if aggregate is None:
+                    self._set_state(rule, False, None, now)
+                    continue
+                self._set_state(rule, rule.matches(aggregate), round(aggregate, 2), now)
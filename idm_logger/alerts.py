@@ -5,26 +5,40 @@ import time
 import logging
 import uuid
 from typing import Dict, Any
+from .alert_digest import DEFAULT_SEVERITY, AlertDigest
+from .alert_rules import CompiledRule, RuleIndex
+from .config import config
 from .db import db
 from .notifications import notification_manager
 
 logger = logging.getLogger(__name__)
 
 
-def _to_float(v):
-    """Helper to convert to float if possible."""
-    try:
-        return float(v)
-    except (ValueError, TypeError):
-        return None
-
-
 class AlertManager:
     def __init__(self):
-        self.alerts = []
+        self._alerts = []
+        self._rules = None
         self.lock = threading.Lock()
+        self.digest = AlertDigest(
+            self._send,
+            window=lambda: float(config.get("alerts.digest_window", 0) or 0),
+        )
         self.load()
 
+    @property
+    def alerts(self):
+        return self._alerts
+
+    @alerts.setter
+    def alerts(self, alerts):
+        """Replace all alerts and recompile the rule index."""
+        self._alerts = alerts
+        self._compile()
+
+    def _compile(self):
+        """Rebuild compiled rules after alerts changed (caller holds the lock)."""
+        self._rules = RuleIndex(self._alerts, time.time(), previous=self._rules)
+
     def load(self):
         with self.lock:
             self.alerts = db.get_alerts()
@@ -43,104 +57,94 @@ class AlertManager:
                 "message": alert_data.get("message"),
                 "enabled": alert_data.get("enabled", True),
                 "interval_seconds": int(alert_data.get("interval_seconds", 0)),
+                # Windowed conditions: 'value', 'mean', 'max', 'min', 'delta'
+                "aggregate": alert_data.get("aggregate") or "value",
+                "window_seconds": int(alert_data.get("window_seconds") or 0),
+                "for_seconds": int(alert_data.get("for_seconds") or 0),
+                "severity": alert_data.get("severity") or DEFAULT_SEVERITY,
                 "last_triggered": 0,
             }
             db.add_alert(alert)
-            self.alerts.append(alert)
+            self._alerts.append(alert)
+            self._compile()
             return alert
 
     def update_alert(self, alert_id, data):
         with self.lock:
             db.update_alert(alert_id, data)
-            for alert in self.alerts:
+            for alert in self._alerts:
                 if alert["id"] == alert_id:
                     alert.update(data)
                     break
+            self._compile()
 
     def delete_alert(self, alert_id):
         with self.lock:
             db.delete_alert(alert_id)
-            self.alerts = [a for a in self.alerts if a["id"] != alert_id]
+            self.alerts = [a for a in self._alerts if a["id"] != alert_id]
 
     def check_alerts(self, current_data: Dict[str, Any]):
         """
         Check all alerts against current data.
         Should be called periodically (e.g. every loop or every minute).
+
+        Only rules of changed sensors (and windowed rules) are evaluated;
+        rules whose condition holds are re-checked for their hold time and
+        interval, status alerts come from the timer wheel when due.
         """
         with self.lock:
             now = time.time()
+            rules = self._rules
             triggered_alerts_ids = []
-            for alert in self.alerts:
-                if not alert.get("enabled"):
+
+            rules.update(current_data, now)
+            for rule in list(rules.active.values()):
+                if not rule.ready(now):
                     continue
+                if self._fire(rule, rule.last_value, now):
+                    triggered_alerts_ids.append(rule.id)
 
-                try:
-                    should_trigger = False
-                    trigger_value = None
-
-                    # Check cooldown / interval
-                    last_triggered = alert.get("last_triggered", 0)
-                    interval = alert.get("interval_seconds", 0)
-
-                    if interval > 0 and (now - last_triggered) < interval:
-                        continue
-
-                    if alert["type"] == "status":
-                        # Status reports trigger based on interval only
-                        # If interval is 0, it would trigger every loop (bad), so force min interval
-                        if interval <= 0:
-                            logger.warning(
-                                f"Status alert {alert['name']} has invalid interval 0, skipping"
-                            )
-                            continue
-                        should_trigger = True
-
-                    elif alert["type"] == "threshold":
-                        sensor = alert.get("sensor")
-                        condition = alert.get("condition")
-                        threshold_str = str(alert.get("threshold"))
-
-                        if sensor not in current_data:
-                            continue
-
-                        current_val = current_data[sensor]
-                        trigger_value = current_val
-
-                        val_f = _to_float(current_val)
-                        thresh_f = _to_float(threshold_str)
-
-                        if val_f is not None and thresh_f is not None:
-                            # Numeric comparison
-                            if condition == ">":
-                                should_trigger = val_f > thresh_f
-                            elif condition == "<":
-                                should_trigger = val_f < thresh_f
-                            elif condition == "=":
-                                should_trigger = val_f == thresh_f
-                            elif condition == "!=":
-                                should_trigger = val_f != thresh_f
-                        else:
-                            # String comparison
-                            val_s = str(current_val)
-                            if condition == "=":
-                                should_trigger = val_s == threshold_str
-                            elif condition == "!=":
-                                should_trigger = val_s != threshold_str
-
-                    if should_trigger:
-                        self._trigger_alert(alert, trigger_value)
-
-                        # Update last_triggered in memory and batch update for db
-                        # Optimization: Batch DB updates to prevent N+1 write performance issue
-                        alert["last_triggered"] = now
-                        triggered_alerts_ids.append(alert["id"])
-
-                except Exception as e:
-                    logger.error(f"Error checking alert {alert.get('name')}: {e}")
+            for rule in rules.status.advance(now):
+                if rule.cooling_down(now):
+                    # last_triggered changed since scheduling
+                    rules.status.schedule(rule.next_due(), rule)
+                    continue
+                if self._fire(rule, None, now):
+                    triggered_alerts_ids.append(rule.id)
+                    rules.status.schedule(now + rule.interval, rule)
+                else:
+                    # Retry with the next cycle
+                    rules.status.schedule(now, rule)
 
             if triggered_alerts_ids:
+                self.digest.end_cycle()
                 db.update_alerts_last_triggered(triggered_alerts_ids, now)
 
+    def _fire(self, rule: CompiledRule, value, now: float) -> bool:
+        alert = rule.alert
+        try:
+            self._trigger_alert(alert, value)
+        except Exception as e:
+            logger.error(f"Error checking alert {alert.get('name')}: {e}")
+            return False
+        # Update last_triggered in memory and batch update for db
+        # Optimization: Batch DB updates to prevent N+1 write performance issue
+        alert["last_triggered"] = now
+        return True
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "alerts": len(self._alerts),
+                "compiled_rules": self._rules.rule_count,
+                "indexed_sensors": len(self._rules.by_sensor),
+                "active_rules": len(self._rules.active),
+                "windowed_rules": sum(map(len, self._rules.windowed.values())),
+                "windows": len(self._rules.windows),
+                "scheduled_status_alerts": len(self._rules.status),
+                "digest": self.digest.get_stats(),
+            }
+
     def _trigger_alert(self, alert, value):
         logger.info(f"Triggering alert: {alert['name']}")
 
@@ -157,8 +161,12 @@ class AlertManager:
         if alert.get("sensor"):
             msg = msg.replace("{sensor}", alert["sensor"])
 
+        # Combined with other alerts of this cycle/window into one message
+        self.digest.add(alert, msg)
+
+    def _send(self, message, subject):
         # Use notification manager instead of hardcoded Signal
-        notification_manager.send_all(msg, subject=f"IDM Alert: {alert['name']}")
+        notification_manager.send_all(message, subject=subject)
 
 
 alert_manager = AlertManager()
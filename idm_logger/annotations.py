@@ -4,10 +4,27 @@ Annotations Management for Dashboards
 
 Allows users to add time-based markers/annotations to charts
 (e.g., "Wartung am 15.1.", "Filter gewechselt", "Fehler behoben")
+
+Annotations are rows of the ``annotations`` table, indexed on
+(dashboard_id, time), so a chart's time range is an index range scan and
+adding one (e.g. for every ML anomaly) is a single insert. Old annotations
+are pruned by a retention policy.
 """
 
+import json
+import logging
+import time as time_module
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+from .db import db
+
+logger = logging.getLogger(__name__)
+
+# Defaults of annotations.retention_days / annotations.max_count (0 = no limit)
+RETENTION_DAYS = 365
+MAX_ANNOTATIONS = 10000
+PRUNE_INTERVAL = 3600  # seconds between retention runs
 
 
 class Annotation:
@@ -60,38 +77,79 @@ class Annotation:
 class AnnotationManager:
     """Manages annotations for dashboards"""
 
-    def __init__(self, config):
+    def __init__(self, config, database=None):
         self.config = config
-        self.annotations_file = "annotations.json"
+        self.db = database or db
+        self._last_prune = 0.0
+        self._migrate()
+
+    def _migrate(self):
+        """Move annotations still stored in the config into the table."""
+        legacy = self.config.data.get("annotations")
+        if not isinstance(legacy, list):
+            return
+        try:
+            self.db.add_annotations(
+                [Annotation.from_dict(a).to_dict() for a in legacy if a.get("id")]
+            )
+            del self.config.data["annotations"]
+            self.config.save()
+            logger.info(f"Moved {len(legacy)} annotations from config to database")
+        except Exception as e:
+            logger.error(f"Failed to migrate annotations: {e}")
+
+    @staticmethod
+    def _from_row(row: Dict) -> Annotation:
+        return Annotation(
+            annotation_id=row["id"],
+            time=row["time"],
+            text=row["text"] or "",
+            tags=json.loads(row["tags"] or "[]"),
+            color=row["color"] or "#ef4444",
+            dashboard_id=row["dashboard_id"],
+            acknowledged=bool(row["acknowledged"]),
+        )
+
+    def query(
+        self,
+        start: int = None,
+        end: int = None,
+        dashboard_id: str = None,
+        tag: str = None,
+        acknowledged: bool = None,
+        limit: int = None,
+        offset: int = 0,
+    ) -> Tuple[List[Annotation], int]:
+        """
+        Get annotations matching all given filters, newest first.
+
+        Returns:
+            The requested page and the total number of matches.
+        """
+        rows, total = self.db.query_annotations(
+            start=start,
+            end=end,
+            dashboard_id=dashboard_id,
+            tag=tag,
+            acknowledged=acknowledged,
+            limit=limit,
+            offset=offset,
+        )
+        return [self._from_row(row) for row in rows], total
 
     def get_all_annotations(self) -> List[Annotation]:
         """Get all annotations"""
-        data = self.config.data.get("annotations", [])
-        return [Annotation.from_dict(a) for a in data]
+        return self.query()[0]
 
     def get_annotations_for_dashboard(self, dashboard_id: str) -> List[Annotation]:
         """Get annotations for a specific dashboard"""
-        all_annotations = self.get_all_annotations()
-        return [
-            a
-            for a in all_annotations
-            if a.dashboard_id == dashboard_id or a.dashboard_id is None
-        ]
+        return self.query(dashboard_id=dashboard_id)[0]
 
     def get_annotations_for_time_range(
         self, start: int, end: int, dashboard_id: str = None
     ) -> List[Annotation]:
         """Get annotations within a time range"""
-        annotations = self.get_all_annotations()
-
-        if dashboard_id:
-            annotations = [
-                a
-                for a in annotations
-                if a.dashboard_id == dashboard_id or a.dashboard_id is None
-            ]
-
-        return [a for a in annotations if start <= a.time <= end]
+        return self.query(start=start, end=end, dashboard_id=dashboard_id or None)[0]
 
     def add_annotation(
         self,
@@ -117,11 +175,8 @@ class AnnotationManager:
             acknowledged=acknowledged,
         )
 
-        if "annotations" not in self.config.data:
-            self.config.data["annotations"] = []
-
-        self.config.data["annotations"].append(annotation.to_dict())
-        self.config.save()
+        self.db.add_annotations([annotation.to_dict()])
+        self._maybe_prune()
 
         return annotation
 
@@ -135,43 +190,54 @@ class AnnotationManager:
         acknowledged: bool = None,
     ) -> Optional[Annotation]:
         """Update an existing annotation"""
-        annotations = self.config.data.get("annotations", [])
-
-        for i, ann in enumerate(annotations):
-            if ann["id"] == annotation_id:
-                if time is not None:
-                    ann["time"] = time
-                if text is not None:
-                    ann["text"] = text
-                if tags is not None:
-                    ann["tags"] = tags
-                if color is not None:
-                    ann["color"] = color
-                if acknowledged is not None:
-                    ann["acknowledged"] = acknowledged
-
-                self.config.data["annotations"][i] = ann
-                self.config.save()
-                return Annotation.from_dict(ann)
-
-        return None
+        fields = {
+            "time": time,
+            "text": text,
+            "tags": tags,
+            "color": color,
+            "acknowledged": acknowledged,
+        }
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if not self.db.update_annotation(annotation_id, fields):
+            return None
+        return self.get_annotation(annotation_id)
 
     def delete_annotation(self, annotation_id: str) -> bool:
         """Delete an annotation"""
-        annotations = self.config.data.get("annotations", [])
-
-        for i, ann in enumerate(annotations):
-            if ann["id"] == annotation_id:
-                del self.config.data["annotations"][i]
-                self.config.save()
-                return True
-
-        return False
+        return self.db.delete_annotation(annotation_id)
 
     def get_annotation(self, annotation_id: str) -> Optional[Annotation]:
         """Get a specific annotation by ID"""
-        annotations = self.get_all_annotations()
-        for annotation in annotations:
-            if annotation.id == annotation_id:
-                return annotation
-        return None
+        row = self.db.get_annotation(annotation_id)
+        return self._from_row(row) if row else None
+
+    def prune(self, now: float = None) -> int:
+        """
+        Apply the retention policy (``annotations.retention_days`` and
+        ``annotations.max_count``, 0 disables either).
+
+        Returns:
+            Number of deleted annotations.
+        """
+        now = datetime.now().timestamp() if now is None else now
+        days = self.config.get("annotations.retention_days", RETENTION_DAYS)
+        max_count = self.config.get("annotations.max_count", MAX_ANNOTATIONS)
+        before = int(now - float(days) * 86400) if days else None
+        keep = int(max_count) if max_count else None
+        if before is None and keep is None:
+            return 0
+
+        deleted = self.db.prune_annotations(before=before, keep=keep)
+        if deleted:
+            logger.info(f"Pruned {deleted} old annotations")
+        return deleted
+
+    def _maybe_prune(self):
+        now = time_module.monotonic()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        try:
+            self.prune()
+        except Exception as e:
+            logger.error(f"Failed to prune annotations: {e}")
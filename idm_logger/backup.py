@@ -15,8 +15,11 @@ from typing import Dict, Any
 import requests
 import threading
 
+from .annotations import Annotation
 from .config import config, DATA_DIR
+from .dashboard_config import dashboard_manager
 from .db import db
+from .vm_client import get_vm_client
 
 try:
     from webdav4.client import Client as WebDavClient
@@ -121,23 +124,20 @@ class BackupManager:
             True if successful, False otherwise
         """
         try:
-            vm_url = os.environ.get("METRICS_URL", "http://victoriametrics:8428")
-
-            # Normalize URL for snapshot API (remove /write suffix if present)
-            vm_snapshot_url = vm_url.replace("/write", "").replace("/api/v1/write", "")
+            vm = get_vm_client(
+                os.environ.get("METRICS_URL", "http://victoriametrics:8428")
+            )
 
-            # Create snapshot via API
-            logger.info(f"Creating VictoriaMetrics snapshot at {vm_snapshot_url}...")
-            response = requests.post(f"{vm_snapshot_url}/snapshot/create", timeout=60)
+            # Create snapshot via API (not retried, each call creates a snapshot)
+            logger.info(f"Creating VictoriaMetrics snapshot at {vm.base_url}...")
+            response = vm.post("/snapshot/create", retries=0, timeout=60)
 
             if response.status_code != 200:
                 logger.error(f"Failed to create VM snapshot: {response.status_code}")
                 logger.error(f"Response: {response.text}")
                 # Try alternative endpoint
                 logger.info("Trying alternative snapshot endpoint...")
-                response = requests.post(
-                    f"{vm_snapshot_url}/api/v1/snapshot/create", timeout=60
-                )
+                response = vm.post("/api/v1/snapshot/create", retries=0, timeout=60)
                 if response.status_code != 200:
                     logger.error(
                         f"Alternative endpoint also failed: {response.status_code}"
@@ -204,10 +204,8 @@ class BackupManager:
             )
 
             # Clean up snapshot in container to save space
-            delete_response = requests.post(
-                f"{vm_url}/snapshot/delete",
-                params={"snapshot": snapshot_name},
-                timeout=30,
+            delete_response = vm.post(
+                "/snapshot/delete", params={"snapshot": snapshot_name}, timeout=30
             )
 
             if delete_response.status_code == 200:
@@ -477,17 +475,22 @@ class BackupManager:
             # 1. Backup configuration (from config.data)
             config_copy = config.data.copy()
             backup_data["config"] = config_copy
+            backup_data["dashboards"] = db.get_dashboards()
+            annotations, _ = db.query_annotations()
+            backup_data["annotations"] = [
+                dict(
+                    row,
+                    tags=json.loads(row["tags"] or "[]"),
+                    acknowledged=bool(row["acknowledged"]),
+                )
+                for row in annotations
+            ]
 
             # 2. Backup all database settings (including scheduler rules)
             try:
                 # Get all settings from database
                 all_settings = {}
-                conn = db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT key, value FROM settings")
-                for row in cursor.fetchall():
-                    key, value = row
-
+                for key, value in db.get_all_settings().items():
                     # Handle scheduler_rules specifically
                     if key == "scheduler_rules":
                         try:
@@ -508,7 +511,6 @@ class BackupManager:
                         all_settings[key] = value
 
                 backup_data["db_settings"] = all_settings
-                conn.close()
             except Exception as e:
                 logger.warning(f"Could not backup database settings: {e}")
 
@@ -566,6 +568,8 @@ class BackupManager:
                     # Add database file if it exists
                     db_path = Path(DATA_DIR) / "idm_logger.db"
                     if db_path.exists():
+                        # Recent commits may still be in the WAL file only
+                        db.checkpoint()
                         zipf.write(db_path, "database/idm_logger.db")
 
                     # Add secret key file
@@ -704,11 +708,14 @@ class BackupManager:
                 return False
 
             # Restore snapshot via API
-            vm_url = os.environ.get("METRICS_URL", "http://victoriametrics:8428")
+            vm = get_vm_client(
+                os.environ.get("METRICS_URL", "http://victoriametrics:8428")
+            )
 
-            response = requests.post(
-                f"{vm_url}/snapshot/restore",
+            response = vm.post(
+                "/snapshot/restore",
                 params={"snapshot": snapshot_dir.name},
+                retries=0,
                 timeout=120,
             )
 
@@ -982,12 +989,38 @@ class BackupManager:
                 )
 
                 # 2. Restore configuration
+                # (older backups have dashboards and annotations inside the config)
+                dashboards = backup_data.get("dashboards")
+                annotations = backup_data.get("annotations")
                 if "config" in backup_data:
+                    legacy_dashboards = backup_data["config"].pop("dashboards", None)
+                    if dashboards is None:
+                        dashboards = legacy_dashboards
+                    legacy_annotations = backup_data["config"].pop("annotations", None)
+                    if annotations is None:
+                        annotations = legacy_annotations
                     config.data = backup_data["config"]
-                    config.save()
+                    config.save(immediate=True)
                     restored_items.append("configuration")
                     logger.info("Configuration restored")
 
+                if isinstance(dashboards, list) and dashboards:
+                    dashboard_manager.restore(dashboards)
+                    restored_items.append("dashboards")
+                    logger.info("Dashboards restored")
+
+                if isinstance(annotations, list) and annotations:
+                    # Annotations that still exist are kept as they are
+                    db.add_annotations(
+                        [
+                            Annotation.from_dict(a).to_dict()
+                            for a in annotations
+                            if a.get("id")
+                        ]
+                    )
+                    restored_items.append("annotations")
+                    logger.info("Annotations restored")
+
                 # 3. Restore scheduler rules
                 if "scheduler" in backup_data and backup_data["scheduler"]:
                     db.set_setting(
@@ -998,13 +1031,15 @@ class BackupManager:
 
                 # 4. Restore other database settings
                 if "db_settings" in backup_data:
-                    for key, value in backup_data["db_settings"].items():
-                        db.set_setting(
-                            key,
-                            json.dumps(value)
+                    # One transaction instead of one per setting
+                    db.set_settings(
+                        {
+                            key: json.dumps(value)
                             if isinstance(value, (dict, list))
-                            else value,
-                        )
+                            else value
+                            for key, value in backup_data["db_settings"].items()
+                        }
+                    )
                     restored_items.append("database_settings")
                     logger.info("Database settings restored")
 
@@ -1,9 +1,31 @@
 # Xerolux 2026
 # SPDX-License-Identifier: MIT
+"""
+Application configuration, stored encrypted in the settings table.
+
+``Config.data`` is the editable tree. Readers go through immutable,
+versioned snapshots instead: ``get()`` is a dictionary lookup in the
+current snapshot's flattened paths, and ``accessor()`` returns a callable
+that only re-resolves its path when a new snapshot was published.
+Components can ``subscribe()`` to paths and are called when a published
+snapshot changes them.
+
+A new snapshot is published after ``save()``, ``set()``, ``reload()``,
+replacing ``data`` or assigning a top-level key. In-place changes inside a
+section become visible with the next ``save()``.
+
+Saves are debounced and diff-based: secrets are only re-encrypted when
+their value changed, and nothing is written if the serialized config
+equals the stored one.
+"""
+
+import atexit
 import json
 import logging
 import os
+import threading
 import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from cryptography.fernet import Fernet, InvalidToken
 from werkzeug.security import generate_password_hash, check_password_hash
 from .db import db
@@ -22,19 +44,242 @@ DOCKER_DEFAULTS = {
 }
 
 
+SAVE_DEBOUNCE = 1.0  # seconds
+SAVE_RETRY = 30.0  # seconds until a failed save is written again
+
+# Stored encrypted: (section, plaintext key, stored key)
+SECRET_FIELDS = (
+    ("mqtt", "password", "encrypted_password"),
+    ("email", "password", "encrypted_password"),
+    ("webdav", "password", "encrypted_password"),
+    ("telemetry", "auth_token", "encrypted_auth_token"),
+)
+
+_MISSING = object()
+
+
+def _flatten(data: Dict, prefix: str = "", out: Optional[Dict] = None) -> Dict:
+    """Map every dotted path (sections included) to its value."""
+    if out is None:
+        out = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        out[path] = value
+        if isinstance(value, dict):
+            _flatten(value, f"{path}.", out)
+    return out
+
+
+def _copy(value):
+    # Snapshot contents are JSON data; hand out copies of containers
+    if isinstance(value, (dict, list)):
+        return json.loads(json.dumps(value))
+    return value
+
+
+class ConfigSnapshot:
+    """Immutable view of the configuration at one version."""
+
+    __slots__ = ("version", "data", "_values")
+
+    def __init__(self, version: int, data: Dict):
+        self.version = version
+        self.data = data
+        self._values = _flatten(data)
+
+    def get(self, path: str, default=None):
+        value = self._values.get(path, _MISSING)
+        if value is _MISSING:
+            return default
+        return _copy(value)
+
+    def changed_paths(self, other: "ConfigSnapshot") -> List[str]:
+        """Paths whose value differs between this and ``other``."""
+        old, new = other._values, self._values
+        return [
+            path
+            for path in old.keys() | new.keys()
+            if old.get(path, _MISSING) != new.get(path, _MISSING)
+        ]
+
+
+class ConfigValue:
+    """
+    Precompiled accessor for one path, re-resolved only after changes.
+
+    The same object is returned until the value itself changes, so callers
+    may cache work derived from it by identity.
+    """
+
+    __slots__ = ("_config", "path", "default", "_version", "_value")
+
+    def __init__(self, config: "Config", path: str, default=None):
+        self._config = config
+        self.path = path
+        self.default = default
+        self._version = -1
+        self._value = default
+
+    def __call__(self):
+        snapshot = self._config.snapshot
+        if snapshot.version != self._version:
+            value = snapshot.get(self.path, self.default)
+            if value != self._value:
+                self._value = value
+            self._version = snapshot.version
+        return self._value
+
+
+class TrackedDict(dict):
+    """Top level of ``Config.data``; assignments publish a new snapshot."""
+
+    def __init__(self, data=(), owner: Optional["Config"] = None):
+        super().__init__(data)
+        self._owner = owner
+
+    def _touch(self):
+        if self._owner is not None:
+            self._owner._touch()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch()
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._touch()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._touch()
+        return item
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._touch()
+        return value
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._touch()
+
+    def clear(self):
+        super().clear()
+        self._touch()
+
+    # Copies are plain dicts, without the reference to the Config
+    def __deepcopy__(self, memo):
+        return json.loads(json.dumps(self))
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
 class Config:
     def __init__(self):
         self.key = self._load_or_create_key()
         self.cipher = Fernet(self.key)
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._revision = 0
+        self._snapshot = ConfigSnapshot(-1, {})
+        self._subscribers: List[Tuple[Tuple[str, ...], Callable]] = []
+        # Plaintext and token of each secret as last stored
+        self._encrypted: Dict[str, Tuple[str, str]] = {}
+        self._saved: Optional[str] = None
+        self._save_pending = False
+        self._save_timer: Optional[threading.Timer] = None
+        self.saves = 0
+        self.saves_skipped = 0
         self.data = self._load_data()
 
         # Ensure installation_id exists
         if not self.data.get("installation_id"):
             self.data["installation_id"] = str(uuid.uuid4())
-            self.save()
+            self.save(immediate=True)
 
         # Apply environment variable overrides
         self._apply_env_overrides()
+        self._touch()
+
+    @property
+    def data(self) -> Dict:
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict):
+        self._data = TrackedDict(value, owner=self)
+        self._touch()
+
+    def _touch(self):
+        """Publish a new snapshot after a change."""
+        with self._lock:
+            self._revision += 1
+        self._publish()
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current immutable snapshot."""
+        return self._snapshot
+
+    def _publish(self) -> ConfigSnapshot:
+        # Runs on the thread that changed the data (set/save/assignment),
+        # never from readers, so the copy cannot race with that change
+        with self._lock:
+            previous = self._snapshot
+            if previous.version == self._revision:
+                return previous
+            snapshot = ConfigSnapshot(
+                self._revision, json.loads(json.dumps(self._data))
+            )
+            self._snapshot = snapshot
+            subscribers = list(self._subscribers)
+
+        if subscribers and previous.version >= 0:
+            changed = snapshot.changed_paths(previous)
+            if changed:
+                self._notify(subscribers, changed, snapshot)
+        return snapshot
+
+    def _notify(self, subscribers, changed: List[str], snapshot: ConfigSnapshot):
+        for prefixes, callback in subscribers:
+            if any(
+                path == prefix or path.startswith(f"{prefix}.")
+                for prefix in prefixes
+                for path in changed
+            ):
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    logger.error(f"Config subscriber {callback!r} failed: {e}")
+
+    def subscribe(self, paths: Iterable[str], callback: Callable) -> Callable:
+        """
+        Call ``callback(snapshot)`` whenever one of ``paths`` (or anything
+        below it) changes.
+
+        Returns:
+            Function that removes the subscription.
+        """
+        entry = (tuple(paths), callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def accessor(self, path: str, default=None) -> ConfigValue:
+        """Callable returning the current value of ``path``, for hot paths."""
+        return ConfigValue(self, path, default)
 
     def _load_or_create_key(self):
         if os.path.exists(KEY_FILE):
@@ -372,22 +617,13 @@ class Config:
             try:
                 data = json.loads(raw)
                 # Decrypt sensitive fields
-                if "mqtt" in data:
-                    data["mqtt"]["password"] = self._decrypt(
-                        data["mqtt"].get("encrypted_password", "")
-                    )
-                if "email" in data:
-                    data["email"]["password"] = self._decrypt(
-                        data["email"].get("encrypted_password", "")
-                    )
-                if "webdav" in data:
-                    data["webdav"]["password"] = self._decrypt(
-                        data["webdav"].get("encrypted_password", "")
-                    )
-                if "telemetry" in data:
-                    data["telemetry"]["auth_token"] = self._decrypt(
-                        data["telemetry"].get("encrypted_auth_token", "")
-                    )
+                for section, field, stored in SECRET_FIELDS:
+                    if section in data:
+                        token = data[section].get(stored, "")
+                        value = self._decrypt(token)
+                        data[section][field] = value
+                        self._encrypted[section] = (value, token)
+                self._saved = raw if isinstance(raw, str) else None
 
                 # Merge loaded data into defaults
                 merged = self._merge_dicts(defaults, data)
@@ -402,49 +638,97 @@ class Config:
         # Default structure with Docker-friendly defaults
         return defaults
 
-    def save(self):
+    def _encrypt_cached(self, section: str, value: str) -> str:
+        """Encrypt a secret, reusing the stored token if it did not change."""
+        cached = self._encrypted.get(section)
+        if cached is not None and cached[0] == value:
+            return cached[1]
+        token = self._encrypt(value)
+        self._encrypted[section] = (value, token)
+        return token
+
+    def _serialize(self, data: Dict) -> str:
+        to_save = dict(data)
         # Encrypt sensitive fields before saving
-        to_save = json.loads(json.dumps(self.data))
-
-        if "mqtt" in to_save:
-            to_save["mqtt"]["encrypted_password"] = self._encrypt(
-                to_save["mqtt"].get("password", "")
-            )
-            if "password" in to_save["mqtt"]:
-                del to_save["mqtt"]["password"]
-
-        if "email" in to_save:
-            to_save["email"]["encrypted_password"] = self._encrypt(
-                to_save["email"].get("password", "")
-            )
-            if "password" in to_save["email"]:
-                del to_save["email"]["password"]
-
-        if "webdav" in to_save:
-            to_save["webdav"]["encrypted_password"] = self._encrypt(
-                to_save["webdav"].get("password", "")
-            )
-            if "password" in to_save["webdav"]:
-                del to_save["webdav"]["password"]
-
-        if "telemetry" in to_save:
-            to_save["telemetry"]["encrypted_auth_token"] = self._encrypt(
-                to_save["telemetry"].get("auth_token", "")
-            )
-            if "auth_token" in to_save["telemetry"]:
-                del to_save["telemetry"]["auth_token"]
-
-        db.set_setting("config", json.dumps(to_save))
+        for section, field, stored in SECRET_FIELDS:
+            if section in to_save:
+                values = dict(to_save[section])
+                values[stored] = self._encrypt_cached(section, values.pop(field, ""))
+                to_save[section] = values
+        return json.dumps(to_save)
+
+    def save(self, immediate: bool = False):
+        """
+        Publish the current data and store it.
+
+        Writes are debounced by ``SAVE_DEBOUNCE`` seconds, so a burst of
+        saves becomes one write; ``immediate`` writes before returning.
+        """
+        self._touch()
+        with self._lock:
+            self._save_pending = True
+            if not immediate:
+                self._schedule_flush(SAVE_DEBOUNCE)
+        if immediate:
+            self.flush()
+
+    def _schedule_flush(self, delay: float):
+        """Start the save timer unless one is running (caller holds the lock)."""
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(delay, self._flush_in_background)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            # Logged and rescheduled by flush()
+            pass
+
+    def flush(self):
+        """
+        Write a pending save now.
+
+        A failed write stays pending and is retried after ``SAVE_RETRY``
+        seconds; the error is raised to the caller.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._save_pending:
+                    return
+                self._save_pending = False
+                snapshot = self.snapshot
+
+            serialized = self._serialize(snapshot.data)
+            if serialized == self._saved:
+                self.saves_skipped += 1
+                return
+            try:
+                db.set_setting("config", serialized)
+            except Exception as e:
+                logger.error(f"Failed to save config, retrying: {e}")
+                with self._lock:
+                    self._save_pending = True
+                    self._schedule_flush(SAVE_RETRY)
+                raise
+            self._saved = serialized
+            self.saves += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            "version": self.snapshot.version,
+            "subscribers": len(self._subscribers),
+            "save_pending": self._save_pending,
+            "saves": self.saves,
+            "saves_skipped": self.saves_skipped,
+        }
 
     def get(self, path, default=None):
-        keys = path.split(".")
-        val = self.data
-        for key in keys:
-            if isinstance(val, dict) and key in val:
-                val = val[key]
-            else:
-                return default
-        return val
+        return self.snapshot.get(path, default)
 
     def set(self, path, value):
         """Set a configuration value by path."""
@@ -455,10 +739,11 @@ class Config:
                 data[key] = {}
             data = data[key]
         data[keys[-1]] = value
+        self._touch()
 
     def set_admin_password(self, password):
         self.data["web"]["admin_password_hash"] = generate_password_hash(password)
-        self.save()
+        self.save(immediate=True)
 
     def check_admin_password(self, password):
         # Default to 'admin' if no hash is set (for initial setup)
@@ -473,6 +758,7 @@ class Config:
         """Reload configuration from database."""
         self.data = self._load_data()
         self._apply_env_overrides()
+        self._touch()
 
     def get_flask_secret_key(self):
         """Returns the stable secret key for Flask sessions."""
@@ -481,3 +767,5 @@ class Config:
 
 
 config = Config()
+# Debounced saves still pending at interpreter exit
+atexit.register(config.flush)
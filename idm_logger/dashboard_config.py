@@ -2,10 +2,13 @@
 # SPDX-License-Identifier: MIT
 """Dashboard configuration management."""
 
+import copy
+import hashlib
 import uuid
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from .config import config
+from .db import db
 
 logger = logging.getLogger(__name__)
 
@@ -183,142 +186,196 @@ def get_default_dashboards() -> List[Dict[str, Any]]:
     ]
 
 
-class DashboardManager:
-    """Manages dashboard configurations."""
-
-    def __init__(self):
-        """Initialize dashboard manager."""
-        self._ensure_dashboards_key()
-        self._repair_broken_dashboards()
-
-    def _repair_broken_dashboards(self):
-        """Repair broken dashboards from bad seed data."""
-        dashboards = self.get_all_dashboards()
-        repaired = False
-
-        for i, dashboard in enumerate(dashboards):
-            if dashboard.get("id") == "default":
-                # Check for broken chart titles from the bad example
-                broken_titles = [
-                    "Underfloor Heating",
-                    "Tank Heating Sensing",
-                    "Radiators Flow & Return: 1st & 2nd Floor",
-                    "3rd Floor: Flow & Return Temperatures",
-                    "3rd Floor Deep Dive",
-                    "Consumption change",
-                ]
-
-                chart_titles = [c.get("title") for c in dashboard.get("charts", [])]
-
-                # If any of the specific broken titles are present
-                if any(title in chart_titles for title in broken_titles):
-                    logger.info("Detected broken dashboard configuration. Repairing...")
-                    # Replace with fresh default
-                    default_dashboards = get_default_dashboards()
-                    # We assume get_default_dashboards returns a list with one dashboard
-                    dashboards[i] = default_dashboards[0]
-                    repaired = True
-                    break
-
-                # Check for old COP query and update it
-                for chart in dashboard.get("charts", []):
-                    if chart.get("title") == "COP Verlauf":
-                        for query in chart.get("queries", []):
-                            # If using the old query without clamp_min
-                            if (
-                                query.get("query")
-                                == "idm_heatpump_power_current / idm_heatpump_power_current_draw"
-                            ):
-                                logger.info(
-                                    "Updating COP query to handle negative values..."
-                                )
-                                query["query"] = (
-                                    "clamp_min(idm_heatpump_power_current / idm_heatpump_power_current_draw, 0)"
-                                )
-                                repaired = True
-
-                # Check for missing AI chart or update it
-                ai_chart_found = False
-                for chart in dashboard.get("charts", []):
-                    if chart.get("title") == "AI Anomalie-Erkennung":
-                        ai_chart_found = True
-                        # Ensure queries are correct
-                        expected_queries = [
-                            {
-                                "label": "Anomalie Score",
-                                "query": "max(idm_anomaly_score_value)",
-                                "color": "#ef4444",
-                            },
-                            {
-                                "label": "Anomalie Flag",
-                                "query": "max(idm_anomaly_flag_value)",
-                                "color": "#f59e0b",
-                            },
-                        ]
-                        # Check if queries match expectation
-                        current_queries = chart.get("queries", [])
-                        if current_queries != expected_queries:
-                            logger.info("Updating AI chart queries...")
-                            chart["queries"] = expected_queries
-                            repaired = True
-                        break
-
-                if not ai_chart_found:
-                    logger.info("Adding missing AI Anomaly chart to dashboard...")
-                    ai_chart = {
-                        "id": str(uuid.uuid4()),
-                        "title": "AI Anomalie-Erkennung",
-                        "queries": [
-                            {
-                                "label": "Anomalie Score",
-                                "query": "max(idm_anomaly_score_value)",
-                                "color": "#ef4444",
-                            },
-                            {
-                                "label": "Anomalie Flag",
-                                "query": "max(idm_anomaly_flag_value)",
-                                "color": "#f59e0b",
-                            },
-                        ],
-                        "hours": 24,
-                    }
-                    dashboard["charts"].append(ai_chart)
+AI_CHART_QUERIES = [
+    {
+        "label": "Anomalie Score",
+        "query": "max(idm_anomaly_score_value)",
+        "color": "#ef4444",
+    },
+    {
+        "label": "Anomalie Flag",
+        "query": "max(idm_anomaly_flag_value)",
+        "color": "#f59e0b",
+    },
+]
+
+# Chart titles of a bad seed of the default dashboard
+BROKEN_TITLES = [
+    "Underfloor Heating",
+    "Tank Heating Sensing",
+    "Radiators Flow & Return: 1st & 2nd Floor",
+    "3rd Floor: Flow & Return Temperatures",
+    "3rd Floor Deep Dive",
+    "Consumption change",
+]
+
+
+def repair_dashboard(dashboard: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Repair a dashboard from bad seed data or with outdated default queries.
+
+    Returns:
+        The repaired dashboard, None if nothing had to change.
+    """
+    if dashboard.get("id") != "default":
+        return None
+
+    chart_titles = [c.get("title") for c in dashboard.get("charts", [])]
+    # If any of the specific broken titles are present
+    if any(title in chart_titles for title in BROKEN_TITLES):
+        logger.info("Detected broken dashboard configuration. Repairing...")
+        # We assume get_default_dashboards returns a list with one dashboard
+        return get_default_dashboards()[0]
+
+    dashboard = copy.deepcopy(dashboard)
+    repaired = False
+
+    # Check for old COP query and update it
+    for chart in dashboard.get("charts", []):
+        if chart.get("title") == "COP Verlauf":
+            for query in chart.get("queries", []):
+                # If using the old query without clamp_min
+                if (
+                    query.get("query")
+                    == "idm_heatpump_power_current / idm_heatpump_power_current_draw"
+                ):
+                    logger.info("Updating COP query to handle negative values...")
+                    query["query"] = (
+                        "clamp_min(idm_heatpump_power_current / idm_heatpump_power_current_draw, 0)"
+                    )
                     repaired = True
 
-        if repaired:
-            config.data["dashboards"] = dashboards
-            config.save()
-            logger.info("Dashboard repair completed.")
+    # Check for missing AI chart or update it
+    ai_chart_found = False
+    for chart in dashboard.get("charts", []):
+        if chart.get("title") == "AI Anomalie-Erkennung":
+            ai_chart_found = True
+            # Ensure queries are correct
+            if chart.get("queries", []) != AI_CHART_QUERIES:
+                logger.info("Updating AI chart queries...")
+                chart["queries"] = copy.deepcopy(AI_CHART_QUERIES)
+                repaired = True
+            break
+
+    if not ai_chart_found:
+        logger.info("Adding missing AI Anomaly chart to dashboard...")
+        dashboard.setdefault("charts", []).append(
+            {
+                "id": str(uuid.uuid4()),
+                "title": "AI Anomalie-Erkennung",
+                "queries": copy.deepcopy(AI_CHART_QUERIES),
+                "hours": 24,
+            }
+        )
+        repaired = True
+
+    return dashboard if repaired else None
+
+
+def _etag(revisions: List[Tuple[str, int]]) -> str:
+    state = "\n".join(f"{dashboard_id}:{rev}" for dashboard_id, rev in revisions)
+    return hashlib.sha1(state.encode()).hexdigest()[:16]
+
 
-    def _ensure_dashboards_key(self):
-        """Ensure dashboards key exists in config."""
-        if "dashboards" not in config.data:
-            config.data["dashboards"] = get_default_dashboards()
-            config.save()
+class DashboardManager:
+    """
+    Manages dashboard configurations.
+
+    Dashboards and charts are rows of the ``dashboards`` and
+    ``dashboard_charts`` tables, so editing one chart writes one row no
+    matter how many dashboards exist. Every change counts up the
+    dashboard's revision, which is the source of the API ETags. Repairs of
+    outdated seed data run once per dashboard when it is first loaded.
+    """
+
+    def __init__(self, config, database=None):
+        self.config = config
+        self.db = database or db
+        # Dashboards already checked by repair_dashboard in this process
+        self._checked = set()
+        self._migrate()
+
+    def _migrate(self):
+        """Move dashboards still stored in the config into the tables."""
+        try:
+            legacy = self.config.data.get("dashboards")
+            if isinstance(legacy, list):
+                self.restore([d for d in legacy if d.get("id")])
+                del self.config.data["dashboards"]
+                self.config.save()
+                logger.info(f"Moved {len(legacy)} dashboards from config to database")
+            if not self.db.get_dashboard_revisions():
+                self.db.replace_dashboards(get_default_dashboards())
+        except Exception as e:
+            logger.error(f"Failed to migrate dashboards: {e}")
+
+    @staticmethod
+    def _with_ids(dashboard: Dict[str, Any]) -> Dict[str, Any]:
+        """Give charts without id one (chart rows are keyed by it)."""
+        for chart in dashboard.get("charts", []):
+            chart.setdefault("id", str(uuid.uuid4()))
+        return dashboard
+
+    def _checked_dashboard(self, dashboard: Dict[str, Any]) -> Dict[str, Any]:
+        """Repair a dashboard on its first load."""
+        dashboard_id = dashboard["id"]
+        if dashboard_id in self._checked:
+            return dashboard
+        repaired = repair_dashboard(dashboard)
+        if repaired is not None:
+            fields = {
+                k: v
+                for k, v in repaired.items()
+                if k not in ("id", "revision", "charts")
+            }
+            self.db.update_dashboard(dashboard_id, fields, charts=repaired["charts"])
+            logger.info(f"Dashboard repair completed: {dashboard_id}")
+            dashboard = self.db.get_dashboards(dashboard_id)[0]
+        self._checked.add(dashboard_id)
+        return dashboard
 
     def get_all_dashboards(self) -> List[Dict[str, Any]]:
         """Get all dashboards."""
-        return config.data.get("dashboards", [])
+        return [self._checked_dashboard(d) for d in self.db.get_dashboards()]
 
     def get_dashboard(self, dashboard_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific dashboard by ID."""
-        dashboards = self.get_all_dashboards()
-        for dashboard in dashboards:
-            if dashboard["id"] == dashboard_id:
-                return dashboard
-        return None
+        dashboards = self.db.get_dashboards(dashboard_id)
+        return self._checked_dashboard(dashboards[0]) if dashboards else None
+
+    def etag(self, dashboard_id: Optional[str] = None) -> Optional[str]:
+        """
+        ETag of all dashboards (or one) from their revisions, without
+        loading them.
+
+        Returns:
+            None if the dashboard does not exist.
+        """
+        revisions = self.db.get_dashboard_revisions(dashboard_id)
+        if any(d not in self._checked for d, _ in revisions):
+            # A pending repair would change the revision
+            if dashboard_id is None:
+                self.get_all_dashboards()
+            else:
+                self.get_dashboard(dashboard_id)
+            revisions = self.db.get_dashboard_revisions(dashboard_id)
+        if not revisions:
+            return None
+        return _etag(revisions)
+
+    def restore(self, dashboards: List[Dict[str, Any]]):
+        """Replace all dashboards (backup restore)."""
+        self.db.replace_dashboards([self._with_ids(d) for d in dashboards])
+        self._checked.clear()
 
     def create_dashboard(self, name: str) -> Dict[str, Any]:
         """Create a new dashboard."""
-        dashboards = self.get_all_dashboards()
         new_dashboard = {
             "id": str(uuid.uuid4()),
             "name": name,
             "charts": [],
         }
-        dashboards.append(new_dashboard)
-        config.data["dashboards"] = dashboards
-        config.save()
+        self.db.add_dashboard(new_dashboard)
         logger.info(f"Created dashboard: {name}")
         return new_dashboard
 
@@ -326,26 +383,26 @@ class DashboardManager:
         self, dashboard_id: str, updates: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Update a dashboard."""
-        dashboards = self.get_all_dashboards()
-        for i, dashboard in enumerate(dashboards):
-            if dashboard["id"] == dashboard_id:
-                dashboards[i].update(updates)
-                config.data["dashboards"] = dashboards
-                config.save()
-                logger.info(f"Updated dashboard: {dashboard_id}")
-                return dashboards[i]
-        return None
+        fields = {k: v for k, v in updates.items() if k not in ("id", "revision")}
+        charts = fields.pop("charts", None)
+        if charts is not None:
+            charts = [
+                {**chart, "id": chart.get("id") or str(uuid.uuid4())}
+                for chart in charts
+            ]
+        if not self.db.update_dashboard(dashboard_id, fields, charts=charts):
+            return None
+        logger.info(f"Updated dashboard: {dashboard_id}")
+        return self.get_dashboard(dashboard_id)
 
     def delete_dashboard(self, dashboard_id: str) -> bool:
         """Delete a dashboard."""
-        dashboards = self.get_all_dashboards()
-        if len(dashboards) <= 1:
+        if len(self.db.get_dashboard_revisions()) <= 1:
             logger.warning("Cannot delete the last dashboard")
             return False
 
-        dashboards = [d for d in dashboards if d["id"] != dashboard_id]
-        config.data["dashboards"] = dashboards
-        config.save()
+        self.db.delete_dashboard(dashboard_id)
+        self._checked.discard(dashboard_id)
         logger.info(f"Deleted dashboard: {dashboard_id}")
         return True
 
@@ -357,49 +414,26 @@ class DashboardManager:
         hours: int = 12,
     ) -> Optional[Dict[str, Any]]:
         """Add a chart to a dashboard."""
-        dashboard = self.get_dashboard(dashboard_id)
-        if not dashboard:
-            return None
-
         new_chart = {
             "id": str(uuid.uuid4()),
             "title": title,
             "queries": queries,
             "hours": hours,
         }
-
-        dashboard["charts"].append(new_chart)
-        self.update_dashboard(dashboard_id, {"charts": dashboard["charts"]})
+        if not self.db.add_chart(dashboard_id, new_chart):
+            return None
         return new_chart
 
     def update_chart(
         self, dashboard_id: str, chart_id: str, updates: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Update a chart in a dashboard."""
-        dashboard = self.get_dashboard(dashboard_id)
-        if not dashboard:
-            return None
-
-        for i, chart in enumerate(dashboard["charts"]):
-            if chart["id"] == chart_id:
-                dashboard["charts"][i].update(updates)
-                self.update_dashboard(dashboard_id, {"charts": dashboard["charts"]})
-                return dashboard["charts"][i]
-        return None
+        return self.db.update_chart(dashboard_id, chart_id, updates)
 
     def delete_chart(self, dashboard_id: str, chart_id: str) -> bool:
         """Delete a chart from a dashboard."""
-        dashboard = self.get_dashboard(dashboard_id)
-        if not dashboard:
-            return False
-
-        charts = [c for c in dashboard["charts"] if c["id"] != chart_id]
-        if len(charts) == len(dashboard["charts"]):
-            return False
-
-        self.update_dashboard(dashboard_id, {"charts": charts})
-        return True
+        return self.db.delete_chart(dashboard_id, chart_id)
 
 
 # Global instance
-dashboard_manager = DashboardManager()
+dashboard_manager = DashboardManager(config)
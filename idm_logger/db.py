@@ -1,11 +1,33 @@
 # Xerolux 2026
 # SPDX-License-Identifier: MIT
+"""
+SQLite storage for settings, scheduler jobs, alerts and the notification outbox.
+
+The database runs in WAL mode, so readers never wait for a writer:
+
+- All writes go through one writer connection, owned by a writer thread.
+  Writes queued while a transaction is being committed are applied together
+  in the next transaction (group commit), each inside its own savepoint, so
+  one failing write does not roll back the others.
+- Reads use a small pool of read-only connections and run concurrently with
+  each other and with the writer.
+- Statements use fixed SQL text, so sqlite3's per-connection statement cache
+  reuses the prepared statements.
+- Every query is timed; ``get_stats()`` reports count, errors and latency per
+  query.
+"""
+
 import sqlite3
 import logging
 import os
 import json
+import queue
 import threading
+import time
+from concurrent.futures import Future
 from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
@@ -24,139 +46,568 @@ ALLOWED_ALERT_COLUMNS = frozenset(
         "enabled",
         "interval_seconds",
         "last_triggered",
+        "aggregate",
+        "window_seconds",
+        "for_seconds",
+        "severity",
     }
 )
 
+ALLOWED_ANNOTATION_COLUMNS = frozenset(
+    {"time", "text", "tags", "color", "dashboard_id", "acknowledged"}
+)
+
+# Columns added to the alerts table after its first release
+ALERT_MIGRATIONS = (
+    ("aggregate", "TEXT DEFAULT 'value'"),
+    ("window_seconds", "INTEGER DEFAULT 0"),
+    ("for_seconds", "INTEGER DEFAULT 0"),
+    ("severity", "TEXT DEFAULT 'warning'"),
+)
+
 # Use DATA_DIR environment variable or current directory for persistence
 DATA_DIR = os.environ.get("DATA_DIR", ".")
 DB_PATH = os.path.join(DATA_DIR, "idm_logger.db")
 
 
+READ_POOL_SIZE = 4
+GROUP_COMMIT_MAX = 100  # writes per transaction
+STATEMENT_CACHE_SIZE = 256  # prepared statements per connection
+BUSY_TIMEOUT = 10.0  # seconds
+SLOW_QUERY_MS = 250.0
+
+
+class QueryStats:
+    """Call counter and latency figures for one query."""
+
+    __slots__ = ("count", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, duration_ms: float, ok: bool):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 1),
+        }
+
+
 class Database:
-    def __init__(self, db_path=DB_PATH):
+    def __init__(self, db_path=DB_PATH, read_pool_size: int = READ_POOL_SIZE):
+        """
+        Args:
+            db_path: SQLite file (``:memory:`` keeps everything on the writer).
+            read_pool_size: Maximum number of read-only connections.
+        """
         self.db_path = db_path
-        # Thread lock to ensure safe concurrent access
-        self._lock = threading.RLock()
-        self._conn = None
+        self.read_pool_size = max(1, read_pool_size)
+        # An in-memory database only exists on its own connection
+        self._memory = db_path == ":memory:"
+        self._stats: Dict[str, QueryStats] = {}
+        self._stats_lock = threading.Lock()
+
+        self._writer = self._connect_writer()
+        self._write_queue = queue.Queue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self.transactions = 0
+        self.writes = 0
+        self.max_group = 0
+
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._pool_lock = threading.Lock()
         self.init_db()
 
-    def get_connection(self):
-        """Get the persistent database connection."""
-        if self._conn is None:
-            self._conn = sqlite3.connect(
-                self.db_path, check_same_thread=False, timeout=10.0
+    # Connections
+
+    def _connect_writer(self) -> sqlite3.Connection:
+        # Autocommit mode: the writer thread controls transactions itself
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        self.journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if self.journal_mode.lower() != "wal" and not self._memory:
+            logger.warning(
+                f"SQLite WAL mode unavailable ({self.journal_mode}), "
+                "reads may wait for writes"
             )
-            self._conn.row_factory = sqlite3.Row
-        return self._conn
+        # Safe with WAL: a crash cannot corrupt, at most the last commits are lost
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _open_reader(self) -> sqlite3.Connection:
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._reader_count < self.read_pool_size:
+                conn = self._open_reader()
+                self._reader_count += 1
+                return conn
+        try:
+            return self._readers.get(timeout=BUSY_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError("no read connection available") from None
 
     @contextmanager
-    def _get_locked_connection(self):
-        """Context manager for thread-safe database operations."""
-        with self._lock:
-            conn = self.get_connection()
-            try:
-                yield conn
-                conn.commit()
-            except Exception:
-                conn.rollback()
-                raise
+    def _timed(self, name: str):
+        """Record duration and outcome of a query under ``name``."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                stats = self._stats.get(name)
+                if stats is None:
+                    stats = self._stats[name] = QueryStats()
+                stats.record(duration_ms, ok)
+            if duration_ms > SLOW_QUERY_MS:
+                logger.warning(f"Slow database query {name}: {duration_ms:.0f} ms")
+
+    def _read(self, name: str, fn: Callable[[sqlite3.Connection], object]):
+        """Run ``fn(conn)`` on a pooled read-only connection."""
+        if self._memory:
+            return self._write(name, fn)
+        conn = self._acquire_reader()
+        try:
+            with self._timed(name):
+                return fn(conn)
+        finally:
+            self._readers.put(conn)
+
+    def _write(
+        self,
+        name: str,
+        fn: Callable[[sqlite3.Connection], object],
+        transaction: bool = True,
+    ):
+        """
+        Run ``fn(conn)`` on the writer connection and wait until committed.
+
+        Returns:
+            The return value of ``fn``; its exception is re-raised here.
+        """
+        if threading.current_thread() is self._writer_thread:
+            # Called from within another write, already in its transaction
+            with self._timed(name):
+                return fn(self._writer)
+        self._ensure_writer()
+        future = Future()
+        self._write_queue.put((name, fn, future, transaction))
+        return future.result()
+
+    def _ensure_writer(self):
+        with self._thread_lock:
+            if self._writer_thread is None or not self._writer_thread.is_alive():
+                self._writer_thread = threading.Thread(
+                    target=self._run_writer, name="db-writer", daemon=True
+                )
+                self._writer_thread.start()
+
+    def _run_writer(self):
+        pending = None
+        while True:
+            item = pending if pending is not None else self._write_queue.get()
+            pending = None
+            if item is None:
+                return
+            if not item[3]:
+                self._run_single(item)
+                continue
+
+            # Group commit: everything queued meanwhile joins this transaction
+            batch = [item]
+            stop = False
+            while len(batch) < GROUP_COMMIT_MAX:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                if not item[3]:
+                    pending = item
+                    break
+                batch.append(item)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _run_single(self, item):
+        """Run a statement that must not be inside a transaction."""
+        name, fn, future, _ = item
+        try:
+            with self._timed(name):
+                result = fn(self._writer)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _commit(self, batch):
+        conn = self._writer
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for name, fn, future, _ in batch:
+                # Savepoint per write: a failing write only undoes itself
+                conn.execute("SAVEPOINT write")
+                try:
+                    with self._timed(name):
+                        result = fn(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    results.append((future, None, e))
+                else:
+                    conn.execute("RELEASE write")
+                    results.append((future, result, None))
+            with self._timed("commit"):
+                conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Database transaction failed: {e}", exc_info=True)
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        self.transactions += 1
+        self.writes += len(batch)
+        self.max_group = max(self.max_group, len(batch))
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self, timeout: float = 5.0):
+        """Finish queued writes, checkpoint the WAL and close all connections."""
+        with self._thread_lock:
+            thread, self._writer_thread = self._writer_thread, None
+        if thread is not None and thread.is_alive():
+            self._write_queue.put(None)
+            thread.join(timeout)
+        with self._pool_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reader_count = 0
+        try:
+            self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._writer.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to close database: {e}")
+
+    def checkpoint(self):
+        """Copy the WAL into the main file, e.g. before the file is backed up."""
+        try:
+            self._write(
+                "checkpoint",
+                lambda conn: conn.execute("PRAGMA wal_checkpoint(FULL)").fetchone(),
+                transaction=False,
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"WAL checkpoint failed: {e}")
+
+    def get_stats(self) -> Dict:
+        """Connection, group commit and per-query statistics."""
+        with self._stats_lock:
+            queries = {
+                name: stats.to_dict() for name, stats in sorted(self._stats.items())
+            }
+        return {
+            "journal_mode": self.journal_mode,
+            "read_pool": {
+                "size": self.read_pool_size,
+                "open": self._reader_count,
+                "idle": self._readers.qsize(),
+            },
+            "writer": {
+                "running": self._writer_thread is not None
+                and self._writer_thread.is_alive(),
+                "queued": self._write_queue.qsize(),
+                "transactions": self.transactions,
+                "writes": self.writes,
+                "avg_group": (
+                    round(self.writes / self.transactions, 2)
+                    if self.transactions
+                    else 0
+                ),
+                "max_group": self.max_group,
+            },
+            "queries": queries,
+        }
+
+    # Schema
 
     def init_db(self):
         """Initialize database tables."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
+            cursor = self._writer.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
 
-                # Settings table (key, value)
-                # Value stored as TEXT. Complex objects stored as JSON string.
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS settings (
-                        key TEXT PRIMARY KEY,
-                        value TEXT
-                    )
-                """)
-
-                # Jobs table for scheduler
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS jobs (
-                        id TEXT PRIMARY KEY,
-                        sensor TEXT,
-                        value TEXT,
-                        time TEXT,
-                        days TEXT,
-                        enabled INTEGER,
-                        last_run REAL
-                    )
-                """)
-
-                # Alerts table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS alerts (
-                        id TEXT PRIMARY KEY,
-                        name TEXT,
-                        type TEXT,
-                        sensor TEXT,
-                        condition TEXT,
-                        threshold TEXT,
-                        message TEXT,
-                        enabled INTEGER,
-                        interval_seconds INTEGER,
-                        last_triggered REAL
+            # Settings table (key, value)
+            # Value stored as TEXT. Complex objects stored as JSON string.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+            # Jobs table for scheduler
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    sensor TEXT,
+                    value TEXT,
+                    time TEXT,
+                    days TEXT,
+                    enabled INTEGER,
+                    last_run REAL
+                )
+            """)
+
+            # Alerts table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id TEXT PRIMARY KEY,
+                    name TEXT,
+                    type TEXT,
+                    sensor TEXT,
+                    condition TEXT,
+                    threshold TEXT,
+                    message TEXT,
+                    enabled INTEGER,
+                    interval_seconds INTEGER,
+                    last_triggered REAL
+                )
+            """)
+            cursor.execute("PRAGMA table_info(alerts)")
+            alert_columns = {row["name"] for row in cursor.fetchall()}
+            for column, definition in ALERT_MIGRATIONS:
+                if column not in alert_columns:
+                    cursor.execute(
+                        f"ALTER TABLE alerts ADD COLUMN {column} {definition}"
                     )
-                """)
 
-                # Performance: Create indexes for frequently queried columns
-                cursor.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_jobs_enabled ON jobs(enabled)"
+            # Outbox of notifications not yet delivered (survives restarts)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS notification_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    provider TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    options TEXT,
+                    created REAL,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt REAL,
+                    last_error TEXT
                 )
-                cursor.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_jobs_sensor ON jobs(sensor)"
+            """)
+
+            # Chart annotations (maintenance notes, ML anomalies)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS annotations (
+                    id TEXT PRIMARY KEY,
+                    time INTEGER NOT NULL,
+                    text TEXT,
+                    tags TEXT,
+                    color TEXT,
+                    dashboard_id TEXT,
+                    acknowledged INTEGER DEFAULT 0
                 )
-                cursor.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_alerts_enabled ON alerts(enabled)"
+            """)
+
+            # View counters of dashboard share tokens (tokens are in the config)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS share_access (
+                    token_id TEXT PRIMARY KEY,
+                    access_count INTEGER DEFAULT 0,
+                    last_accessed INTEGER
                 )
+            """)
+
+            # Dashboards and their charts, one row each; revision is taken
+            # from dashboard_revisions on every change of a dashboard
+            # including its charts (ETag)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dashboards (
+                    id TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    revision INTEGER NOT NULL DEFAULT 1,
+                    data TEXT
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dashboard_charts (
+                    dashboard_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    data TEXT,
+                    PRIMARY KEY (dashboard_id, id)
+                )
+            """)
+
+            # Database-wide revision sequence (AUTOINCREMENT never reuses a
+            # value). It starts at the creation time in ms, so a recreated
+            # database does not repeat revisions of an earlier one.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dashboard_revisions (
+                    revision INTEGER PRIMARY KEY AUTOINCREMENT
+                )
+            """)
+            if not cursor.execute(
+                "SELECT 1 FROM sqlite_sequence WHERE name='dashboard_revisions'"
+            ).fetchone():
+                start = cursor.execute(
+                    "SELECT COALESCE(SUM(revision), 0) FROM dashboards"
+                ).fetchone()[0]
                 cursor.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_alerts_sensor ON alerts(sensor)"
+                    "INSERT INTO dashboard_revisions (revision) VALUES (?)",
+                    (max(start, int(time.time() * 1000)),),
                 )
+                cursor.execute("DELETE FROM dashboard_revisions")
+
+            # Performance: Create indexes for frequently queried columns
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_enabled ON jobs(enabled)"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_sensor ON jobs(sensor)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_enabled ON alerts(enabled)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_sensor ON alerts(sensor)"
+            )
+            # Time range per dashboard; dashboard_id IS NULL (all dashboards)
+            # uses the same index
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_annotations_dashboard_time "
+                "ON annotations(dashboard_id, time)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_annotations_time ON annotations(time)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_dashboard_charts_position "
+                "ON dashboard_charts(dashboard_id, position)"
+            )
+            cursor.execute("COMMIT")
             logger.info(f"Database initialized at {self.db_path}")
         except sqlite3.Error as e:
+            if self._writer.in_transaction:
+                self._writer.execute("ROLLBACK")
             logger.error(f"Database initialization failed: {e}", exc_info=True)
             raise
 
+    # Settings
+
     def get_setting(self, key, default=None):
         """Get a setting value from database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
-                row = cursor.fetchone()
-                return row["value"] if row else default
+            row = self._read(
+                "get_setting",
+                lambda conn: conn.execute(
+                    "SELECT value FROM settings WHERE key=?", (key,)
+                ).fetchone(),
+            )
+            return row["value"] if row else default
         except sqlite3.Error as e:
             logger.error(f"Failed to get setting '{key}': {e}")
             return default
 
+    def get_all_settings(self) -> Dict[str, str]:
+        """Get all settings as raw (unparsed) values."""
+        try:
+            rows = self._read(
+                "get_all_settings",
+                lambda conn: conn.execute("SELECT key, value FROM settings").fetchall(),
+            )
+            return {row["key"]: row["value"] for row in rows}
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get settings: {e}", exc_info=True)
+            return {}
+
     def set_setting(self, key, value):
         """Set a setting value in database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+            self._write(
+                "set_setting",
+                lambda conn: conn.execute(
                     "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
                     (key, value),
-                )
+                ),
+            )
             logger.debug(f"Setting '{key}' updated")
         except sqlite3.Error as e:
             logger.error(f"Failed to set setting '{key}': {e}", exc_info=True)
             raise
 
+    def set_settings(self, items: Dict[str, str]):
+        """Set several settings in one transaction."""
+        if not items:
+            return
+        try:
+            self._write(
+                "set_settings",
+                lambda conn: conn.executemany(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    list(items.items()),
+                ),
+            )
+            logger.debug(f"{len(items)} settings updated")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to set settings: {e}", exc_info=True)
+            raise
+
     # Helpers for jobs
     def get_jobs(self):
         """Get all scheduled jobs from database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM jobs")
-                return cursor.fetchall()
+            return self._read(
+                "get_jobs", lambda conn: conn.execute("SELECT * FROM jobs").fetchall()
+            )
         except sqlite3.Error as e:
             logger.error(f"Failed to retrieve jobs: {e}", exc_info=True)
             return []
@@ -164,20 +615,22 @@ class Database:
     def add_job(self, job):
         """Add a new scheduled job to database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+            params = (
+                job["id"],
+                job["sensor"],
+                str(job["value"]),
+                job["time"],
+                json.dumps(job["days"]),
+                int(job["enabled"]),
+                job.get("last_run", 0),
+            )
+            self._write(
+                "add_job",
+                lambda conn: conn.execute(
                     "INSERT INTO jobs (id, sensor, value, time, days, enabled, last_run) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                    (
-                        job["id"],
-                        job["sensor"],
-                        str(job["value"]),
-                        job["time"],
-                        json.dumps(job["days"]),
-                        int(job["enabled"]),
-                        job.get("last_run", 0),
-                    ),
-                )
+                    params,
+                ),
+            )
             logger.info(f"Job {job['id']} added successfully")
         except sqlite3.Error as e:
             logger.error(
@@ -188,9 +641,10 @@ class Database:
     def delete_job(self, job_id):
         """Delete a scheduled job from database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM jobs WHERE id=?", (job_id,))
+            self._write(
+                "delete_job",
+                lambda conn: conn.execute("DELETE FROM jobs WHERE id=?", (job_id,)),
+            )
             logger.info(f"Job {job_id} deleted successfully")
         except sqlite3.Error as e:
             logger.error(f"Failed to delete job {job_id}: {e}", exc_info=True)
@@ -199,33 +653,29 @@ class Database:
     def update_job(self, job_id, fields):
         """Update a scheduled job in database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                # fields is dict - validate column names against whitelist
-                query_parts = []
-                values = []
-                for k, v in fields.items():
-                    # Security: Only allow whitelisted column names
-                    if k not in ALLOWED_JOB_COLUMNS:
-                        logger.warning(
-                            f"Rejected invalid column name in job update: {k}"
-                        )
-                        continue
-                    query_parts.append(f"{k}=?")
-                    if k == "days":
-                        values.append(json.dumps(v))
-                    elif k == "enabled":
-                        values.append(int(v))
-                    else:
-                        values.append(v)
-
-                if not query_parts:
-                    logger.warning(f"No valid fields to update for job {job_id}")
-                    return
-
-                values.append(job_id)
-                query = f"UPDATE jobs SET {', '.join(query_parts)} WHERE id=?"
-                cursor.execute(query, tuple(values))
+            # fields is dict - validate column names against whitelist
+            query_parts = []
+            values = []
+            for k, v in fields.items():
+                # Security: Only allow whitelisted column names
+                if k not in ALLOWED_JOB_COLUMNS:
+                    logger.warning(f"Rejected invalid column name in job update: {k}")
+                    continue
+                query_parts.append(f"{k}=?")
+                if k == "days":
+                    values.append(json.dumps(v))
+                elif k == "enabled":
+                    values.append(int(v))
+                else:
+                    values.append(v)
+
+            if not query_parts:
+                logger.warning(f"No valid fields to update for job {job_id}")
+                return
+
+            values.append(job_id)
+            query = f"UPDATE jobs SET {', '.join(query_parts)} WHERE id=?"
+            self._write("update_job", lambda conn: conn.execute(query, tuple(values)))
             logger.debug(f"Job {job_id} updated successfully")
         except sqlite3.Error as e:
             logger.error(f"Failed to update job {job_id}: {e}", exc_info=True)
@@ -239,12 +689,13 @@ class Database:
         if not updates:
             return
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.executemany(
+            self._write(
+                "update_jobs_last_run",
+                lambda conn: conn.executemany(
                     "UPDATE jobs SET last_run=? WHERE id=?",
                     [(ts, jid) for jid, ts in updates],
-                )
+                ),
+            )
             logger.debug(f"Updated last_run for {len(updates)} jobs")
         except sqlite3.Error as e:
             logger.error(f"Failed to batch update jobs: {e}", exc_info=True)
@@ -254,10 +705,12 @@ class Database:
     def get_alerts(self):
         """Get all alerts from database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM alerts")
-                return [dict(row) for row in cursor.fetchall()]
+            return self._read(
+                "get_alerts",
+                lambda conn: [
+                    dict(row) for row in conn.execute("SELECT * FROM alerts").fetchall()
+                ],
+            )
         except sqlite3.Error as e:
             logger.error(f"Failed to retrieve alerts: {e}", exc_info=True)
             return []
@@ -265,25 +718,32 @@ class Database:
     def add_alert(self, alert):
         """Add a new alert to database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+            params = (
+                alert["id"],
+                alert["name"],
+                alert["type"],
+                alert.get("sensor"),
+                alert.get("condition"),
+                str(alert.get("threshold")),
+                alert["message"],
+                int(alert["enabled"]),
+                alert.get("interval_seconds", 0),
+                alert.get("last_triggered", 0),
+                alert.get("aggregate") or "value",
+                alert.get("window_seconds", 0),
+                alert.get("for_seconds", 0),
+                alert.get("severity") or "warning",
+            )
+            self._write(
+                "add_alert",
+                lambda conn: conn.execute(
                     """INSERT INTO alerts
-                       (id, name, type, sensor, condition, threshold, message, enabled, interval_seconds, last_triggered)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        alert["id"],
-                        alert["name"],
-                        alert["type"],
-                        alert.get("sensor"),
-                        alert.get("condition"),
-                        str(alert.get("threshold")),
-                        alert["message"],
-                        int(alert["enabled"]),
-                        alert.get("interval_seconds", 0),
-                        alert.get("last_triggered", 0),
-                    ),
-                )
+                       (id, name, type, sensor, condition, threshold, message, enabled, interval_seconds, last_triggered,
+                        aggregate, window_seconds, for_seconds, severity)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    params,
+                ),
+            )
             logger.info(f"Alert {alert['id']} added successfully")
         except sqlite3.Error as e:
             logger.error(
@@ -294,9 +754,10 @@ class Database:
     def delete_alert(self, alert_id):
         """Delete an alert from database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM alerts WHERE id=?", (alert_id,))
+            self._write(
+                "delete_alert",
+                lambda conn: conn.execute("DELETE FROM alerts WHERE id=?", (alert_id,)),
+            )
             logger.info(f"Alert {alert_id} deleted successfully")
         except sqlite3.Error as e:
             logger.error(f"Failed to delete alert {alert_id}: {e}", exc_info=True)
@@ -305,31 +766,27 @@ class Database:
     def update_alert(self, alert_id, fields):
         """Update an alert in database."""
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                # Validate column names against whitelist
-                query_parts = []
-                values = []
-                for k, v in fields.items():
-                    # Security: Only allow whitelisted column names
-                    if k not in ALLOWED_ALERT_COLUMNS:
-                        logger.warning(
-                            f"Rejected invalid column name in alert update: {k}"
-                        )
-                        continue
-                    query_parts.append(f"{k}=?")
-                    if k == "enabled":
-                        values.append(int(v))
-                    else:
-                        values.append(v)
-
-                if not query_parts:
-                    logger.warning(f"No valid fields to update for alert {alert_id}")
-                    return
-
-                values.append(alert_id)
-                query = f"UPDATE alerts SET {', '.join(query_parts)} WHERE id=?"
-                cursor.execute(query, tuple(values))
+            # Validate column names against whitelist
+            query_parts = []
+            values = []
+            for k, v in fields.items():
+                # Security: Only allow whitelisted column names
+                if k not in ALLOWED_ALERT_COLUMNS:
+                    logger.warning(f"Rejected invalid column name in alert update: {k}")
+                    continue
+                query_parts.append(f"{k}=?")
+                if k == "enabled":
+                    values.append(int(v))
+                else:
+                    values.append(v)
+
+            if not query_parts:
+                logger.warning(f"No valid fields to update for alert {alert_id}")
+                return
+
+            values.append(alert_id)
+            query = f"UPDATE alerts SET {', '.join(query_parts)} WHERE id=?"
+            self._write("update_alert", lambda conn: conn.execute(query, tuple(values)))
             logger.debug(f"Alert {alert_id} updated successfully")
         except sqlite3.Error as e:
             logger.error(f"Failed to update alert {alert_id}: {e}", exc_info=True)
@@ -340,18 +797,596 @@ class Database:
         if not alert_ids:
             return
         try:
-            with self._get_locked_connection() as conn:
-                cursor = conn.cursor()
-                placeholders = ",".join("?" for _ in alert_ids)
-                query = (
-                    f"UPDATE alerts SET last_triggered=? WHERE id IN ({placeholders})"
-                )
-                params = [timestamp] + alert_ids
-                cursor.execute(query, tuple(params))
+            # One row per statement keeps the SQL text constant (cached statement)
+            self._write(
+                "update_alerts_last_triggered",
+                lambda conn: conn.executemany(
+                    "UPDATE alerts SET last_triggered=? WHERE id=?",
+                    [(timestamp, alert_id) for alert_id in alert_ids],
+                ),
+            )
             logger.debug(f"Updated last_triggered for {len(alert_ids)} alerts.")
         except sqlite3.Error as e:
             logger.error(f"Failed to bulk update alerts: {e}", exc_info=True)
             raise
 
+    # Helpers for the notification outbox
+    def add_outbox_entries(self, entries):
+        """
+        Store pending notifications.
+        entries: list of (provider, message, options_json, created)
+
+        Returns:
+            List of row ids in the order of entries.
+        """
+
+        def insert(conn):
+            ids = []
+            for provider, message, options, created in entries:
+                cursor = conn.execute(
+                    """INSERT INTO notification_outbox
+                       (provider, message, options, created, attempts, next_attempt)
+                       VALUES (?, ?, ?, ?, 0, ?)""",
+                    (provider, message, options, created, created),
+                )
+                ids.append(cursor.lastrowid)
+            return ids
+
+        try:
+            return self._write("add_outbox_entries", insert)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store notifications: {e}", exc_info=True)
+            raise
+
+    def get_outbox_entries(self) -> List[Dict]:
+        """Get all pending notifications, oldest first."""
+        try:
+            return self._read(
+                "get_outbox_entries",
+                lambda conn: [
+                    dict(row)
+                    for row in conn.execute(
+                        "SELECT * FROM notification_outbox ORDER BY id"
+                    ).fetchall()
+                ],
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve notification outbox: {e}", exc_info=True)
+            return []
+
+    def update_outbox_entry(self, entry_id, attempts, next_attempt, last_error):
+        """Record a failed delivery attempt."""
+        try:
+            self._write(
+                "update_outbox_entry",
+                lambda conn: conn.execute(
+                    """UPDATE notification_outbox
+                       SET attempts=?, next_attempt=?, last_error=? WHERE id=?""",
+                    (attempts, next_attempt, last_error, entry_id),
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to update notification {entry_id}: {e}")
+
+    def delete_outbox_entry(self, entry_id):
+        """Remove a delivered (or abandoned) notification."""
+        try:
+            self._write(
+                "delete_outbox_entry",
+                lambda conn: conn.execute(
+                    "DELETE FROM notification_outbox WHERE id=?", (entry_id,)
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to delete notification {entry_id}: {e}")
+
+    # Helpers for annotations
+    def add_annotations(self, annotations):
+        """
+        Insert annotations; ids that already exist are left unchanged.
+        annotations: list of dicts (id, time, text, tags, color,
+        dashboard_id, acknowledged)
+        """
+        if not annotations:
+            return
+        rows = [
+            (
+                a["id"],
+                int(a["time"]),
+                a.get("text", ""),
+                json.dumps(a.get("tags") or []),
+                a.get("color"),
+                a.get("dashboard_id"),
+                int(bool(a.get("acknowledged"))),
+            )
+            for a in annotations
+        ]
+        try:
+            self._write(
+                "add_annotations",
+                lambda conn: conn.executemany(
+                    """INSERT OR IGNORE INTO annotations
+                       (id, time, text, tags, color, dashboard_id, acknowledged)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    rows,
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add annotations: {e}", exc_info=True)
+            raise
+
+    def query_annotations(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        dashboard_id: Optional[str] = None,
+        tag: Optional[str] = None,
+        acknowledged: Optional[bool] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ):
+        """
+        Annotations matching all given filters, newest first.
+
+        Annotations without dashboard_id belong to every dashboard.
+
+        Returns:
+            (rows, total) with rows as dicts and the count without limit.
+        """
+        where = []
+        params = []
+        if dashboard_id is not None:
+            where.append("(dashboard_id=? OR dashboard_id IS NULL)")
+            params.append(dashboard_id)
+        if start is not None:
+            where.append("time>=?")
+            params.append(start)
+        if end is not None:
+            where.append("time<=?")
+            params.append(end)
+        if tag is not None:
+            where.append(
+                "EXISTS (SELECT 1 FROM json_each(annotations.tags) WHERE value=?)"
+            )
+            params.append(tag)
+        if acknowledged is not None:
+            where.append("acknowledged=?")
+            params.append(int(acknowledged))
+        condition = f" WHERE {' AND '.join(where)}" if where else ""
+
+        def query(conn):
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM annotations{condition}", params
+            ).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM annotations{condition} "
+                "ORDER BY time DESC, id LIMIT ? OFFSET ?",
+                params + [-1 if limit is None else limit, offset],
+            ).fetchall()
+            return [dict(row) for row in rows], total
+
+        try:
+            return self._read("query_annotations", query)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve annotations: {e}", exc_info=True)
+            return [], 0
+
+    def get_annotation(self, annotation_id) -> Optional[Dict]:
+        """Get one annotation by id."""
+        try:
+            row = self._read(
+                "get_annotation",
+                lambda conn: conn.execute(
+                    "SELECT * FROM annotations WHERE id=?", (annotation_id,)
+                ).fetchone(),
+            )
+            return dict(row) if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve annotation {annotation_id}: {e}")
+            return None
+
+    def update_annotation(self, annotation_id, fields) -> bool:
+        """
+        Update an annotation.
+
+        Returns:
+            False if the annotation does not exist.
+        """
+        query_parts = []
+        values = []
+        for k, v in fields.items():
+            # Security: Only allow whitelisted column names
+            if k not in ALLOWED_ANNOTATION_COLUMNS:
+                logger.warning(
+                    f"Rejected invalid column name in annotation update: {k}"
+                )
+                continue
+            query_parts.append(f"{k}=?")
+            if k == "tags":
+                values.append(json.dumps(v or []))
+            elif k == "acknowledged":
+                values.append(int(bool(v)))
+            else:
+                values.append(v)
+        if not query_parts:
+            # Nothing to change, report whether it exists
+            return self.get_annotation(annotation_id) is not None
+
+        values.append(annotation_id)
+        query = f"UPDATE annotations SET {', '.join(query_parts)} WHERE id=?"
+        try:
+            cursor = self._write(
+                "update_annotation", lambda conn: conn.execute(query, tuple(values))
+            )
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(
+                f"Failed to update annotation {annotation_id}: {e}", exc_info=True
+            )
+            raise
+
+    def delete_annotation(self, annotation_id) -> bool:
+        """Delete an annotation; False if it did not exist."""
+        try:
+            cursor = self._write(
+                "delete_annotation",
+                lambda conn: conn.execute(
+                    "DELETE FROM annotations WHERE id=?", (annotation_id,)
+                ),
+            )
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(
+                f"Failed to delete annotation {annotation_id}: {e}", exc_info=True
+            )
+            raise
+
+    def prune_annotations(
+        self, before: Optional[int] = None, keep: Optional[int] = None
+    ) -> int:
+        """
+        Delete annotations older than ``before`` and beyond the newest ``keep``.
+
+        Returns:
+            Number of deleted annotations.
+        """
+
+        def prune(conn):
+            deleted = 0
+            if before is not None:
+                deleted += conn.execute(
+                    "DELETE FROM annotations WHERE time<?", (before,)
+                ).rowcount
+            if keep is not None:
+                deleted += conn.execute(
+                    """DELETE FROM annotations WHERE id IN (
+                           SELECT id FROM annotations
+                           ORDER BY time DESC, id LIMIT -1 OFFSET ?)""",
+                    (keep,),
+                ).rowcount
+            return deleted
+
+        try:
+            return self._write("prune_annotations", prune)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to prune annotations: {e}", exc_info=True)
+            return 0
+
+    # Helpers for share token access counters
+    def get_share_access(self) -> Dict[str, Dict]:
+        """Get access counters of all share tokens, keyed by token id."""
+        try:
+            rows = self._read(
+                "get_share_access",
+                lambda conn: conn.execute("SELECT * FROM share_access").fetchall(),
+            )
+            return {row["token_id"]: dict(row) for row in rows}
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve share access counters: {e}")
+            return {}
+
+    def save_share_access(self, counters):
+        """
+        Store access counters in one batch.
+        counters: list of (token_id, access_count, last_accessed)
+        """
+        if not counters:
+            return
+        try:
+            self._write(
+                "save_share_access",
+                lambda conn: conn.executemany(
+                    """INSERT INTO share_access (token_id, access_count, last_accessed)
+                       VALUES (?, ?, ?)
+                       ON CONFLICT(token_id) DO UPDATE SET
+                           access_count=excluded.access_count,
+                           last_accessed=excluded.last_accessed""",
+                    counters,
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store share access counters: {e}", exc_info=True)
+            raise
+
+    def delete_share_access(self, token_ids):
+        """Remove the counters of deleted tokens."""
+        if not token_ids:
+            return
+        try:
+            self._write(
+                "delete_share_access",
+                lambda conn: conn.executemany(
+                    "DELETE FROM share_access WHERE token_id=?",
+                    [(token_id,) for token_id in token_ids],
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to delete share access counters: {e}")
+
+    # Helpers for dashboards
+    def get_dashboard_revisions(self, dashboard_id=None) -> List[Tuple[str, int]]:
+        """(id, revision) of all dashboards (or one) in display order."""
+        query = "SELECT id, revision FROM dashboards"
+        params = ()
+        if dashboard_id is not None:
+            query += " WHERE id=?"
+            params = (dashboard_id,)
+        try:
+            rows = self._read(
+                "get_dashboard_revisions",
+                lambda conn: conn.execute(
+                    f"{query} ORDER BY position", params
+                ).fetchall(),
+            )
+            return [(row["id"], row["revision"]) for row in rows]
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve dashboard revisions: {e}")
+            return []
+
+    def get_dashboards(self, dashboard_id=None) -> List[Dict]:
+        """
+        Get all dashboards (or one) with their charts, in display order.
+
+        Returns:
+            Dashboard dicts with ``id``, ``revision`` and ``charts``.
+        """
+        query = """SELECT d.id, d.revision, d.data, c.data AS chart
+                   FROM dashboards d
+                   LEFT JOIN dashboard_charts c ON c.dashboard_id=d.id"""
+        params = ()
+        if dashboard_id is not None:
+            query += " WHERE d.id=?"
+            params = (dashboard_id,)
+        try:
+            # One statement, so dashboards and charts are one consistent view
+            rows = self._read(
+                "get_dashboards",
+                lambda conn: conn.execute(
+                    f"{query} ORDER BY d.position, c.position", params
+                ).fetchall(),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve dashboards: {e}", exc_info=True)
+            return []
+
+        dashboards = []
+        for row in rows:
+            if not dashboards or dashboards[-1]["id"] != row["id"]:
+                dashboard = json.loads(row["data"] or "{}")
+                dashboard["id"] = row["id"]
+                dashboard["revision"] = row["revision"]
+                dashboard["charts"] = []
+                dashboards.append(dashboard)
+            if row["chart"] is not None:
+                dashboards[-1]["charts"].append(json.loads(row["chart"]))
+        return dashboards
+
+    def add_dashboard(self, dashboard):
+        """Insert a dashboard (with its charts) after the existing ones."""
+
+        def insert(conn):
+            position = conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM dashboards"
+            ).fetchone()[0]
+            _insert_dashboard(conn, dashboard, position, _next_revision(conn))
+
+        try:
+            self._write("add_dashboard", insert)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add dashboard: {e}", exc_info=True)
+            raise
+
+    def replace_dashboards(self, dashboards):
+        """
+        Store exactly the given dashboards (migration, backup restore).
+
+        All of them get a new revision, so cached ETags of the old content
+        do not match the new one.
+        """
+
+        def replace(conn):
+            revision = _next_revision(conn)
+            conn.execute("DELETE FROM dashboard_charts")
+            conn.execute("DELETE FROM dashboards")
+            for position, dashboard in enumerate(dashboards):
+                _insert_dashboard(conn, dashboard, position, revision)
+
+        try:
+            self._write("replace_dashboards", replace)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to replace dashboards: {e}", exc_info=True)
+            raise
+
+    def update_dashboard(self, dashboard_id, fields, charts=None) -> bool:
+        """
+        Merge ``fields`` into a dashboard and optionally replace its charts.
+
+        Returns:
+            False if the dashboard does not exist.
+        """
+
+        def update(conn):
+            row = conn.execute(
+                "SELECT data FROM dashboards WHERE id=?", (dashboard_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row["data"] or "{}")
+            data.update(fields)
+            conn.execute(
+                "UPDATE dashboards SET data=?, revision=? WHERE id=?",
+                (json.dumps(data), _next_revision(conn), dashboard_id),
+            )
+            if charts is not None:
+                conn.execute(
+                    "DELETE FROM dashboard_charts WHERE dashboard_id=?",
+                    (dashboard_id,),
+                )
+                _insert_charts(conn, dashboard_id, charts)
+            return True
+
+        try:
+            return self._write("update_dashboard", update)
+        except sqlite3.Error as e:
+            logger.error(
+                f"Failed to update dashboard {dashboard_id}: {e}", exc_info=True
+            )
+            raise
+
+    def delete_dashboard(self, dashboard_id) -> bool:
+        """Delete a dashboard and its charts; False if it did not exist."""
+
+        def delete(conn):
+            conn.execute(
+                "DELETE FROM dashboard_charts WHERE dashboard_id=?", (dashboard_id,)
+            )
+            return (
+                conn.execute(
+                    "DELETE FROM dashboards WHERE id=?", (dashboard_id,)
+                ).rowcount
+                > 0
+            )
+
+        try:
+            return self._write("delete_dashboard", delete)
+        except sqlite3.Error as e:
+            logger.error(
+                f"Failed to delete dashboard {dashboard_id}: {e}", exc_info=True
+            )
+            raise
+
+    def add_chart(self, dashboard_id, chart) -> bool:
+        """Append a chart to a dashboard; False if the dashboard does not exist."""
+
+        def insert(conn):
+            if not _bump_dashboard(conn, dashboard_id):
+                return False
+            position = conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM dashboard_charts "
+                "WHERE dashboard_id=?",
+                (dashboard_id,),
+            ).fetchone()[0]
+            _insert_charts(conn, dashboard_id, [chart], position)
+            return True
+
+        try:
+            return self._write("add_chart", insert)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add chart to {dashboard_id}: {e}", exc_info=True)
+            raise
+
+    def update_chart(self, dashboard_id, chart_id, fields) -> Optional[Dict]:
+        """
+        Merge ``fields`` into one chart, leaving the other charts untouched.
+
+        Returns:
+            The updated chart, None if it does not exist.
+        """
+
+        def update(conn):
+            row = conn.execute(
+                "SELECT data FROM dashboard_charts WHERE dashboard_id=? AND id=?",
+                (dashboard_id, chart_id),
+            ).fetchone()
+            if row is None:
+                return None
+            chart = json.loads(row["data"])
+            chart.update(fields)
+            chart["id"] = chart_id
+            conn.execute(
+                "UPDATE dashboard_charts SET data=? WHERE dashboard_id=? AND id=?",
+                (json.dumps(chart), dashboard_id, chart_id),
+            )
+            _bump_dashboard(conn, dashboard_id)
+            return chart
+
+        try:
+            return self._write("update_chart", update)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to update chart {chart_id}: {e}", exc_info=True)
+            raise
+
+    def delete_chart(self, dashboard_id, chart_id) -> bool:
+        """Delete one chart; False if it did not exist."""
+
+        def delete(conn):
+            deleted = conn.execute(
+                "DELETE FROM dashboard_charts WHERE dashboard_id=? AND id=?",
+                (dashboard_id, chart_id),
+            ).rowcount
+            if not deleted:
+                return False
+            _bump_dashboard(conn, dashboard_id)
+            return True
+
+        try:
+            return self._write("delete_chart", delete)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to delete chart {chart_id}: {e}", exc_info=True)
+            raise
+
+
+def _next_revision(conn) -> int:
+    """Next value of the database-wide dashboard revision sequence."""
+    revision = conn.execute("INSERT INTO dashboard_revisions DEFAULT VALUES").lastrowid
+    # Only sqlite_sequence has to remember it
+    conn.execute("DELETE FROM dashboard_revisions")
+    return revision
+
+
+def _insert_dashboard(conn, dashboard, position, revision):
+    data = {k: v for k, v in dashboard.items() if k not in ("id", "revision", "charts")}
+    conn.execute(
+        "INSERT INTO dashboards (id, position, revision, data) VALUES (?, ?, ?, ?)",
+        (dashboard["id"], position, revision, json.dumps(data)),
+    )
+    _insert_charts(conn, dashboard["id"], dashboard.get("charts") or [])
+
+
+def _insert_charts(conn, dashboard_id, charts, start=0):
+    # A duplicate chart id replaces the earlier chart instead of failing
+    conn.executemany(
+        """INSERT OR REPLACE INTO dashboard_charts (dashboard_id, id, position, data)
+           VALUES (?, ?, ?, ?)""",
+        [
+            (dashboard_id, chart["id"], start + i, json.dumps(chart))
+            for i, chart in enumerate(charts)
+        ],
+    )
+
+
+def _bump_dashboard(conn, dashboard_id) -> bool:
+    """Give the dashboard a new revision; False if it does not exist."""
+    if (
+        conn.execute("SELECT 1 FROM dashboards WHERE id=?", (dashboard_id,)).fetchone()
+        is None
+    ):
+        return False
+    conn.execute(
+        "UPDATE dashboards SET revision=? WHERE id=?",
+        (_next_revision(conn), dashboard_id),
+    )
+    return True
+
 
 db = Database()
@@ -0,0 +1,169 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Server-side downsampling of chart series.
+
+Charts rarely have more horizontal pixels than a few thousand, so range
+queries are reduced to ``max_points`` before they are sent to the browser:
+
+- ``lttb``: Largest-Triangle-Three-Buckets, keeps the visual shape
+  (peaks, defrost dips) with exactly ``max_points`` points.
+- ``m4``: first/last/min/max per pixel column, keeps every extreme value
+  and produces at most ``max_points`` points.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+METHODS = ("lttb", "m4")
+DEFAULT_METHOD = "lttb"
+MIN_POINTS = 3
+MAX_POINTS = 10000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices selected by Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: Sorted timestamps.
+        y: Values (finite).
+        n_out: Number of points to keep (>= 3).
+
+    Returns:
+        Sorted index array of length min(n_out, len(x)).
+    """
+    n = len(x)
+    if n_out >= n or n_out < MIN_POINTS:
+        return np.arange(n)
+
+    # Bucket boundaries for the n - 2 inner points; first and last are always kept
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average point of every bucket, computed for all buckets at once
+    csum_x = np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+    csum_y = np.concatenate(([0.0], np.cumsum(y, dtype=np.float64)))
+    counts = np.maximum(ends - starts, 1)
+    avg_x = (csum_x[ends] - csum_x[starts]) / counts
+    avg_y = (csum_y[ends] - csum_y[starts]) / counts
+    # The "next bucket" of the last inner bucket is the final point
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        bx = x[start:end]
+        by = y[start:end]
+        # Twice the triangle area (a, candidate, next bucket average)
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def m4_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices selected by M4 (first, last, min and max per pixel column).
+
+    Args:
+        x: Sorted timestamps.
+        y: Values (finite).
+        n_out: Upper bound of points to keep; n_out // 4 columns are used.
+
+    Returns:
+        Sorted, de-duplicated index array.
+    """
+    n = len(x)
+    columns = max(1, n_out // 4)
+    if n <= n_out:
+        return np.arange(n)
+
+    span = x[-1] - x[0]
+    if span <= 0:
+        return np.array([0, n - 1])
+    column = np.minimum(((x - x[0]) / span * columns).astype(np.int64), columns - 1)
+
+    # Start index of every non-empty column (x is sorted, so columns are contiguous)
+    starts = np.flatnonzero(np.diff(column, prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+
+    # Per-column argmin/argmax: sort by (column, value); since columns are
+    # contiguous, each column keeps its position range in the sorted order
+    mins = np.lexsort((y, column))[starts]
+    maxs = np.lexsort((-y, column))[starts]
+
+    return np.unique(np.concatenate((starts, ends, mins, maxs)))
+
+
+def downsample_indices(
+    x: np.ndarray, y: np.ndarray, max_points: int, method: str = DEFAULT_METHOD
+) -> np.ndarray:
+    """Pick the points to keep, ignoring NaN/Inf samples (gaps)."""
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) <= max_points:
+        return finite
+    fx, fy = x[finite], y[finite]
+    if method == "m4":
+        return finite[m4_indices(fx, fy, max_points)]
+    return finite[lttb_indices(fx, fy, max_points)]
+
+
+def downsample_values(values: List, max_points: int, method: str = DEFAULT_METHOD):
+    """
+    Downsample a Prometheus ``values`` list ([[ts, "value"], ...]).
+
+    The selected pairs are returned unchanged (values stay strings, exactly
+    as VictoriaMetrics sent them).
+    """
+    if len(values) <= max_points:
+        return values
+    x = np.fromiter((v[0] for v in values), dtype=np.float64, count=len(values))
+    y = np.fromiter((v[1] for v in values), dtype=np.float64, count=len(values))
+    return [values[i] for i in downsample_indices(x, y, max_points, method)]
+
+
+def downsample_matrix(
+    payload: Dict, max_points: int, method: str = DEFAULT_METHOD
+) -> Dict:
+    """
+    Downsample every series of a query_range response in place.
+
+    Args:
+        payload: Decoded VictoriaMetrics/Prometheus JSON response.
+        max_points: Points to keep per series.
+        method: "lttb" or "m4".
+
+    Returns:
+        The same payload object.
+    """
+    data = payload.get("data") or {}
+    if payload.get("status") != "success" or data.get("resultType") != "matrix":
+        return payload
+    for series in data.get("result", []):
+        values = series.get("values")
+        if values:
+            series["values"] = downsample_values(values, max_points, method)
+    return payload
+
+
+def parse_max_points(value) -> int:
+    """
+    Validate a max_points/width request parameter.
+
+    Returns:
+        The clamped point count, or 0 when downsampling is not requested.
+
+    Raises:
+        ValueError: The value is not an integer.
+    """
+    if value in (None, ""):
+        return 0
+    points = int(value)
+    if points <= 0:
+        return 0
+    return max(MIN_POINTS, min(points, MAX_POINTS))
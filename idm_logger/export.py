@@ -0,0 +1,374 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Columnar export of VictoriaMetrics data (Parquet / Arrow IPC).
+
+Produces one wide, timestamp-indexed table with one typed column per metric.
+Column types are derived from the sensor definitions in sensor_addresses.py
+(float32 for float registers, int16 for word registers, ...). Data is fetched
+in time windows and each window is written as its own row group, so memory
+stays bounded no matter how long the exported range is.
+
+CLI usage:
+    python -m idm_logger.export --start 2025-01-01 --end 2026-01-01 \\
+        --step 1m --format parquet --output heatpump_2025.parquet
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import requests
+
+from .config import config
+from .sensor_addresses import (
+    BINARY_SENSOR_ADDRESSES,
+    COMMON_SENSORS,
+    ZONE_OFFSETS,
+    HeatingCircuit,
+    heating_circuit_sensors,
+    zone_sensors,
+)
+from .vm_client import get_vm_client, normalize_base_url
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# Selector used when the caller asks for "all" metrics
+ALL_METRICS_SELECTOR = '{__name__=~"idm_heatpump.*|idm_anomaly.*"}'
+METRIC_PREFIX = "idm_heatpump_"
+
+# Number of samples per series fetched (and written) per row group
+ROW_GROUP_POINTS = 10000
+COMPRESSION = "zstd"
+
+_STEP_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)(ms|s|m|h|d|w)?$")
+_STEP_UNITS = {
+    "ms": 0.001,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+    None: 1,
+}
+
+_column_types: Optional[Dict[str, str]] = None
+
+
+def _load_pyarrow():
+    """Import pyarrow lazily so the logger starts without it."""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("Parquet/Arrow export requires the 'pyarrow' package") from e
+    return pa
+
+
+def parse_step(step: Union[str, int, float]) -> float:
+    """Convert a PromQL step ("30s", "1m", "1h", 60) to seconds."""
+    if isinstance(step, (int, float)):
+        seconds = float(step)
+    else:
+        match = _STEP_PATTERN.match(str(step).strip())
+        if not match:
+            raise ValueError(f"Invalid step: {step}")
+        seconds = float(match.group(1)) * _STEP_UNITS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError(f"Step must be positive: {step}")
+    return seconds
+
+
+def parse_timestamp(value: Union[str, int, float]) -> float:
+    """Convert a Unix timestamp or ISO 8601 string to Unix seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _sensor_column_types() -> Dict[str, str]:
+    """Map every known sensor name to its register datatype (cached)."""
+    global _column_types
+    if _column_types is None:
+        sensors = list(COMMON_SENSORS)
+        for circuit in HeatingCircuit:
+            sensors.extend(heating_circuit_sensors(circuit))
+        for zone_idx in range(len(ZONE_OFFSETS)):
+            sensors.extend(zone_sensors(zone_idx))
+
+        types = {s.name: s.datatype for s in sensors}
+        for name in BINARY_SENSOR_ADDRESSES:
+            types[name] = "bool"
+        _column_types = types
+    return _column_types
+
+
+def column_type(metric_name: str):
+    """Return the Arrow type used for a metric column."""
+    pa = _load_pyarrow()
+    datatype = _sensor_column_types().get(metric_name.replace(METRIC_PREFIX, "", 1))
+    return {
+        "int16": pa.int16(),
+        "uint16": pa.uint16(),
+        "int32": pa.int32(),
+        "uint32": pa.uint32(),
+        "bool": pa.bool_(),
+    }.get(datatype, pa.float32())
+
+
+def build_schema(metric_names: List[str]):
+    """Build the wide table schema: timestamp followed by one column per metric."""
+    pa = _load_pyarrow()
+    fields = [pa.field("timestamp", pa.timestamp("ms", tz="UTC"), nullable=False)]
+    fields.extend(pa.field(name, column_type(name)) for name in metric_names)
+    return pa.schema(fields, metadata={"source": "idm-metrics-collector"})
+
+
+def _to_arrow_column(values: np.ndarray, arrow_type):
+    """Convert a float64 array with NaN gaps into a typed, nullable Arrow array."""
+    pa = _load_pyarrow()
+    mask = np.isnan(values)
+    if pa.types.is_floating(arrow_type):
+        return pa.array(values.astype(np.float32), type=arrow_type, mask=mask)
+    if pa.types.is_boolean(arrow_type):
+        return pa.array(np.nan_to_num(values) > 0.5, type=arrow_type, mask=mask)
+    filled = np.round(np.nan_to_num(values)).astype(arrow_type.to_pandas_dtype())
+    return pa.array(filled, type=arrow_type, mask=mask)
+
+
+class ColumnarExporter:
+    """Streams VictoriaMetrics range data into a wide Parquet/Arrow table."""
+
+    def __init__(
+        self,
+        base_url: str,
+        metrics: Union[List[str], str] = "all",
+        step: Union[str, int, float] = "1m",
+        timeout: int = 30,
+    ):
+        self.client = get_vm_client(base_url)
+        self.base_url = self.client.base_url
+        self.metrics = metrics
+        self.step = step
+        self.step_seconds = parse_step(step)
+        self.timeout = timeout
+
+    def resolve_metric_names(self, start: float, end: float) -> List[str]:
+        """Determine the output columns (fixed before the first row group)."""
+        if self.metrics != "all":
+            return list(dict.fromkeys(m for m in self.metrics if m))
+
+        response = self.client.get(
+            "/api/v1/label/__name__/values",
+            params={"match[]": ALL_METRICS_SELECTOR, "start": start, "end": end},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to list metrics: HTTP {response.status_code}")
+        return sorted(response.json().get("data", []))
+
+    def _windows(self, start: float, end: float) -> Iterator[Tuple[float, float]]:
+        """Yield [window_start, window_stop) ranges of ROW_GROUP_POINTS samples."""
+        span = self.step_seconds * ROW_GROUP_POINTS
+        window_start = start
+        while window_start <= end:
+            window_stop = min(window_start + span, end + self.step_seconds)
+            yield window_start, window_stop
+            window_start = window_stop
+
+    def _query_window(
+        self, selector: str, window_start: float, window_stop: float
+    ) -> List[dict]:
+        response = self.client.query_range(
+            selector,
+            window_start,
+            window_stop - self.step_seconds,
+            self.step,
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            logger.warning(f"Failed to fetch {selector}: {response.status_code}")
+            return []
+        data = response.json()
+        if data.get("status") != "success":
+            return []
+        return data.get("data", {}).get("result", [])
+
+    def _fetch_window(
+        self, metric_names: List[str], window_start: float, window_stop: float
+    ) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+        """Fetch all series of a window as (column, timestamps, values) tuples."""
+        if self.metrics == "all":
+            queries = [(None, ALL_METRICS_SELECTOR)]
+        else:
+            queries = [(name, name) for name in metric_names]
+
+        series = []
+        for column, selector in queries:
+            for result in self._query_window(selector, window_start, window_stop):
+                name = column or result.get("metric", {}).get("__name__")
+                values = result.get("values") or []
+                if not name or not values:
+                    continue
+                raw = np.asarray(values, dtype=object)
+                timestamps = raw[:, 0].astype(np.float64)
+                samples = raw[:, 1].astype(np.float64)
+                keep = (timestamps >= window_start) & (timestamps < window_stop)
+                series.append((name, timestamps[keep], samples[keep]))
+        return series
+
+    def _build_batch(self, schema, series):
+        """Align series on a shared timestamp grid and build a record batch."""
+        pa = _load_pyarrow()
+        if not series:
+            return None
+
+        grid = np.unique(np.concatenate([ts for _, ts, _ in series]))
+        if grid.size == 0:
+            return None
+
+        columns: Dict[str, np.ndarray] = {}
+        for name, timestamps, samples in series:
+            if schema.get_field_index(name) < 0:
+                continue
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = np.full(grid.size, np.nan)
+            positions = np.searchsorted(grid, timestamps)
+            # Series sharing a name (e.g. per-mode anomaly scores) fill each other's gaps
+            gaps = np.isnan(column[positions])
+            column[positions[gaps]] = samples[gaps]
+
+        arrays = [pa.array((grid * 1000).astype(np.int64), type=schema.field(0).type)]
+        for field in schema:
+            if field.name == "timestamp":
+                continue
+            values = columns.get(field.name)
+            if values is None:
+                arrays.append(pa.nulls(grid.size, type=field.type))
+            else:
+                arrays.append(_to_arrow_column(values, field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def export(self, sink, start, end, export_format: str = "parquet") -> dict:
+        """
+        Write the range [start, end] to sink (path or binary file object).
+
+        Returns:
+            Summary dict with row, column and row group counts.
+        """
+        pa = _load_pyarrow()
+        if export_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {export_format}")
+
+        start_ts = parse_timestamp(start)
+        end_ts = parse_timestamp(end)
+        if end_ts < start_ts:
+            raise ValueError("end must not be before start")
+
+        metric_names = self.resolve_metric_names(start_ts, end_ts)
+        if not metric_names:
+            raise ValueError("No metrics selected")
+        schema = build_schema(metric_names)
+
+        if export_format == "parquet":
+            writer = pa.parquet.ParquetWriter(
+                sink,
+                schema,
+                compression=COMPRESSION,
+                use_dictionary=False,
+                sorting_columns=[pa.parquet.SortingColumn(0)],
+            )
+        else:
+            writer = pa.ipc.new_file(
+                sink, schema, options=pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+            )
+
+        rows = 0
+        row_groups = 0
+        try:
+            for window_start, window_stop in self._windows(start_ts, end_ts):
+                batch = self._build_batch(
+                    schema, self._fetch_window(metric_names, window_start, window_stop)
+                )
+                if batch is None:
+                    continue
+                # Each window becomes its own row group / record batch
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                row_groups += 1
+        finally:
+            writer.close()
+
+        return {
+            "rows": rows,
+            "columns": len(metric_names),
+            "row_groups": row_groups,
+            "format": export_format,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Export heat pump metrics as a columnar Parquet/Arrow file."
+    )
+    parser.add_argument("--start", required=True, help="Unix timestamp or ISO date")
+    parser.add_argument("--end", help="Unix timestamp or ISO date (default: now)")
+    parser.add_argument("--step", default="1m", help="Sample step (default: 1m)")
+    parser.add_argument("--format", choices=COLUMNAR_FORMATS, default="parquet")
+    parser.add_argument(
+        "--metrics",
+        nargs="*",
+        help="Metric names to export (default: all idm_heatpump/idm_anomaly metrics)",
+    )
+    parser.add_argument(
+        "--url",
+        help="VictoriaMetrics base URL (default: metrics.url from config)",
+    )
+    parser.add_argument("-o", "--output", required=True, help="Output file path")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    base_url = normalize_base_url(
+        args.url or config.get("metrics.url", "http://victoriametrics:8428/write")
+    )
+
+    exporter = ColumnarExporter(base_url, metrics=args.metrics or "all", step=args.step)
+    started = time.time()
+    try:
+        summary = exporter.export(
+            args.output, args.start, args.end or time.time(), args.format
+        )
+    except (RuntimeError, ValueError, requests.RequestException) as e:
+        logger.error(f"Export failed: {e}")
+        return 1
+
+    logger.info(
+        f"Exported {summary['rows']} rows x {summary['columns']} metrics "
+        f"in {summary['row_groups']} row groups to {args.output} "
+        f"({time.time() - started:.1f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
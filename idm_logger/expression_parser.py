@@ -10,19 +10,28 @@ Supports operations like:
 - sum(A,B) (sum of A and B)
 - min(A,B) (minimum of A and B)
 - max(A,B) (maximum of A and B)
+
+Expressions are compiled once into a tree of NumPy operations. The query
+series are aligned with a sorted merge-join on their timestamps and the
+whole range is evaluated as array operations.
 """
 
 import ast
 import re
-from typing import List, Dict, Union
+from typing import List, Dict, Tuple, Union
 import operator
 import logging
 
+import numpy as np
+
+from .lru_cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
 # Pre-compiled regex patterns for performance
 _VALID_CHARS_PATTERN = re.compile(r"^[\w\s+\-*/().,]+$")
 _QUERY_LABEL_PATTERN = re.compile(r"\b([A-Z])\b")
+_LABEL_NAME_PATTERN = re.compile(r"^[A-Z]$")
 
 
 class SafeExpressionEvaluator(ast.NodeVisitor):
@@ -115,6 +124,319 @@ class SafeExpressionEvaluator(ast.NodeVisitor):
         raise ValueError(f"Unsupported expression element: {type(node).__name__}")
 
 
+def _reduce_min(args):
+    if not args:
+        raise ValueError("min() requires at least one argument")
+    return np.minimum.reduce(np.broadcast_arrays(*args))
+
+
+def _reduce_max(args):
+    if not args:
+        raise ValueError("max() requires at least one argument")
+    return np.maximum.reduce(np.broadcast_arrays(*args))
+
+
+def _abs(args):
+    if len(args) != 1:
+        raise ValueError("abs() takes exactly one argument")
+    return np.abs(args[0])
+
+
+def _sum(args):
+    return sum(args, np.float64(0.0))
+
+
+def _avg(args):
+    if not args:
+        raise ValueError("avg() requires at least one argument")
+    return _sum(args) / len(args)
+
+
+_ARRAY_FUNCTIONS = {
+    "min": _reduce_min,
+    "max": _reduce_max,
+    "abs": _abs,
+    "sum": _sum,
+    "avg": _avg,
+}
+
+
+class _ArrayCompiler(ast.NodeVisitor):
+    """
+    Compile an expression AST into nested closures over NumPy arrays.
+
+    Uses the operator and function whitelist of SafeExpressionEvaluator;
+    every other node type is rejected at compile time.
+    """
+
+    def __init__(self):
+        self.labels = set()
+
+    def visit_BinOp(self, node):
+        op_type = type(node.op)
+        if op_type not in SafeExpressionEvaluator.BINARY_OPS:
+            raise ValueError(f"Unsupported operator: {op_type.__name__}")
+        op = SafeExpressionEvaluator.BINARY_OPS[op_type]
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        return lambda env: op(left(env), right(env))
+
+    def visit_UnaryOp(self, node):
+        op_type = type(node.op)
+        if op_type not in SafeExpressionEvaluator.UNARY_OPS:
+            raise ValueError(f"Unsupported unary operator: {op_type.__name__}")
+        op = SafeExpressionEvaluator.UNARY_OPS[op_type]
+        operand = self.visit(node.operand)
+        return lambda env: op(operand(env))
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant type: {type(node.value)}")
+        # NumPy scalar: division by zero yields inf/nan instead of raising
+        value = np.float64(node.value)
+        return lambda env: value
+
+    def visit_Name(self, node):
+        if not _LABEL_NAME_PATTERN.match(node.id):
+            raise ValueError(f"Unknown name: {node.id}")
+        label = node.id
+        self.labels.add(label)
+        return lambda env: env[label]
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name):
+            raise ValueError("Only simple function calls allowed")
+        func_name = node.func.id
+        if func_name not in SafeExpressionEvaluator.ALLOWED_FUNCTIONS:
+            raise ValueError(f"Function not allowed: {func_name}")
+        if node.keywords:
+            raise ValueError("Keyword arguments are not allowed")
+        func = _ARRAY_FUNCTIONS[func_name]
+        args = [self.visit(arg) for arg in node.args]
+        return lambda env: func([arg(env) for arg in args])
+
+    def generic_visit(self, node):
+        raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
+class CompiledExpression:
+    """An expression compiled once into a NumPy evaluation tree (immutable)."""
+
+    __slots__ = ("source", "labels", "_fn")
+
+    def __init__(self, source: str):
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {e}")
+        compiler = _ArrayCompiler()
+        fn = compiler.visit(tree.body)
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "labels", tuple(sorted(compiler.labels)))
+        object.__setattr__(self, "_fn", fn)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledExpression is immutable")
+
+    def evaluate(self, values: Dict[str, np.ndarray]):
+        """
+        Evaluate on aligned arrays (or scalars), one entry per label.
+
+        Division by zero and invalid operations produce inf/NaN instead of
+        raising; callers drop non-finite results.
+        """
+        with np.errstate(all="ignore"):
+            return self._fn(values)
+
+
+def _to_float_array(values) -> np.ndarray:
+    """Convert values (numbers or VictoriaMetrics strings) to float64, NaN on error."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def _prepare_series(points) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """
+    Sort a [(timestamp, value), ...] series and drop duplicate timestamps.
+
+    Returns:
+        (timestamps as float64, values as float64, all timestamps integral)
+    """
+    if not points:
+        return np.empty(0), np.empty(0), True
+    raw_ts = [p[0] for p in points]
+    integral = all(isinstance(t, int) and not isinstance(t, bool) for t in raw_ts)
+    ts = _to_float_array(raw_ts)
+    vals = _to_float_array([p[1] for p in points])
+    order = np.argsort(ts, kind="stable")
+    ts, vals = ts[order], vals[order]
+    # Keep the first value of repeated timestamps
+    ts, first = np.unique(ts, return_index=True)
+    return ts, vals[first], integral
+
+
+def align_series(
+    query_results: Dict[str, List[tuple]], labels
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Inner merge-join of the referenced series on their timestamps.
+
+    Args:
+        query_results: Label -> [(timestamp, value), ...].
+        labels: Labels used by the expression. Without labels the union of
+            all timestamps is used (constant expressions).
+
+    Returns:
+        (common timestamps, label -> values aligned to them)
+    """
+    prepared = {
+        label: _prepare_series(points) for label, points in query_results.items()
+    }
+    if not labels:
+        all_ts = [ts for ts, _, _ in prepared.values()]
+        common = np.unique(np.concatenate(all_ts)) if all_ts else np.empty(0)
+        integral = all(flag for _, _, flag in prepared.values())
+        return _timestamps_out(common, integral), {}
+
+    if any(label not in prepared for label in labels):
+        return np.empty(0), {label: np.empty(0) for label in labels}
+
+    common = prepared[labels[0]][0]
+    for label in labels[1:]:
+        common = np.intersect1d(common, prepared[label][0], assume_unique=True)
+
+    aligned = {}
+    for label in labels:
+        ts, vals, _ = prepared[label]
+        aligned[label] = vals[np.searchsorted(ts, common)]
+    integral = all(prepared[label][2] for label in labels)
+    return _timestamps_out(common, integral), aligned
+
+
+def _timestamps_out(timestamps: np.ndarray, integral: bool) -> np.ndarray:
+    return timestamps.astype(np.int64) if integral else timestamps
+
+
+def snap_to_step(points, step: float, origin: float = 0.0) -> List[tuple]:
+    """
+    Round the timestamps of a series to the step grid.
+
+    Series fetched with the same start/step may still be off by a few
+    milliseconds; snapping makes them join on equal timestamps.
+
+    Args:
+        points: [(timestamp, value), ...].
+        step: Grid size in seconds.
+        origin: A timestamp on the grid (the query start).
+    """
+    if not step or step <= 0:
+        return [tuple(p) for p in points]
+    integral = float(step).is_integer() and float(origin).is_integer()
+    snapped = []
+    for ts, value in points:
+        grid_ts = origin + round((float(ts) - origin) / step) * step
+        snapped.append((int(grid_ts) if integral else grid_ts, value))
+    return snapped
+
+
+# Compiled expressions are immutable, so one instance is shared by all callers
+COMPILED_CACHE_SIZE = 256
+_compiled_cache = LRUCache(capacity=COMPILED_CACHE_SIZE)
+
+
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Compile an expression, reusing a cached tree for the same expression.
+
+    Raises:
+        ValueError: The expression is invalid or uses forbidden elements.
+    """
+    key = "".join(expression.split())
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        compiled = CompiledExpression(expression)
+        _compiled_cache.put(key, compiled)
+    return compiled
+
+
+class EvaluationContext:
+    """
+    Query results of a single evaluation call.
+
+    A context is created per request and never shared, so concurrent
+    requests cannot overwrite each other's data. Only the immutable
+    compiled expressions are shared between threads.
+    """
+
+    __slots__ = ("query_results",)
+
+    def __init__(self, query_results: Dict[str, List[tuple]]):
+        self.query_results = query_results
+
+    def evaluate_compiled(self, compiled: CompiledExpression) -> List[tuple]:
+        """
+        Evaluate a compiled expression over the aligned query series.
+
+        Returns:
+            List of (timestamp, value) tuples, sorted by timestamp. Points
+            where a query has no value or the result is not finite
+            (e.g. division by zero) are skipped.
+        """
+        timestamps, aligned = align_series(self.query_results, compiled.labels)
+        if len(timestamps) == 0:
+            return []
+        result = np.broadcast_to(
+            np.asarray(compiled.evaluate(aligned), dtype=np.float64),
+            timestamps.shape,
+        )
+        mask = np.isfinite(result)
+        return list(zip(timestamps[mask].tolist(), result[mask].tolist()))
+
+    def evaluate_series(self, expression: str) -> List[tuple]:
+        """Evaluate an expression over all timestamps ([] on errors)."""
+        try:
+            return self.evaluate_compiled(compile_expression(expression))
+        except Exception as e:
+            logger.error(f"Error evaluating expression '{expression}': {e}")
+            return []
+
+    def evaluate_at(self, expression: str, timestamp) -> Union[float, None]:
+        """Evaluate an expression at one timestamp (None if not computable)."""
+        try:
+            compiled = compile_expression(expression)
+        except ValueError as e:
+            logger.error(f"Error evaluating expression '{expression}': {e}")
+            return None
+
+        query_values = {}
+        for query_label in compiled.labels:
+            if query_label not in self.query_results:
+                return None
+            value = None
+            for ts, val in self.query_results[query_label]:
+                if ts == timestamp:
+                    value = val
+                    break
+            if value is None:
+                return None
+            query_values[query_label] = _to_float_array([value])[0]
+
+        try:
+            result = float(compiled.evaluate(query_values))
+        except Exception as e:
+            logger.error(f"Error evaluating expression '{expression}': {e}")
+            return None
+        return result if np.isfinite(result) else None
+
+
 class ExpressionParser:
     """Safe expression parser for mathematical operations on query results."""
 
@@ -142,6 +464,9 @@ class ExpressionParser:
         """
         Set query results for expression evaluation.
 
+        The results are stored on the parser instance; use context() when
+        the parser is shared between threads.
+
         Args:
             query_results: Dictionary mapping query labels to their results
                           Format: { 'A': [(timestamp1, value1), (timestamp2, value2), ...] }
@@ -195,12 +520,23 @@ class ExpressionParser:
         queries = _QUERY_LABEL_PATTERN.findall(expression)
         return list(set(queries))
 
+    def compile(self, expression: str) -> CompiledExpression:
+        """Compile an expression (shared LRU of immutable compiled trees)."""
+        return compile_expression(expression)
+
+    def context(self, query_results: Dict[str, List[tuple]]) -> EvaluationContext:
+        """Create a per-call evaluation context (safe for concurrent requests)."""
+        return EvaluationContext(query_results)
+
     def evaluate_expression(
         self, expression: str, timestamp: int
     ) -> Union[float, None]:
         """
         Evaluate an expression at a specific timestamp.
 
+        Uses the results set with set_query_results(); concurrent callers
+        should use context() instead.
+
         Args:
             expression: The expression to evaluate (e.g., "A/B", "A*100", "(A+B)/2")
             timestamp: The timestamp to evaluate at
@@ -208,85 +544,28 @@ class ExpressionParser:
         Returns:
             The calculated value or None if any query has no value at this timestamp
         """
-        # First, get the value for each query at this timestamp
-        query_values = {}
-        for query_label in self.parse_expression(expression):
-            if query_label not in self.query_results:
-                return None
-
-            # Find the value for this timestamp
-            values = self.query_results[query_label]
-            value = None
-            for ts, val in values:
-                if ts == timestamp:
-                    value = val
-                    break
-
-            if value is None:
-                return None
-
-            query_values[query_label] = value
-
-        # Now evaluate the expression with these values
-        try:
-            return self._evaluate_with_values(expression, query_values)
-        except Exception as e:
-            logger.error(f"Error evaluating expression '{expression}': {e}")
-            return None
-
-    def _evaluate_with_values(self, expression: str, values: Dict[str, float]) -> float:
-        """
-        Evaluate an expression with given query values.
+        return EvaluationContext(self.query_results).evaluate_at(expression, timestamp)
 
-        Args:
-            expression: The expression to evaluate
-            values: Dictionary mapping query labels to their values
-
-        Returns:
-            The calculated value
-        """
-        # Replace query references with their values
-        expr = expression
-        for query_label, value in values.items():
-            # Use word boundaries to avoid partial replacements
-            expr = re.sub(r"\b" + query_label + r"\b", str(value), expr)
-
-        # Removed regex-based function replacement to prevent ReDoS
-        # Functions are now handled directly by SafeExpressionEvaluator
-
-        # Safe evaluation using AST-based evaluator (no eval!)
-        expr = expr.strip()
-        try:
-            evaluator = SafeExpressionEvaluator()
-            result = evaluator.evaluate(expr)
-            return float(result)
-        except Exception as e:
-            raise ValueError(f"Failed to evaluate expression '{expr}': {e}")
+    def evaluate_compiled(
+        self, compiled: CompiledExpression, query_results: Dict[str, List[tuple]]
+    ) -> List[tuple]:
+        """Evaluate a compiled expression on the given query results."""
+        return EvaluationContext(query_results).evaluate_compiled(compiled)
 
     def evaluate_expression_series(self, expression: str) -> List[tuple]:
         """
         Evaluate an expression over all timestamps.
 
+        Uses the results set with set_query_results(); concurrent callers
+        should use context() instead.
+
         Args:
             expression: The expression to evaluate
 
         Returns:
             List of (timestamp, value) tuples
         """
-        # Get all unique timestamps from all queries
-        all_timestamps = set()
-        for values in self.query_results.values():
-            for ts, _ in values:
-                all_timestamps.add(ts)
-
-        # Evaluate expression at each timestamp
-        results = []
-        for timestamp in sorted(all_timestamps):
-            value = self.evaluate_expression(expression, timestamp)
-            if value is not None:
-                results.append((timestamp, value))
-
-        return results
+        return EvaluationContext(self.query_results).evaluate_series(expression)
 
     def get_expression_help(self) -> str:
         """Get help text for expressions."""
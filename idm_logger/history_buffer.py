@@ -0,0 +1,143 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+In-memory history of the most recent poll cycles.
+
+Every Modbus reading is appended as one row of a fixed-size ring: one shared
+timestamp column plus one float64 column per metric (NaN where a metric was
+not read). 1024 rows cover 15 minutes of 1 s realtime data and take about
+1-2 MB for all metrics. Live clients get their backfill (the last few
+minutes) from here instead of querying VictoriaMetrics.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Same naming as the metrics writer: measurement "idm_heatpump" + "_" + field
+METRIC_PREFIX = "idm_heatpump_"
+
+DEFAULT_WINDOW = 900  # seconds
+DEFAULT_CAPACITY = 1024  # rows (poll cycles)
+
+
+def _sensor_name(metric: str) -> str:
+    if metric.startswith(METRIC_PREFIX):
+        return metric[len(METRIC_PREFIX) :]
+    return metric
+
+
+class HistoryBuffer:
+    """Ring buffer of recent readings, indexed by sensor name."""
+
+    def __init__(
+        self, window: float = DEFAULT_WINDOW, capacity: int = DEFAULT_CAPACITY
+    ):
+        self.window = window
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._timestamps = np.full(capacity, np.nan)
+        self._values = np.full((capacity, 64), np.nan, dtype=np.float64)
+        self._columns: Dict[str, int] = {}
+        self._latest: Dict[str, float] = {}
+        self._next = 0  # row written next
+        self._count = 0
+
+    def _column(self, name: str) -> int:
+        column = self._columns.get(name)
+        if column is None:
+            column = len(self._columns)
+            if column >= self._values.shape[1]:
+                grown = np.full(
+                    (self.capacity, self._values.shape[1] * 2), np.nan, dtype=np.float64
+                )
+                grown[:, : self._values.shape[1]] = self._values
+                self._values = grown
+            self._columns[name] = column
+        return column
+
+    def append(self, data: Dict, timestamp: Optional[float] = None):
+        """Record one reading (sensor name -> value), numeric values only."""
+        timestamp = timestamp or time.time()
+        with self._lock:
+            row = self._next
+            self._values[row, :] = np.nan
+            self._timestamps[row] = timestamp
+            for key, value in data.items():
+                if not isinstance(key, str) or key.endswith("_str"):
+                    continue
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                column = self._column(key)  # may grow self._values
+                self._values[row, column] = value
+                self._latest[key] = value
+            self._next = (row + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _rows_since(self, since: float) -> np.ndarray:
+        """Row indices in chronological order with timestamp >= since."""
+        start = (self._next - self._count) % self.capacity
+        rows = (start + np.arange(self._count)) % self.capacity
+        return rows[self._timestamps[rows] >= since]
+
+    def latest(self, metrics: Iterable[str]) -> Dict[str, float]:
+        """Latest value of each requested metric (keyed as requested)."""
+        with self._lock:
+            result = {}
+            for metric in metrics:
+                value = self._latest.get(_sensor_name(metric))
+                if value is not None:
+                    result[metric] = value
+            return result
+
+    def backfill(
+        self, metrics: Iterable[str], seconds: Optional[float] = None
+    ) -> Dict[str, List[List[float]]]:
+        """
+        Recent points of each requested metric.
+
+        Args:
+            metrics: Sensor or metric names.
+            seconds: Window length, capped at the configured window.
+
+        Returns:
+            Metric -> [[timestamp, value], ...] in chronological order.
+        """
+        seconds = self.window if seconds is None else min(seconds, self.window)
+        with self._lock:
+            if not self._count or seconds <= 0:
+                return {}
+            rows = self._rows_since(time.time() - seconds)
+            timestamps = self._timestamps[rows]
+            result = {}
+            for metric in metrics:
+                column = self._columns.get(_sensor_name(metric))
+                if column is None:
+                    continue
+                values = self._values[rows, column]
+                mask = ~np.isnan(values)
+                if mask.any():
+                    result[metric] = np.column_stack(
+                        (timestamps[mask], values[mask])
+                    ).tolist()
+            return result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "rows": self._count,
+                "capacity": self.capacity,
+                "metrics": len(self._columns),
+                "window": self.window,
+                "bytes": self._values.nbytes + self._timestamps.nbytes,
+            }
+
+
+history_buffer = HistoryBuffer()
@@ -0,0 +1,166 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Response compression and conditional request helpers.
+
+JSON and text responses above a size threshold are compressed with brotli
+(if installed) or gzip, negotiated per request via Accept-Encoding. Stable
+resources get strong ETags so browsers revalidate with If-None-Match and
+receive a 304 instead of the full body.
+
+A compressed body is a different representation, so its ETag gets an
+encoding suffix (``"<tag>-gzip"``). ``etag_matches`` strips the suffix
+again when comparing, which keeps 304s working across encodings.
+"""
+
+import gzip
+import logging
+from typing import Optional
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bodies below this size are not worth the CPU time (and may grow)
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+# Quality 4-5 is the usual trade-off for dynamic content
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_MIMETYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+    }
+)
+
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def negotiate_encoding(accept_encodings) -> Optional[str]:
+    """
+    Pick the content encoding for a response.
+
+    Args:
+        accept_encodings: werkzeug Accept object (request.accept_encodings).
+
+    Returns:
+        "br", "gzip" or None.
+    """
+    if BROTLI_AVAILABLE and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _strip_encoding_suffix(tag: str) -> str:
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)]
+    return tag
+
+
+def etag_matches(if_none_match, etag: Optional[str]) -> bool:
+    """
+    Weak comparison of If-None-Match against an (uncompressed) ETag.
+
+    Args:
+        if_none_match: werkzeug ETags object (request.if_none_match).
+        etag: Unquoted ETag of the resource.
+    """
+    if not etag or not if_none_match:
+        return False
+    if if_none_match.star_tag:
+        return True
+    tags = if_none_match.as_set(include_weak=True)
+    return any(_strip_encoding_suffix(tag) == etag for tag in tags)
+
+
+def _is_compressible(response) -> bool:
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def make_conditional(response, request, add_etag: bool = False):
+    """
+    Answer with 304 if the client already has the current representation.
+
+    Args:
+        response: Flask response of a GET/HEAD request.
+        request: The current request.
+        add_etag: Compute a strong content hash ETag if none is set.
+
+    Returns:
+        The (possibly converted) response.
+    """
+    if (
+        request.method not in ("GET", "HEAD")
+        or response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+    ):
+        return response
+
+    etag, _ = response.get_etag()
+    if etag is None:
+        if not add_etag:
+            return response
+        response.add_etag()
+        etag, _ = response.get_etag()
+    if "Cache-Control" not in response.headers:
+        response.headers["Cache-Control"] = "no-cache"
+
+    if etag_matches(request.if_none_match, etag):
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.remove("Content-Length")
+    return response
+
+
+def compress_response(response, request, min_size: int = COMPRESS_MIN_SIZE):
+    """
+    Compress a response body in place if the client accepts it.
+
+    Streamed, file and already encoded responses are left untouched.
+    """
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or not _is_compressible(response)
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
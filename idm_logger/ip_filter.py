@@ -0,0 +1,186 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+IP whitelist/blacklist matching for the network security check.
+
+The configured CIDR blocks are compiled into one binary prefix trie per
+address family, which is only rebuilt when the lists change. A lookup walks
+at most 32 (IPv4) or 128 (IPv6) bits, independent of the number of blocks.
+Decisions are kept in a fixed-capacity LRU cache, so scanners hitting the
+instance from thousands of addresses cannot grow memory without bound.
+"""
+
+import ipaddress
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_TTL = 300  # seconds
+
+# Trie node layout: [child for bit 0, child for bit 1, label or None]
+_LABEL = 2
+
+# IPv4-mapped IPv6 addresses (::ffff:a.b.c.d) are matched as IPv4
+_IPV4_MAPPED = ipaddress.IPv6Network("::ffff:0:0/96")
+
+
+class PrefixTrie:
+    """Longest-prefix matcher for IPv4 and IPv6 networks."""
+
+    def __init__(self):
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, network, label: Optional[str] = None):
+        """Add a network (ip_network or CIDR string) with an optional label."""
+        if not isinstance(network, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            network = ipaddress.ip_network(network, strict=False)
+        if label is None:
+            label = str(network)
+        if network.version == 6 and network.subnet_of(_IPV4_MAPPED):
+            # ::ffff:a.b.c.d/n is stored as a.b.c.d/(n-96)
+            network = ipaddress.IPv4Network(
+                (int(network.network_address) & 0xFFFFFFFF, network.prefixlen - 96)
+            )
+        elif network.version == 6 and network.supernet_of(_IPV4_MAPPED):
+            # Also covers every mapped client, which is looked up as IPv4
+            self._add(ipaddress.IPv4Network("0.0.0.0/0"), label)
+        if self._add(network, label):
+            self._size += 1
+
+    def _add(self, network, label: str) -> bool:
+        """Store a label at the network's node; True if the node was empty."""
+        bits = network.max_prefixlen
+        value = int(network.network_address)
+        node = self._roots[network.version]
+        for i in range(network.prefixlen):
+            bit = (value >> (bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        added = node[_LABEL] is None
+        node[_LABEL] = label
+        return added
+
+    def match(self, ip) -> Optional[str]:
+        """
+        Find the most specific network containing an address.
+
+        Args:
+            ip: ipaddress.IPv4Address or IPv6Address.
+
+        Returns:
+            Label of the longest matching prefix, or None.
+        """
+        mapped = getattr(ip, "ipv4_mapped", None)
+        if mapped is not None:
+            ip = mapped
+        bits = ip.max_prefixlen
+        value = int(ip)
+        node = self._roots[ip.version]
+        found = node[_LABEL]
+        for i in range(bits):
+            node = node[(value >> (bits - 1 - i)) & 1]
+            if node is None:
+                break
+            if node[_LABEL] is not None:
+                found = node[_LABEL]
+        return found
+
+    @classmethod
+    def build(cls, blocks: Iterable[str], kind: str = "network") -> "PrefixTrie":
+        """Compile CIDR strings, skipping (and logging) invalid entries."""
+        trie = cls()
+        for block in blocks or ():
+            try:
+                trie.insert(block, label=str(block))
+            except (ValueError, TypeError):
+                logger.error(f"Invalid {kind} entry: {block}")
+        return trie
+
+
+class IPAccessFilter:
+    """Decides whether a client IP may access the web interface."""
+
+    def __init__(
+        self, cache_size: int = DEFAULT_CACHE_SIZE, cache_ttl: float = DEFAULT_CACHE_TTL
+    ):
+        self._lock = threading.Lock()
+        self._whitelist_ref = None
+        self._blacklist_ref = None
+        self._whitelist = PrefixTrie()
+        self._blacklist = PrefixTrie()
+        self._whitelist_active = False
+        self._rebuilds = 0
+        self.cache = LRUCache(cache_size, cache_ttl)
+
+    def _compile(self, whitelist, blacklist):
+        """Rebuild the tries if the configured lists were replaced."""
+        if whitelist is self._whitelist_ref and blacklist is self._blacklist_ref:
+            return
+        with self._lock:
+            if whitelist is not self._whitelist_ref:
+                self._whitelist = PrefixTrie.build(whitelist, "whitelist")
+                self._whitelist_active = bool(whitelist)
+                self._whitelist_ref = whitelist
+            if blacklist is not self._blacklist_ref:
+                self._blacklist = PrefixTrie.build(blacklist, "blacklist")
+                self._blacklist_ref = blacklist
+            self._rebuilds += 1
+            # Cached decisions were made against the old lists
+            self.cache.clear()
+
+    def is_allowed(self, client_ip: str, whitelist, blacklist) -> bool:
+        """
+        Check a client IP against the blacklist and (if set) the whitelist.
+
+        Args:
+            client_ip: Remote address as string.
+            whitelist: Configured whitelist (list of CIDR strings).
+            blacklist: Configured blacklist (list of CIDR strings).
+
+        Returns:
+            True if the request may proceed.
+        """
+        self._compile(whitelist, blacklist)
+
+        allowed = self.cache.get(client_ip)
+        if allowed is not None:
+            return allowed
+
+        allowed = self._decide(client_ip)
+        self.cache.put(client_ip, allowed)
+        return allowed
+
+    def _decide(self, client_ip: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(client_ip)
+        except ValueError:
+            logger.warning(f"Invalid client IP: {client_ip}")
+            return False
+
+        block = self._blacklist.match(ip)
+        if block is not None:
+            logger.warning(f"Blocked IP {client_ip} (matched blacklist {block})")
+            return False
+
+        if self._whitelist_active and self._whitelist.match(ip) is None:
+            logger.warning(f"Blocked IP {client_ip} (not in whitelist)")
+            return False
+        return True
+
+    def get_stats(self) -> Dict:
+        return {
+            "whitelist_networks": len(self._whitelist),
+            "blacklist_networks": len(self._blacklist),
+            "rebuilds": self._rebuilds,
+            "cache": self.cache.stats(),
+        }
@@ -0,0 +1,205 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+In-process last-value store.
+
+Holds the most recent value of every heat pump metric and the ML service
+status. The Modbus poll loop and the ML service push into it, so
+/api/metrics/current and /api/ai/status are answered from memory instead
+of querying VictoriaMetrics on every request. Metrics nobody pushes (e.g.
+ML scores without INTERNAL_API_KEY) are merged in from VictoriaMetrics at
+most every ``EXTERNAL_REFRESH`` seconds.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Same naming as the metrics writer: measurement "idm_heatpump" + "_" + field
+METRIC_PREFIX = "idm_heatpump_"
+
+# A pushed ML status is trusted this long before falling back to VictoriaMetrics
+AI_PUSH_TTL = 300
+# Seconds between merges of VictoriaMetrics values into the store
+EXTERNAL_REFRESH = 30
+
+AI_METRICS = frozenset({"idm_anomaly_score_value", "idm_anomaly_flag_value"})
+
+
+def _default_ai_status() -> Dict:
+    return {
+        "service": "ml-service (River/HST)",
+        "online": False,
+        "score": 0.0,
+        "is_anomaly": False,
+        "last_update": None,
+        "error": None,
+    }
+
+
+class LastValueStore:
+    """Thread-safe store of the latest value per metric plus the AI status."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict] = {}
+        self._ai_status = _default_ai_status()
+        self._ai_pushed_at = 0.0
+        # Metrics written by the poll loop; VictoriaMetrics values are older
+        self._owned = set()
+        self._external_at = 0.0
+        self._version = 0
+        self._last_modified: Optional[float] = None
+        # Distinguishes ETags across restarts, where versions start over
+        self._instance = uuid.uuid4().hex[:8]
+
+    def _touch(self, timestamp: float):
+        self._version += 1
+        self._last_modified = timestamp
+
+    def update_sensors(self, data: Dict, timestamp: Optional[float] = None):
+        """Store a Modbus reading (sensor name -> value) under its metric name."""
+        timestamp = timestamp or time.time()
+        with self._lock:
+            changed = False
+            for key, value in data.items():
+                if key.endswith("_str"):
+                    continue
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{METRIC_PREFIX}{key}"
+                self._metrics[name] = {
+                    "value": float(value),
+                    "timestamp": timestamp,
+                }
+                self._owned.add(name)
+                changed = True
+            if changed:
+                self._touch(timestamp)
+
+    def merge_external(self, metrics: Dict[str, Dict]) -> int:
+        """
+        Merge values read from VictoriaMetrics.
+
+        Metrics pushed into the store (poll loop sensors, ML scores while
+        the push is fresh) are newer there and kept.
+
+        Returns:
+            Number of metrics added or changed.
+        """
+        with self._lock:
+            ai_pushed = self._ai_push_is_fresh()
+            changed = 0
+            for name, entry in metrics.items():
+                if name in self._owned or (ai_pushed and name in AI_METRICS):
+                    continue
+                if self._metrics.get(name) != entry:
+                    self._metrics[name] = entry
+                    changed += 1
+            if changed:
+                self._touch(time.time())
+            return changed
+
+    def polled(self) -> bool:
+        """True once the poll loop has pushed sensor values."""
+        with self._lock:
+            return bool(self._owned)
+
+    def external_refresh_due(self) -> bool:
+        """
+        True at most once per ``EXTERNAL_REFRESH`` seconds; the caller then
+        reads VictoriaMetrics and calls ``merge_external``.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._external_at and now - self._external_at < EXTERNAL_REFRESH:
+                return False
+            self._external_at = now
+            return True
+
+    def metric_names(self) -> List[str]:
+        """Names of all metrics currently held."""
+        with self._lock:
+            return list(self._metrics)
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not self._metrics
+
+    def snapshot(self) -> Tuple[Dict[str, Dict], str, Optional[float]]:
+        """Return (metrics, etag, last_modified) as one consistent view."""
+        with self._lock:
+            metrics = {name: dict(entry) for name, entry in self._metrics.items()}
+            return metrics, self._etag(), self._last_modified
+
+    def validators(self) -> Tuple[str, Optional[float]]:
+        """Return (etag, last_modified) without copying the values."""
+        with self._lock:
+            return self._etag(), self._last_modified
+
+    def _etag(self) -> str:
+        return f"{self._instance}-{self._version}"
+
+    def push_ai_status(
+        self,
+        score: float,
+        is_anomaly: bool,
+        timestamp: Optional[float] = None,
+        mode: Optional[str] = None,
+    ):
+        """Record a score pushed by the ML service."""
+        timestamp = timestamp or time.time()
+        with self._lock:
+            self._ai_status.update(
+                {
+                    "online": True,
+                    "score": float(score),
+                    "is_anomaly": bool(is_anomaly),
+                    "last_update": timestamp,
+                    "error": None,
+                }
+            )
+            if mode:
+                self._ai_status["mode"] = mode
+            self._ai_pushed_at = time.monotonic()
+            self._metrics["idm_anomaly_score_value"] = {
+                "value": float(score),
+                "timestamp": timestamp,
+            }
+            self._metrics["idm_anomaly_flag_value"] = {
+                "value": 1.0 if is_anomaly else 0.0,
+                "timestamp": timestamp,
+            }
+            self._touch(timestamp)
+
+    def ai_push_is_fresh(self) -> bool:
+        with self._lock:
+            return self._ai_push_is_fresh()
+
+    def _ai_push_is_fresh(self) -> bool:
+        return (
+            self._ai_pushed_at > 0
+            and time.monotonic() - self._ai_pushed_at < AI_PUSH_TTL
+        )
+
+    def set_ai_status(self, status: Dict):
+        """Replace the AI status with one derived from VictoriaMetrics."""
+        with self._lock:
+            self._ai_status.update(status)
+
+    def set_ai_offline(self):
+        with self._lock:
+            self._ai_status["online"] = False
+
+    def get_ai_status(self) -> Dict:
+        with self._lock:
+            return dict(self._ai_status)
+
+
+live_state = LastValueStore()
@@ -6,10 +6,12 @@ import threading
 import signal
 import sys
 from .config import config
+from .db import db
 from .modbus import ModbusClient
 from .metrics import MetricsWriter
-from .web import run_web, update_current_data, set_metrics_writer
+from .web import run_web, update_current_data, set_metrics_writer, sharing_manager
 from .scheduler import Scheduler
+from .sse import stream_broker
 from .log_handler import memory_handler
 from .mqtt import mqtt_publisher
 from .update_manager import (
@@ -19,6 +21,7 @@ from .update_manager import (
     is_update_allowed,
 )
 from .alerts import alert_manager
+from .notifications import notification_manager
 from .backup import backup_manager
 from .telemetry import telemetry_manager
 
@@ -216,15 +219,23 @@ def main():
     # Note: If scheduler is None (because modbus failed), telemetry will run in manual-only mode.
     telemetry_manager.start(scheduler)
 
+    # Notification workers (restores the outbox) and provider connections
+    try:
+        notification_manager.start()
+    except Exception as e:
+        logger.error(f"Failed to start notifications: {e}", exc_info=True)
+
     logger.info("Entering main loop...")
+    # Current settings (can be changed via web UI), re-read only after changes
+    interval_setting = config.accessor("logging.interval", 60)
+    realtime_setting = config.accessor("logging.realtime_mode", False)
 
     try:
         while not stop_event.is_set():
             start_time = time.time()
 
-            # Get current settings (can be changed via web UI)
-            interval = config.get("logging.interval", 60)
-            realtime_mode = config.get("logging.realtime_mode", False)
+            interval = interval_setting()
+            realtime_mode = realtime_setting()
 
             # In realtime mode, use minimum interval (1 second)
             effective_interval = 1 if realtime_mode else interval
@@ -270,12 +281,22 @@ def main():
     except Exception as e:
         logger.error(f"Main loop error: {e}")
     finally:
+        # End open SSE streams so their worker threads are released
+        stream_broker.close()
         if scheduler and config.get("web.write_enabled"):
             scheduler.stop()
         if mqtt:
             mqtt.stop()
         if modbus:
             modbus.close()
+        # Send alerts still waiting in the digest window, undelivered
+        # notifications stay in the outbox for the next start
+        alert_manager.digest.flush()
+        notification_manager.close()
+        sharing_manager.flush()
+        config.flush()
+        # Commits queued writes and folds the WAL back into the database file
+        db.close()
         logger.info("Stopped")
 
 
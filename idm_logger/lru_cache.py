@@ -0,0 +1,76 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Small thread-safe LRU cache with a fixed capacity and TTL.
+
+Used wherever per-key results are cached for clients that can produce an
+unbounded number of keys (client IPs, expressions, query ranges), so memory
+stays bounded. Hit/miss/eviction counters are kept for the stats endpoints.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a fixed capacity, TTL and hit statistics.
+
+    Entries never expire if ttl is None.
+    """
+
+    def __init__(self, capacity: int, ttl: Optional[float] = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, now: Optional[float] = None):
+        """Return the cached value, or None if missing or expired."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, stored_at = item
+            if self.ttl is not None and now - stored_at >= self.ttl:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value, now: Optional[float] = None):
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._data[key] = (value, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "capacity": self.capacity,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,257 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+In-memory catalogue of the available metrics.
+
+Built from the sensor registry (common sensors plus the configured heating
+circuits and zones) and the metric names written by the ML service, so
+/api/metrics/available no longer runs an expensive VictoriaMetrics
+``/api/v1/series`` lookup on every page load. Every entry carries the unit,
+category and writable flag from ``sensor_addresses.py``.
+
+Names that only exist in the database (e.g. a circuit that was removed from
+the config) are merged in from optional name sources, which are polled in
+the background. The grouped response is pre-serialized and versioned with
+an ETag, so serving it is O(1).
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import config
+from .sensor_addresses import (
+    BINARY_SENSOR_ADDRESSES,
+    COMMON_SENSORS,
+    HeatingCircuit,
+    SensorFeatures,
+    heating_circuit_sensors,
+    zone_sensors,
+)
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "idm_heatpump_"
+
+# Fields written by the ML service (measurement + "_" + field)
+ML_METRICS = {
+    "idm_anomaly_score_value": None,
+    "idm_anomaly_flag_value": None,
+    "idm_ml_features_count_value": None,
+    "idm_ml_processing_time_ms_value": "ms",
+    "idm_ml_model_updates_value": None,
+}
+
+# Response groups in display order; the frontend relies on these keys
+CATEGORIES = (
+    "temperature",
+    "power",
+    "pressure",
+    "energy",
+    "flow",
+    "status",
+    "mode",
+    "control",
+    "state",
+    "ai",
+    "other",
+)
+
+_PREFIX_CATEGORIES = (
+    ("temp_", "temperature"),
+    ("power_", "power"),
+    ("pressure_", "pressure"),
+    ("energy_", "energy"),
+    ("flow_", "flow"),
+    ("status_", "status"),
+    ("mode_", "mode"),
+    ("control_", "control"),
+    ("state_", "state"),
+)
+
+# Seconds between background refreshes
+REFRESH_INTERVAL = 300
+
+
+def classify(name: str) -> Tuple[str, str]:
+    """
+    Category and display name of a metric.
+
+    Returns:
+        Tuple of (category, display name).
+    """
+    if name.startswith(("idm_anomaly_", "idm_ml_")):
+        return "ai", name
+    display = name.replace(METRIC_PREFIX, "", 1)
+    for prefix, category in _PREFIX_CATEGORIES:
+        if display.startswith(prefix):
+            return category, display
+    return "other", display
+
+
+def _entry(name: str, unit: Optional[str] = None, **extra) -> Dict:
+    category, display = classify(name)
+    entry = {"name": name, "display": display, "category": category, "unit": unit}
+    entry.update(extra)
+    return entry
+
+
+def _configured_sensors() -> List:
+    """Sensors polled with the current config (same selection as modbus.py)."""
+    sensors = list(COMMON_SENSORS)
+    for c_name in config.get("idm.circuits", []) or []:
+        try:
+            sensors.extend(heating_circuit_sensors(HeatingCircuit[c_name.upper()]))
+        except (KeyError, AttributeError):
+            logger.debug(f"Skipping invalid heating circuit in catalogue: {c_name}")
+    for zone_id in config.get("idm.zones", []) or []:
+        try:
+            sensors.extend(zone_sensors(int(zone_id)))
+        except Exception:
+            logger.debug(f"Skipping invalid zone in catalogue: {zone_id}")
+    sensors.extend(BINARY_SENSOR_ADDRESSES.values())
+    return sensors
+
+
+def registry_entries() -> Dict[str, Dict]:
+    """Catalogue entries for all registry sensors and ML metrics."""
+    entries = {}
+    for sensor in _configured_sensors():
+        if not sensor.read_supported:
+            continue
+        name = f"{METRIC_PREFIX}{sensor.name}"
+        entries[name] = _entry(
+            name,
+            sensor.unit,
+            writable=sensor.supported_features != SensorFeatures.NONE,
+            datatype=sensor.datatype,
+        )
+    for name, unit in ML_METRICS.items():
+        entries[name] = _entry(name, unit, writable=False, datatype="float")
+    return entries
+
+
+class MetricCatalog:
+    """Versioned, lazily refreshed catalogue of metric names."""
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._sources: List[Callable[[], Iterable[str]]] = []
+        self._entries: Dict[str, Dict] = {}
+        self._body: Optional[bytes] = None
+        self._version = 0
+        self._built_at = 0.0
+        # Distinguishes ETags across restarts, where versions start over
+        self._instance = uuid.uuid4().hex[:8]
+
+    def add_source(self, source: Callable[[], Iterable[str]]):
+        """Register a callable returning metric names seen elsewhere."""
+        self._sources.append(source)
+
+    def _collect_source_names(self) -> set:
+        names = set()
+        for source in self._sources:
+            try:
+                names.update(source() or ())
+            except Exception as e:
+                logger.debug(f"Metric name source {source!r} failed: {e}")
+        return names
+
+    def _publish(self, entries: Dict[str, Dict]) -> bool:
+        """Swap in new entries; bumps the version only if something changed."""
+        with self._lock:
+            self._built_at = time.monotonic()
+            if entries == self._entries and self._body is not None:
+                return False
+            grouped = {category: [] for category in CATEGORIES}
+            for name in sorted(entries):
+                entry = entries[name]
+                grouped[entry["category"]].append(entry)
+            self._entries = entries
+            self._body = json.dumps(grouped).encode("utf-8")
+            self._version += 1
+            return True
+
+    def rebuild(self, include_sources: bool = True) -> bool:
+        """
+        Rebuild the catalogue from the registry and the name sources.
+
+        Returns:
+            True if the catalogue changed.
+        """
+        with self._refresh_lock:
+            entries = registry_entries()
+            if include_sources:
+                for name in self._collect_source_names():
+                    if name not in entries and not name.endswith("_str"):
+                        entries[name] = _entry(name, writable=False)
+            changed = self._publish(entries)
+        if changed:
+            logger.debug(f"Metric catalogue rebuilt: {len(entries)} metrics")
+        return changed
+
+    def observe(self, names: Iterable[str]) -> int:
+        """
+        Add metric names that are not in the catalogue yet.
+
+        Returns:
+            Number of names added.
+        """
+        with self._lock:
+            new = [n for n in names if n not in self._entries]
+            if not new:
+                return 0
+            entries = dict(self._entries)
+        for name in new:
+            entries[name] = _entry(name, writable=False)
+        self._publish(entries)
+        return len(new)
+
+    def _refresh_in_background(self):
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(
+            target=self.rebuild, name="metric-catalog-refresh", daemon=True
+        ).start()
+
+    def _ensure_fresh(self):
+        if self._body is None:
+            # First request: registry only, sources are merged in the background
+            self.rebuild(include_sources=False)
+            self._refresh_in_background()
+        elif time.monotonic() - self._built_at >= self.refresh_interval:
+            self._built_at = time.monotonic()
+            self._refresh_in_background()
+
+    def get(self) -> Tuple[bytes, str]:
+        """Return the serialized grouped catalogue and its ETag."""
+        self._ensure_fresh()
+        with self._lock:
+            return self._body, self._etag()
+
+    def etag(self) -> str:
+        self._ensure_fresh()
+        with self._lock:
+            return self._etag()
+
+    def entries(self) -> Dict[str, Dict]:
+        """Copy of all entries keyed by metric name."""
+        self._ensure_fresh()
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._entries.items()}
+
+    def _etag(self) -> str:
+        return f"{self._instance}-{self._version}"
+
+    def invalidate(self):
+        """Force a rebuild on the next access (e.g. after a config change)."""
+        with self._lock:
+            self._built_at = 0.0
+
+
+metric_catalog = MetricCatalog()
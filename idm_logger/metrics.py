@@ -21,6 +21,12 @@ class MetricsWriter:
         self._connected = True  # HTTP is stateless
         self.session = requests.Session()
 
+        # Tags of every line, rebuilt when the installation settings change
+        self._update_tags(config.snapshot)
+        config.subscribe(
+            ("installation_id", "hp_model", "hp_manufacturer"), self._update_tags
+        )
+
         # Async queue for metrics to avoid blocking main loop
         self.queue = queue.Queue(maxsize=1000)
         self.stop_event = threading.Event()
@@ -102,6 +108,14 @@ class MetricsWriter:
             return "unknown"
         return str(value).replace(" ", "\\ ").replace(",", "\\,").replace("=", "\\=")
 
+    def _update_tags(self, snapshot):
+        inst_id = self._escape_tag(snapshot.get("installation_id"))
+        model = self._escape_tag(snapshot.get("hp_model"))
+        manufacturer = self._escape_tag(snapshot.get("hp_manufacturer", "IDM"))
+        self._tags = (
+            f",installation_id={inst_id},model={model},manufacturer={manufacturer}"
+        )
+
     def _send_data(self, data: Union[Dict, List[Dict]]) -> bool:
         """Internal method to send data to VictoriaMetrics (executed in worker thread)."""
         # data can be a single dict (legacy call) or a list of dicts (batch)
@@ -109,12 +123,7 @@ class MetricsWriter:
         items = data if isinstance(data, list) else [data]
         lines = []
 
-        # Prepare tags from config
-        inst_id = self._escape_tag(config.get("installation_id"))
-        model = self._escape_tag(config.get("hp_model"))
-        manufacturer = self._escape_tag(config.get("hp_manufacturer", "IDM"))
-
-        tags = f",installation_id={inst_id},model={model},manufacturer={manufacturer}"
+        tags = self._tags
 
         for measurements in items:
             measurement_name = "idm_heatpump"
@@ -2,7 +2,9 @@
 # SPDX-License-Identifier: MIT
 import logging
 from typing import List
-from .base import NotificationProvider
+from ..db import db
+from .base import DeliveryUnknownError, NotificationProvider, PermanentDeliveryError
+from .dispatcher import NotificationDispatcher
 from .signal import SignalProvider
 from .telegram import TelegramProvider
 from .discord import DiscordProvider
@@ -19,18 +21,60 @@ class NotificationManager:
             DiscordProvider(),
             EmailProvider(),
         ]
+        self.dispatcher = NotificationDispatcher(self.providers, outbox=db)
 
     def send_all(self, message: str, **kwargs):
-        """Send message via all enabled providers."""
+        """
+        Queue message for all enabled providers.
+
+        Returns immediately; delivery (with retries) happens in the
+        dispatcher's worker threads.
+        """
+        try:
+            self.dispatcher.enqueue(message, **kwargs)
+        except Exception as e:
+            logger.error(f"Failed to queue notification, sending directly: {e}")
+            self.send_now(message, **kwargs)
+
+    def send_now(self, message: str, **kwargs):
+        """Send message via all enabled providers, blocking until done."""
         for provider in self.providers:
+            if not provider.enabled:
+                continue
             # We catch exceptions here to ensure one failure doesn't stop others
             try:
                 provider.send(message, **kwargs)
+            except PermanentDeliveryError as e:
+                logger.error(f"{provider.name} notification not sent: {e}")
+            except DeliveryUnknownError as e:
+                logger.warning(f"{provider.name} notification may not be sent: {e}")
             except Exception as e:
                 # Log unexpected exceptions that weren't caught by providers
                 logger.error(
                     f"Unexpected error in {provider.name} provider: {e}", exc_info=True
                 )
 
+    def start(self):
+        """Start delivery workers and open long-lived provider connections."""
+        self.dispatcher.start()
+        for provider in self.providers:
+            if provider.enabled:
+                try:
+                    provider.warm_up()
+                except Exception as e:
+                    logger.warning(f"Could not prepare {provider.name} provider: {e}")
+
+    def close(self):
+        """Stop delivery and close provider connections (shutdown)."""
+        self.dispatcher.stop()
+        for provider in self.providers:
+            try:
+                provider.close()
+            except Exception as e:
+                logger.error(f"Failed to close {provider.name} provider: {e}")
+
+    def get_stats(self):
+        return self.dispatcher.get_stats()
+
 
 notification_manager = NotificationManager()
@@ -2,16 +2,45 @@
 # SPDX-License-Identifier: MIT
 from abc import ABC, abstractmethod
 import logging
+import requests
+from requests.adapters import HTTPAdapter
+from ..config import config
 
 logger = logging.getLogger(__name__)
 
 
+def pooled_session(pool_size: int = 2) -> requests.Session:
+    """HTTP session that keeps connections (and TLS sessions) alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class PermanentDeliveryError(Exception):
+    """Sending cannot succeed on a retry (disabled or not configured)."""
+
+
+class DeliveryUnknownError(Exception):
+    """The message may have been delivered; sending again risks a duplicate."""
+
+
 class NotificationProvider(ABC):
     """Abstract base class for notification providers."""
 
     @abstractmethod
     def send(self, message: str, **kwargs) -> bool:
-        """Send a message."""
+        """
+        Send a message.
+
+        Returns:
+            True if sent, False on a failure worth retrying.
+
+        Raises:
+            PermanentDeliveryError: Retrying cannot help.
+            DeliveryUnknownError: Timed out after sending, must not be retried.
+        """
         pass
 
     @property
@@ -19,3 +48,14 @@ class NotificationProvider(ABC):
     def name(self) -> str:
         """Return the name of the provider."""
         pass
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the provider is switched on in the configuration."""
+        return bool(config.get(f"{self.name}.enabled", False))
+
+    def warm_up(self):
+        """Open long-lived connections ahead of the first message."""
+
+    def close(self):
+        """Release long-lived connections (called on shutdown)."""
@@ -1,30 +1,33 @@
 # Xerolux 2026
 # SPDX-License-Identifier: MIT
 import logging
-import requests
-from .base import NotificationProvider
+from .base import NotificationProvider, PermanentDeliveryError, pooled_session
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
 
 class DiscordProvider(NotificationProvider):
+    def __init__(self):
+        self.session = pooled_session()
+
     @property
     def name(self) -> str:
         return "discord"
 
     def send(self, message: str, **kwargs) -> bool:
         if not config.get("discord.enabled", False):
-            return False
+            raise PermanentDeliveryError("Discord is disabled")
 
         webhook_url = config.get("discord.webhook_url")
 
         if not webhook_url:
-            logger.error("Discord webhook_url not configured")
-            return False
+            raise PermanentDeliveryError("Discord webhook_url not configured")
 
         try:
-            response = requests.post(webhook_url, json={"content": message}, timeout=10)
+            response = self.session.post(
+                webhook_url, json={"content": message}, timeout=10
+            )
             if not response.ok:
                 logger.error(f"Discord Webhook error: {response.text}")
                 return False
@@ -32,3 +35,6 @@ class DiscordProvider(NotificationProvider):
         except Exception as e:
             logger.error(f"Failed to send Discord message: {e}")
             return False
+
+    def close(self):
+        self.session.close()
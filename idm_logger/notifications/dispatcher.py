@@ -0,0 +1,380 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Asynchronous delivery of notifications.
+
+Sending is slow and can hang: signal-cli is a subprocess with a 30 s
+timeout, email opens an SMTP connection with STARTTLS. Callers (the poll
+loop, HTTP requests) therefore only enqueue; a worker per provider delivers.
+
+- One queue per provider, so a stuck provider does not delay the others.
+- Failed deliveries are retried with exponential backoff and jitter;
+  permanent failures (provider disabled or not configured) are dropped
+  right away, and so are sends whose outcome is unknown (a timeout after
+  the message was handed over), since a retry could deliver it twice.
+- Every pending notification is stored in the SQLite outbox first and only
+  removed after delivery, so nothing is lost on a restart.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from .base import DeliveryUnknownError, PermanentDeliveryError
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 5.0  # seconds before the first retry
+BACKOFF_MAX = 900.0
+LATENCY_SAMPLES = 200
+
+
+def backoff_delay(attempts: int) -> float:
+    """Delay before the next attempt after ``attempts`` failures (with jitter)."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class Delivery:
+    """One notification for one provider."""
+
+    __slots__ = ("id", "message", "options", "created", "attempts", "next_attempt")
+
+    def __init__(
+        self,
+        message: str,
+        options: Dict,
+        created: float,
+        entry_id: Optional[int] = None,
+        attempts: int = 0,
+        next_attempt: Optional[float] = None,
+    ):
+        self.id = entry_id
+        self.message = message
+        self.options = options
+        self.created = created
+        self.attempts = attempts
+        self.next_attempt = created if next_attempt is None else next_attempt
+
+
+class ProviderStats:
+    """Delivery counters and latency figures for one provider."""
+
+    __slots__ = (
+        "sent",
+        "retries",
+        "failed",
+        "unknown",
+        "latencies",
+        "send_ms",
+        "last_error",
+    )
+
+    def __init__(self):
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+        # Timed out after sending, possibly delivered; not retried
+        self.unknown = 0
+        # Enqueue -> delivered, including queueing and retries (seconds)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        # Duration of the provider call itself (milliseconds)
+        self.send_ms = deque(maxlen=LATENCY_SAMPLES)
+        self.last_error = None
+
+    def to_dict(self) -> Dict:
+        latencies = sorted(self.latencies)
+        send_ms = list(self.send_ms)
+        return {
+            "sent": self.sent,
+            "retries": self.retries,
+            "failed": self.failed,
+            "unknown": self.unknown,
+            "latency_avg_s": (
+                round(sum(latencies) / len(latencies), 3) if latencies else 0
+            ),
+            "latency_p95_s": (
+                round(latencies[int(len(latencies) * 0.95) - 1], 3) if latencies else 0
+            ),
+            "latency_max_s": round(latencies[-1], 3) if latencies else 0,
+            "send_avg_ms": round(sum(send_ms) / len(send_ms), 2) if send_ms else 0,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderQueue:
+    """Deliveries of one provider, ordered by their next attempt."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.stats = ProviderStats()
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def put(self, delivery: Delivery):
+        with self._cond:
+            heapq.heappush(
+                self._heap, (delivery.next_attempt, next(self._seq), delivery)
+            )
+            self._cond.notify()
+
+    def get(self, stop: threading.Event) -> Optional[Delivery]:
+        """Block until a delivery is due, or return None when stopping."""
+        with self._cond:
+            while not stop.is_set():
+                if self._heap:
+                    wait = self._heap[0][0] - time.time()
+                    if wait <= 0:
+                        self.in_flight += 1
+                        return heapq.heappop(self._heap)[2]
+                    self._cond.wait(min(wait, 1.0))
+                else:
+                    self._cond.wait(1.0)
+            return None
+
+    def done(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            self._heap = []
+
+    def idle(self) -> bool:
+        return not self._heap and not self.in_flight
+
+
+class NotificationDispatcher:
+    """Queues notifications per provider and delivers them in the background."""
+
+    def __init__(self, providers, outbox=None, workers_per_provider: int = 1):
+        """
+        Args:
+            providers: NotificationProvider instances.
+            outbox: Persistent store (the Database), None keeps memory only.
+            workers_per_provider: Delivery threads per provider queue.
+        """
+        self.outbox = outbox
+        self.workers_per_provider = max(1, workers_per_provider)
+        self.queues: Dict[str, ProviderQueue] = {
+            p.name: ProviderQueue(p) for p in providers
+        }
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self):
+        """Restore the outbox and start the workers (idempotent)."""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            self._restore()
+            for name, queue in self.queues.items():
+                for i in range(self.workers_per_provider):
+                    thread = threading.Thread(
+                        target=self._run,
+                        args=(queue,),
+                        name=f"notify-{name}-{i}",
+                        daemon=True,
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers; undelivered notifications stay in the outbox."""
+        with self._start_lock:
+            self._stop.set()
+            for queue in self.queues.values():
+                queue.wake()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+            # The outbox has them, start() restores them again
+            for queue in self.queues.values():
+                queue.clear()
+
+    def _restore(self):
+        if self.outbox is None:
+            return
+        restored = 0
+        for row in self.outbox.get_outbox_entries():
+            queue = self.queues.get(row["provider"])
+            if queue is None:
+                logger.warning(
+                    f"Dropping queued notification for unknown provider {row['provider']}"
+                )
+                self.outbox.delete_outbox_entry(row["id"])
+                continue
+            queue.put(
+                Delivery(
+                    row["message"],
+                    json.loads(row["options"] or "{}"),
+                    row["created"],
+                    entry_id=row["id"],
+                    attempts=row["attempts"] or 0,
+                    next_attempt=row["next_attempt"],
+                )
+            )
+            restored += 1
+        if restored:
+            logger.info(f"Restored {restored} queued notifications from the outbox")
+
+    def enqueue(self, message: str, **options) -> int:
+        """
+        Queue a message for every enabled provider.
+
+        Returns:
+            Number of providers the message was queued for.
+        """
+        self.start()
+        queues = [q for q in self.queues.values() if q.provider.enabled]
+        if not queues:
+            return 0
+
+        created = time.time()
+        ids = [None] * len(queues)
+        if self.outbox is not None:
+            try:
+                ids = self.outbox.add_outbox_entries(
+                    [
+                        (q.provider.name, message, json.dumps(options), created)
+                        for q in queues
+                    ]
+                )
+            except Exception as e:
+                # Still deliver, just without restart safety
+                logger.error(f"Notification outbox unavailable: {e}")
+
+        for queue, entry_id in zip(queues, ids):
+            queue.put(Delivery(message, options, created, entry_id=entry_id))
+        return len(queues)
+
+    def _run(self, queue: ProviderQueue):
+        while not self._stop.is_set():
+            delivery = queue.get(self._stop)
+            if delivery is None:
+                continue
+            try:
+                self._deliver(queue, delivery)
+            except Exception as e:
+                logger.error(
+                    f"Notification worker error ({queue.provider.name}): {e}",
+                    exc_info=True,
+                )
+            finally:
+                queue.done()
+
+    def _forget(self, delivery: Delivery):
+        if self.outbox is not None and delivery.id is not None:
+            self.outbox.delete_outbox_entry(delivery.id)
+
+    def _deliver(self, queue: ProviderQueue, delivery: Delivery):
+        provider = queue.provider
+        stats = queue.stats
+        if not provider.enabled:
+            # Disabled after queueing
+            self._forget(delivery)
+            return
+
+        started = time.time()
+        error = None
+        try:
+            ok = provider.send(delivery.message, **delivery.options)
+            if not ok:
+                error = "provider reported failure"
+        except PermanentDeliveryError as e:
+            # Retrying cannot help, do not keep it in the outbox
+            logger.error(f"Dropping {provider.name} notification: {e}")
+            self._forget(delivery)
+            stats.failed += 1
+            stats.last_error = str(e)
+            return
+        except DeliveryUnknownError as e:
+            logger.warning(
+                f"{provider.name} notification may not have been delivered, "
+                f"not retrying to avoid a duplicate: {e}"
+            )
+            self._forget(delivery)
+            stats.unknown += 1
+            stats.last_error = str(e)
+            return
+        except Exception as e:
+            ok = False
+            error = str(e)
+        finished = time.time()
+        stats.send_ms.append((finished - started) * 1000)
+
+        if ok:
+            self._forget(delivery)
+            stats.sent += 1
+            stats.latencies.append(finished - delivery.created)
+            return
+
+        delivery.attempts += 1
+        stats.last_error = error
+        if delivery.attempts >= MAX_ATTEMPTS:
+            logger.error(
+                f"Giving up {provider.name} notification after "
+                f"{delivery.attempts} attempts: {error}"
+            )
+            self._forget(delivery)
+            stats.failed += 1
+            return
+
+        delivery.next_attempt = finished + backoff_delay(delivery.attempts)
+        if self.outbox is not None and delivery.id is not None:
+            self.outbox.update_outbox_entry(
+                delivery.id, delivery.attempts, delivery.next_attempt, error
+            )
+        stats.retries += 1
+        logger.warning(
+            f"{provider.name} notification failed ({error}), retry "
+            f"{delivery.attempts}/{MAX_ATTEMPTS - 1} in "
+            f"{delivery.next_attempt - finished:.0f}s"
+        )
+        queue.put(delivery)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until all queued notifications are delivered or given up."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if all(q.idle() for q in self.queues.values()):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "providers": {
+                name: {
+                    "enabled": q.provider.enabled,
+                    "queued": len(q),
+                    "in_flight": q.in_flight,
+                    **q.stats.to_dict(),
+                }
+                for name, q in self.queues.items()
+            },
+        }
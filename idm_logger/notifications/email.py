@@ -2,22 +2,123 @@
 # SPDX-License-Identifier: MIT
 import logging
 import smtplib
+import threading
+import time
+from typing import Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from .base import NotificationProvider
+from .base import NotificationProvider, PermanentDeliveryError
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+SMTP_TIMEOUT = 30  # seconds per SMTP command
+# Most servers drop idle clients after 1-5 minutes
+SMTP_IDLE_TIMEOUT = 60
+
+
+class SMTPConnection:
+    """
+    Authenticated SMTP connection that stays open between messages.
+
+    Reused while it is younger than the idle timeout and answers NOOP;
+    closed by a timer after ``idle_timeout`` seconds without messages.
+    """
+
+    def __init__(self, idle_timeout: float = SMTP_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._server: Optional[smtplib.SMTP] = None
+        self._settings = None
+        self._last_used = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        self.connects = 0
+
+    def _connect(self, settings):
+        host, port, username, password = settings
+        server = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT)
+        try:
+            server.starttls()
+            if username and password:
+                server.login(username, password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self._settings = settings
+        self.connects += 1
+
+    def _usable(self, settings) -> bool:
+        if self._server is None or self._settings != settings:
+            return False
+        if time.monotonic() - self._last_used > self.idle_timeout:
+            return False
+        try:
+            return self._server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def send_message(self, msg, settings):
+        """
+        Send over the open connection, reconnecting if needed.
+
+        Args:
+            msg: The email message.
+            settings: (host, port, username, password); a change reconnects.
+        """
+        with self._lock:
+            if not self._usable(settings):
+                self.close()
+                self._connect(settings)
+            try:
+                self._server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Dropped between NOOP and send, one more try
+                self.close()
+                self._connect(settings)
+                self._server.send_message(msg)
+            self._last_used = time.monotonic()
+            self._schedule_close()
+
+    def _schedule_close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _close_if_idle(self):
+        with self._lock:
+            if time.monotonic() - self._last_used >= self.idle_timeout:
+                self.close()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            server, self._server = self._server, None
+            if server is None:
+                return
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
 
 class EmailProvider(NotificationProvider):
+    def __init__(self):
+        self.connection = SMTPConnection()
+
     @property
     def name(self) -> str:
         return "email"
 
     def send(self, message: str, **kwargs) -> bool:
         if not config.get("email.enabled", False):
-            return False
+            raise PermanentDeliveryError("Email is disabled")
 
         smtp_server = config.get("email.smtp_server")
         smtp_port = config.get("email.smtp_port", 587)
@@ -27,8 +128,9 @@ class EmailProvider(NotificationProvider):
         recipients = config.get("email.recipients")
 
         if not smtp_server or not recipients:
-            logger.error("Email SMTP server or recipients not configured")
-            return False
+            raise PermanentDeliveryError(
+                "Email SMTP server or recipients not configured"
+            )
 
         if isinstance(recipients, str):
             recipients = [x.strip() for x in recipients.split(",") if x.strip()]
@@ -40,12 +142,14 @@ class EmailProvider(NotificationProvider):
             msg["Subject"] = kwargs.get("subject", "IDM Metrics Notification")
             msg.attach(MIMEText(message, "plain"))
 
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                if username and password:
-                    server.login(username, password)
-                server.send_message(msg)
+            self.connection.send_message(
+                msg, (smtp_server, smtp_port, username, password)
+            )
             return True
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
+            self.connection.close()
             return False
+
+    def close(self):
+        self.connection.close()
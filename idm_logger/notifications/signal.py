@@ -1,14 +1,219 @@
 # Xerolux 2026
 # SPDX-License-Identifier: MIT
+"""
+Signal notifications via signal-cli.
+
+signal-cli is a JVM application; starting it for every message costs
+several seconds of CPU. Instead, one long-running ``signal-cli jsonRpc``
+process is kept per account and messages are sent as JSON-RPC requests over
+its stdin/stdout. If the daemon cannot be used, a one-shot ``signal-cli
+send`` is the fallback.
+"""
+
+import itertools
+import json
 import logging
 import subprocess
-from typing import Iterable, List
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, Iterable, List, Optional
 from shutil import which
-from .base import NotificationProvider
+from .base import (
+    DeliveryUnknownError,
+    NotificationProvider,
+    PermanentDeliveryError,
+)
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+SEND_TIMEOUT = 30  # seconds
+
+
+class SignalDaemonError(Exception):
+    """The daemon process is not usable (not started or exited)."""
+
+
+class SignalDaemon:
+    """A ``signal-cli jsonRpc`` process for one account."""
+
+    def __init__(self, cli_path: str, account: str):
+        self.cli_path = cli_path
+        self.account = account
+        self._process: Optional[subprocess.Popen] = None
+        # Requests waiting for the current process; each process has its own
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.starts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        command = [
+            self.cli_path,
+            "-a",
+            self.account,
+            "jsonRpc",
+            # Only send; incoming messages are not processed here
+            "--receive-mode",
+            "manual",
+        ]
+        logger.info(f"Starting signal-cli JSON-RPC daemon for {self.account[:5]}...")
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._pending = {}
+        self.starts += 1
+        threading.Thread(
+            target=self._read,
+            args=(self._process, self._pending),
+            name="signal-cli",
+            daemon=True,
+        ).start()
+
+    def _read(self, process: subprocess.Popen, pending: Dict[int, Future]):
+        """Resolve the requests sent to ``process`` from its responses."""
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            future = pending.pop(response.get("id"), None)
+            if future is None:
+                continue  # Notification (e.g. incoming message)
+            if "error" in response:
+                message = response["error"].get("message", "signal-cli error")
+                future.set_exception(RuntimeError(message))
+            else:
+                future.set_result(response.get("result"))
+
+        # Process ended, fail everything still waiting for it (requests to
+        # a restarted process are in another map)
+        for request_id in list(pending):
+            future = pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_exception(SignalDaemonError("signal-cli daemon exited"))
+
+    def ensure_started(self):
+        with self._lock:
+            if not self.alive:
+                self._start()
+
+    def call(self, method: str, params: Dict, timeout: float = SEND_TIMEOUT):
+        """Send a JSON-RPC request and wait for its result."""
+        with self._lock:
+            if not self.alive:
+                self._start()
+            request_id = next(self._ids)
+            future = Future()
+            pending = self._pending
+            pending[request_id] = future
+            request = {
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params,
+                "id": request_id,
+            }
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+            except OSError:
+                pending.pop(request_id, None)
+                raise
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            pending.pop(request_id, None)
+            # Presumably hung, the next call starts a fresh process
+            logger.error("signal-cli daemon did not answer, restarting it")
+            with self._lock:
+                if self._process is not None:
+                    self._process.kill()
+            raise
+
+    def send(self, message: str, recipients: List[str], timeout: float = SEND_TIMEOUT):
+        return self.call(
+            "send", {"recipient": recipients, "message": message}, timeout=timeout
+        )
+
+    def close(self):
+        with self._lock:
+            process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except Exception:
+            process.kill()
+
+
+_daemons: Dict[tuple, SignalDaemon] = {}
+_daemons_lock = threading.Lock()
+
+
+def get_signal_daemon(cli_path: str, account: str) -> SignalDaemon:
+    """Shared daemon for an account; a changed configuration gets a new one."""
+    key = (cli_path, account)
+    with _daemons_lock:
+        daemon = _daemons.get(key)
+        if daemon is None:
+            for stale in _daemons.values():
+                stale.close()
+            _daemons.clear()
+            daemon = _daemons[key] = SignalDaemon(cli_path, account)
+        return daemon
+
+
+def close_signal_daemons():
+    with _daemons_lock:
+        for daemon in _daemons.values():
+            daemon.close()
+        _daemons.clear()
+
+
+def send_via_signal_cli(
+    cli_path: str, sender: str, recipients: List[str], message: str
+):
+    """
+    Send a message, through the JSON-RPC daemon if enabled.
+
+    Raises:
+        RuntimeError: If signal-cli reports an error.
+        DeliveryUnknownError: signal-cli did not answer in time and may
+            still deliver the message.
+    """
+    if config.get("signal.daemon", True):
+        try:
+            get_signal_daemon(cli_path, sender).send(message, recipients)
+            return
+        except RuntimeError:
+            # signal-cli answered with an error, a single send would fail alike
+            raise
+        except FutureTimeout:
+            raise DeliveryUnknownError("signal-cli daemon did not answer in time")
+        except Exception as e:
+            logger.warning(f"signal-cli daemon unavailable, using single send: {e}")
+
+    command = [cli_path, "-u", sender, "send", "-m", message] + recipients
+    try:
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=SEND_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        raise DeliveryUnknownError("signal-cli did not finish in time")
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or "Signal CLI Fehler")
+
 
 class SignalProvider(NotificationProvider):
     @property
@@ -26,28 +231,35 @@ class SignalProvider(NotificationProvider):
 
     def send(self, message: str, **kwargs) -> bool:
         if not config.get("signal.enabled", False):
-            return False
+            raise PermanentDeliveryError("Signal is disabled")
 
         cli_path = config.get("signal.cli_path", "signal-cli")
         if not which(cli_path):
-            logger.error(f"Signal CLI not found at {cli_path}")
-            return False
+            raise PermanentDeliveryError(f"Signal CLI not found at {cli_path}")
 
         sender = config.get("signal.sender", "")
         recipients = self._normalize_recipients(config.get("signal.recipients", []))
 
         if not sender or not recipients:
-            logger.error("Signal sender or recipients not configured")
-            return False
+            raise PermanentDeliveryError("Signal sender or recipients not configured")
 
         try:
-            command = [cli_path, "-u", sender, "send", "-m", message] + recipients
             logger.debug(f"Sending Signal message to {', '.join(recipients)}")
-            result = subprocess.run(command, capture_output=True, text=True, timeout=30)
-            if result.returncode != 0:
-                logger.error(f"Signal CLI error: {result.stderr.strip()}")
-                return False
+            send_via_signal_cli(cli_path, sender, recipients, message)
             return True
+        except DeliveryUnknownError:
+            # Let the dispatcher know not to send it again
+            raise
         except Exception as e:
             logger.error(f"Failed to send Signal message: {e}")
             return False
+
+    def warm_up(self):
+        # The JVM takes seconds to start, do it before the first alert
+        cli_path = config.get("signal.cli_path", "signal-cli")
+        sender = config.get("signal.sender", "")
+        if config.get("signal.daemon", True) and sender and which(cli_path):
+            get_signal_daemon(cli_path, sender).ensure_started()
+
+    def close(self):
+        close_signal_daemons()
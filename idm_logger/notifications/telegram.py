@@ -1,28 +1,29 @@
 # Xerolux 2026
 # SPDX-License-Identifier: MIT
 import logging
-import requests
-from .base import NotificationProvider
+from .base import NotificationProvider, PermanentDeliveryError, pooled_session
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
 
 class TelegramProvider(NotificationProvider):
+    def __init__(self):
+        self.session = pooled_session()
+
     @property
     def name(self) -> str:
         return "telegram"
 
     def send(self, message: str, **kwargs) -> bool:
         if not config.get("telegram.enabled", False):
-            return False
+            raise PermanentDeliveryError("Telegram is disabled")
 
         token = config.get("telegram.bot_token")
         chat_ids = config.get("telegram.chat_ids")
 
         if not token or not chat_ids:
-            logger.error("Telegram token or chat_ids not configured")
-            return False
+            raise PermanentDeliveryError("Telegram token or chat_ids not configured")
 
         if isinstance(chat_ids, str):
             chat_ids = [x.strip() for x in chat_ids.split(",") if x.strip()]
@@ -32,7 +33,7 @@ class TelegramProvider(NotificationProvider):
 
         for chat_id in chat_ids:
             try:
-                response = requests.post(
+                response = self.session.post(
                     url, json={"chat_id": chat_id, "text": message}, timeout=10
                 )
                 if not response.ok:
@@ -43,3 +44,6 @@ class TelegramProvider(NotificationProvider):
                 success = False
 
         return success
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,150 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Selection of the web server implementation.
+
+The server is chosen with the ``WEB_SERVER`` environment variable:
+
+- ``werkzeug``: Flask-SocketIO development server (threading, WebSockets).
+- ``waitress``: Waitress thread pool, no WebSockets.
+- ``gevent``: gevent WSGI server with WebSockets. The whole process is
+  monkey patched, so VictoriaMetrics/Modbus/HTTP I/O yields to other
+  requests instead of blocking a worker thread.
+
+Without ``WEB_SERVER`` the previous behaviour is kept: Werkzeug when
+WebSockets are enabled, Waitress otherwise.
+
+gevent must patch the standard library before anything else imports it,
+which is why ``apply_monkey_patch()`` runs in ``python -m idm_logger``
+before the application is imported, and only depends on the environment,
+not on the stored config.
+
+Every open SSE stream (``/api/stream``) holds a worker thread on the threaded
+servers. Without gevent the number of streams is therefore capped at
+``WEB_THREADS`` (default 8) minus ``RESERVED_API_THREADS`` (4), so e.g.
+four kiosk displays can stream while the UI and API stay responsive. Raise
+``WEB_THREADS`` for more displays; ``web.sse_max_clients`` is the upper
+limit in every mode.
+
+gevent is opt-in: the SQLite writer thread, export work, signal-cli
+subprocesses and Modbus I/O rely on real threads and have not all been
+checked under gevent yet.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+WERKZEUG = "werkzeug"
+WAITRESS = "waitress"
+GEVENT = "gevent"
+SERVER_MODES = (WERKZEUG, WAITRESS, GEVENT)
+
+# Greenlets handling concurrent requests in gevent mode
+GEVENT_POOL_SIZE = int(os.environ.get("WEB_GEVENT_POOL_SIZE", "1000"))
+# Worker threads of the Waitress server
+WAITRESS_THREADS = int(os.environ.get("WEB_THREADS", "8"))
+# Worker threads kept free for the UI and API while SSE streams are open
+RESERVED_API_THREADS = 4
+
+_patched = False
+
+
+def requested_mode():
+    """Server mode from WEB_SERVER, or None if unset or invalid."""
+    mode = os.environ.get("WEB_SERVER", "").strip().lower()
+    if not mode:
+        return None
+    if mode not in SERVER_MODES:
+        logger.warning(
+            f"Unknown WEB_SERVER '{mode}', expected one of {', '.join(SERVER_MODES)}"
+        )
+        return None
+    return mode
+
+
+def apply_monkey_patch():
+    """
+    Monkey patch the standard library for gevent mode.
+
+    Returns:
+        True if gevent is active.
+    """
+    global _patched
+    if _patched:
+        return True
+    if requested_mode() != GEVENT:
+        return False
+    try:
+        from gevent import monkey
+    except ImportError:
+        logger.error("WEB_SERVER=gevent requires the 'gevent' package")
+        return False
+    monkey.patch_all()
+    _patched = True
+    return True
+
+
+def gevent_active():
+    """True if the process runs on gevent (patched before imports)."""
+    if _patched:
+        return True
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
+
+def socketio_async_mode():
+    """async_mode for Flask-SocketIO matching the server that will run."""
+    return "gevent" if gevent_active() else "threading"
+
+
+def max_stream_clients(configured: int) -> int:
+    """
+    Concurrent SSE streams the running server can afford.
+
+    Args:
+        configured: web.sse_max_clients.
+
+    Returns:
+        ``configured`` under gevent, otherwise at most the worker threads
+        not reserved for API requests (at least one).
+    """
+    if gevent_active():
+        return configured
+    return min(configured, max(1, WAITRESS_THREADS - RESERVED_API_THREADS))
+
+
+def serve_gevent(app, host, port):
+    """Serve a WSGI app (incl. Flask-SocketIO) on gevent's pywsgi server."""
+    import socket
+
+    from gevent import pywsgi
+    from gevent.pool import Pool
+
+    server = pywsgi.WSGIServer(
+        (host, port), app, spawn=Pool(GEVENT_POOL_SIZE), log=None
+    )
+    server.init_socket()
+    # pywsgi may write headers and body separately; without TCP_NODELAY
+    # keep-alive responses stall ~40 ms on Nagle + delayed ACK.
+    # Accepted sockets inherit the option from the listener.
+    server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    server.serve_forever()
+
+
+def resolve_mode(websocket_enabled):
+    """Server mode to start, falling back when gevent is not available."""
+    mode = requested_mode()
+    if mode == GEVENT and not gevent_active():
+        logger.warning(
+            "gevent server requested but the process is not monkey patched, "
+            "falling back to the threaded server"
+        )
+        mode = None
+    if mode is None:
+        mode = WERKZEUG if websocket_enabled else WAITRESS
+    return mode
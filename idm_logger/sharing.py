@@ -4,16 +4,27 @@ Dashboard Sharing Module
 
 Provides functionality for creating shareable links to dashboards
 with optional authentication and view-only mode.
+
+Tokens are stored in the configuration and only written when one is
+created or deleted. Views of a shared dashboard are counted in memory and
+written to the ``share_access`` table in one batch every
+``ACCESS_FLUSH_INTERVAL`` seconds, so a popular link does not rewrite the
+config on every page load.
 """
 
 import secrets
 import logging
+import threading
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from .db import db
+
 logger = logging.getLogger(__name__)
 
+ACCESS_FLUSH_INTERVAL = 60.0  # seconds
+
 
 class ShareToken:
     """Represents a share token for a dashboard."""
@@ -85,15 +96,24 @@ class ShareToken:
 class SharingManager:
     """Manager for dashboard share tokens."""
 
-    def __init__(self, config):
+    def __init__(
+        self, config, database=None, flush_interval: float = ACCESS_FLUSH_INTERVAL
+    ):
         """
         Initialize the sharing manager.
 
         Args:
             config: Configuration object
+            database: Store for access counters (default: the shared Database)
+            flush_interval: Seconds between access counter writes
         """
         self.config = config
+        self.db = database or db
+        self.flush_interval = flush_interval
         self.tokens: Dict[str, ShareToken] = {}
+        self._lock = threading.Lock()
+        self._dirty = set()  # token ids with unsaved access counters
+        self._timer: Optional[threading.Timer] = None
         self._load_tokens()
 
     def _load_tokens(self):
@@ -118,6 +138,16 @@ class SharingManager:
                     token.password_hash = token_data["password_hash"]
                 self.tokens[token.token_id] = token
 
+            counters = self.db.get_share_access()
+            for token in self.tokens.values():
+                counter = counters.get(token.token_id)
+                if counter is not None:
+                    token.access_count = counter["access_count"]
+                    token.last_accessed = counter["last_accessed"]
+                elif token.access_count:
+                    # Counted before counters had their own table
+                    self._dirty.add(token.token_id)
+
             logger.info(f"Loaded {len(self.tokens)} share tokens")
         except Exception as e:
             logger.error(f"Failed to load share tokens: {e}")
@@ -131,6 +161,9 @@ class SharingManager:
 
             for token in self.tokens.values():
                 token_data = token.to_dict()
+                # Access counters live in the database
+                del token_data["access_count"]
+                del token_data["last_accessed"]
                 # Include password hash for persistence
                 if token.password_hash:
                     token_data["password_hash"] = token.password_hash
@@ -237,10 +270,38 @@ class SharingManager:
             token_id: Token ID
         """
         token = self.tokens.get(token_id)
-        if token:
+        if not token:
+            return
+        with self._lock:
             token.access_count += 1
             token.last_accessed = int(datetime.now().timestamp())
-            self._save_tokens()
+            self._dirty.add(token_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write pending access counters in one batch."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty, self._dirty = self._dirty, set()
+            counters = [
+                (token.token_id, token.access_count, token.last_accessed)
+                for token in map(self.tokens.get, dirty)
+                if token is not None
+            ]
+        if not counters:
+            return
+        try:
+            self.db.save_share_access(counters)
+            logger.debug(f"Saved access counters of {len(counters)} share tokens")
+        except Exception as e:
+            logger.error(f"Failed to save share access counters: {e}")
+            with self._lock:
+                self._dirty.update(token_id for token_id, _, _ in counters)
 
     def delete_token(self, token_id: str) -> bool:
         """
@@ -254,7 +315,9 @@ class SharingManager:
         """
         if token_id in self.tokens:
             del self.tokens[token_id]
+            self._dirty.discard(token_id)
             self._save_tokens()
+            self.db.delete_share_access([token_id])
             logger.info(f"Deleted share token {token_id}")
             return True
         return False
@@ -292,9 +355,11 @@ class SharingManager:
 
         for token_id in expired_tokens:
             del self.tokens[token_id]
+            self._dirty.discard(token_id)
 
         if expired_tokens:
             self._save_tokens()
+            self.db.delete_share_access(expired_tokens)
             logger.info(f"Cleaned up {len(expired_tokens)} expired tokens")
 
         return len(expired_tokens)
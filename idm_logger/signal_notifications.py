@@ -2,12 +2,12 @@
 # SPDX-License-Identifier: MIT
 import logging
 import re
-import subprocess
 import shutil
 import os
 from typing import Iterable, List
 
 from .config import config
+from .notifications.signal import send_via_signal_cli
 
 logger = logging.getLogger(__name__)
 
@@ -82,8 +82,5 @@ def send_signal_message(message: str) -> None:
                 f"Signal CLI Befehl '{cli_path}' nicht im PATH gefunden."
             )
 
-    command = [cli_path, "-u", sender, "send", "-m", message] + recipients
     logger.info(f"Sending Signal message to {len(recipients)} recipient(s)")
-    result = subprocess.run(command, capture_output=True, text=True, timeout=30)
-    if result.returncode != 0:
-        raise RuntimeError(result.stderr.strip() or "Signal CLI Fehler")
+    send_via_signal_cli(cli_path, sender, recipients, message)
@@ -0,0 +1,219 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Server-Sent Events stream of current sensor values.
+
+A one-way alternative to Socket.IO for kiosk displays and scripts: a plain
+long-lived HTTP response that works through proxies and needs no client
+library (``new EventSource('/api/stream')``).
+
+The broker is fed from the same per-cycle fan-out as the WebSocket clients
+and keeps a short history of deltas with sequence numbers. A stream starts
+with a full ``snapshot`` event and then only sends ``delta`` events with the
+changed values. After a reconnect the browser sends ``Last-Event-ID``; if
+that sequence is still in the history, the missed deltas are merged into one
+event, otherwise a fresh snapshot is sent.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "idm_heatpump_"
+
+HISTORY_SIZE = 600  # deltas kept for Last-Event-ID resume
+HEARTBEAT_INTERVAL = 15.0  # seconds, keeps proxies from closing idle streams
+RETRY_MS = 3000  # reconnect delay suggested to the browser
+
+
+def _sensor_name(metric: str) -> str:
+    if metric.startswith(METRIC_PREFIX):
+        return metric[len(METRIC_PREFIX) :]
+    return metric
+
+
+def parse_metric_filter(value: Optional[str]) -> Optional[frozenset]:
+    """
+    Parse the ``metrics`` query parameter (comma-separated).
+
+    Returns:
+        Set of sensor names, or None for all metrics.
+    """
+    if not value:
+        return None
+    names = {_sensor_name(m.strip()) for m in value.split(",") if m.strip()}
+    return frozenset(names) or None
+
+
+def format_event(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _select(values: Dict, metrics: Optional[frozenset]) -> Dict:
+    if metrics is None:
+        return dict(values)
+    return {k: v for k, v in values.items() if k in metrics}
+
+
+class StreamBroker:
+    """Sequenced delta history with blocking waits for stream generators."""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._timestamp = 0
+        self._events = deque(maxlen=history_size)  # (seq, timestamp, delta)
+        self._state: Dict[str, object] = {}
+        self._clients = 0
+        self._published = 0
+        self._resumed = 0
+        self._closed = False
+
+    def publish(self, timestamp: int, delta: Dict):
+        """Record one cycle's changed values (sensor name -> value)."""
+        if not delta:
+            return
+        with self._cond:
+            self._seq += 1
+            self._timestamp = timestamp
+            self._events.append((self._seq, timestamp, delta))
+            self._state.update(delta)
+            self._published += 1
+            self._cond.notify_all()
+
+    def close(self):
+        """Wake up and end all streams (shutdown)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def clients(self) -> int:
+        return self._clients
+
+    def acquire(self, limit: int) -> bool:
+        """Take a client slot if fewer than ``limit`` are open."""
+        with self._cond:
+            if self._clients >= limit:
+                return False
+            self._clients += 1
+            return True
+
+    def release(self):
+        """Give back a slot taken with acquire()."""
+        with self._cond:
+            self._clients -= 1
+
+    def _snapshot(self, metrics: Optional[frozenset]):
+        return self._seq, self._timestamp, _select(self._state, metrics)
+
+    def _since(self, seq: int, metrics: Optional[frozenset]):
+        """
+        Merged deltas after ``seq``.
+
+        Returns:
+            (last_seq, timestamp, values), or None if ``seq`` is older than
+            the history (the caller then needs a snapshot).
+        """
+        if seq == self._seq:
+            return seq, self._timestamp, {}
+        if seq > self._seq or not self._events or seq < self._events[0][0] - 1:
+            return None
+        merged = {}
+        for event_seq, _, delta in self._events:
+            if event_seq > seq:
+                merged.update(_select(delta, metrics))
+        return self._seq, self._timestamp, merged
+
+    def stream(
+        self,
+        metrics: Optional[Iterable[str]] = None,
+        interval: float = 0.0,
+        last_event_id: Optional[int] = None,
+        heartbeat: float = HEARTBEAT_INTERVAL,
+    ) -> Iterator[str]:
+        """
+        Generate the SSE body for one client.
+
+        Args:
+            metrics: Sensor names to include (None = all).
+            interval: Minimum seconds between events (changes are merged).
+            last_event_id: Sequence number from the Last-Event-ID header.
+            heartbeat: Seconds between keep-alive comments when idle.
+        """
+        metrics = frozenset(metrics) if metrics is not None else None
+        with self._cond:
+            resumed = (
+                self._since(last_event_id, metrics)
+                if last_event_id is not None
+                else None
+            )
+            if resumed is None:
+                seq, timestamp, values = self._snapshot(metrics)
+                event = "snapshot"
+            else:
+                self._resumed += 1
+                seq, timestamp, values = resumed
+                event = "delta"
+
+        yield f"retry: {RETRY_MS}\n\n"
+        if event == "snapshot" or values:
+            yield format_event(event, {"timestamp": timestamp, "metrics": values}, seq)
+        last_sent = time.monotonic()
+
+        while True:
+            with self._cond:
+                if self._seq == seq and not self._closed:
+                    self._cond.wait(heartbeat)
+                if self._closed:
+                    return
+                update = self._since(seq, metrics)
+                if update is None:
+                    # Fell behind the history, start over
+                    event = "snapshot"
+                    update = self._snapshot(metrics)
+                else:
+                    event = "delta"
+
+            if update[0] == seq:
+                yield ": keepalive\n\n"
+                continue
+
+            wait = interval - (time.monotonic() - last_sent)
+            if wait > 0:
+                # Rate limit: sleep and merge everything up to then
+                time.sleep(wait)
+                with self._cond:
+                    later = self._since(seq, metrics)
+                    if later is not None and event == "delta":
+                        update = later
+
+            seq, timestamp, values = update
+            if values or event == "snapshot":
+                yield format_event(
+                    event, {"timestamp": timestamp, "metrics": values}, seq
+                )
+                last_sent = time.monotonic()
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                "clients": self._clients,
+                "sequence": self._seq,
+                "history": len(self._events),
+                "published": self._published,
+                "resumed": self._resumed,
+            }
+
+
+stream_broker = StreamBroker()
@@ -13,6 +13,7 @@ from cryptography.fernet import Fernet
 from datetime import datetime
 from .config import config
 from .update_manager import get_current_version
+from .vm_client import get_vm_client
 
 logger = logging.getLogger(__name__)
 
@@ -173,9 +174,9 @@ class TelemetryManager:
             return False
 
         # 1. Fetch data from VictoriaMetrics
-        metrics_url = config.get("metrics.url", "http://victoriametrics:8428/write")
-        base_url = metrics_url.replace("/write", "").replace("/api/v1/write", "")
-        query_url = f"{base_url}/api/v1/export"
+        vm = get_vm_client(
+            config.get("metrics.url", "http://victoriametrics:8428/write")
+        )
 
         # Time range
         end_ts = int(time.time())
@@ -190,8 +191,8 @@ class TelemetryManager:
 
         # Note: export API returns JSON stream (one object per line)
         try:
-            logger.debug(f"Querying metrics from {query_url}")
-            response = requests.get(query_url, params=params, stream=True, timeout=60)
+            logger.debug(f"Querying metrics from {vm.base_url}/api/v1/export")
+            response = vm.get("/api/v1/export", params=params, stream=True, timeout=60)
 
             if response.status_code != 200:
                 logger.error(f"Failed to query metrics: {response.status_code}")
@@ -12,10 +12,11 @@ Types:
 """
 
 from typing import List, Dict, Optional, Any
-import requests
 import logging
 import re
 
+from .vm_client import get_vm_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -92,10 +93,7 @@ class Variable:
         try:
             # Query for unique label values
             # This is a simplified version - in production you'd use proper PromQL label_values query
-            query_url = f"{metrics_url}/api/v1/query"
-            params = {"query": self.query}
-
-            response = requests.get(query_url, params=params, timeout=10)
+            response = get_vm_client(metrics_url).query(self.query)
             response.raise_for_status()
 
             data = response.json()
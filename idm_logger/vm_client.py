@@ -0,0 +1,342 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Shared HTTP client for VictoriaMetrics.
+
+All reads and admin calls against VictoriaMetrics go through one pooled
+``requests.Session`` per base URL, so dashboard requests reuse keep-alive
+connections instead of paying a TCP/HTTP handshake each time.
+
+The client adds consistent timeouts, retries with jittered exponential
+backoff for transient failures of idempotent requests, a circuit breaker that fails fast while
+VictoriaMetrics is unreachable and per-endpoint latency/error statistics.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = "http://victoriametrics:8428"
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+BACKOFF_BASE = 0.2
+BACKOFF_MAX = 2.0
+POOL_SIZE = 10
+
+# Status codes that indicate a transient server-side problem worth retrying
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+# Only these are retried by default: a POST (e.g. /write) that timed out may
+# have been applied, sending it again would duplicate samples
+RETRY_METHODS = frozenset({"GET", "HEAD"})
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of contacting VictoriaMetrics while the circuit is open."""
+
+
+def normalize_base_url(url: Optional[str]) -> str:
+    """Strip write endpoints and trailing slashes from a configured metrics URL."""
+    url = (url or DEFAULT_URL).strip().rstrip("/")
+    for suffix in ("/api/v1/write", "/write"):
+        if url.endswith(suffix):
+            url = url[: -len(suffix)]
+            break
+    return url.rstrip("/")
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately. Once ``reset_timeout`` seconds have passed a
+    single trial call is let through (half-open); its outcome closes or
+    re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: only one trial request at a time
+            if self._trial_in_flight:
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("VictoriaMetrics reachable again, closing circuit")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"VictoriaMetrics circuit opened after {self._failures} "
+                        f"failures, failing fast for {self.reset_timeout:.0f}s"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def to_dict(self) -> Dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures}
+
+
+class EndpointStats:
+    """Request counters and latency figures for one endpoint path."""
+
+    __slots__ = ("requests", "errors", "retries", "total_ms", "max_ms", "last_error")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_error = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.requests, 2) if self.requests else 0,
+            "max_ms": round(self.max_ms, 2),
+            "last_error": self.last_error,
+        }
+
+
+class VMClient:
+    """Pooled, retrying client for a single VictoriaMetrics instance."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        pool_size: int = POOL_SIZE,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = normalize_base_url(base_url)
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stats: Dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _record(self, path: str, elapsed_ms: float, error=None, retries: int = 0):
+        with self._stats_lock:
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = EndpointStats()
+            stats.requests += 1
+            stats.retries += retries
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = str(error)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2**attempt)))
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request to VictoriaMetrics.
+
+        Connection errors, timeouts and 502/503/504 responses of GET/HEAD
+        requests are retried with jittered backoff; other methods only if
+        ``retries`` is passed. HTTP error responses other than those are
+        returned to the caller unchanged.
+
+        Raises:
+            CircuitOpenError: VictoriaMetrics is considered down.
+            requests.RequestException: All attempts failed.
+        """
+        if not self.breaker.allow_request():
+            self._record(path, 0.0, error="circuit open")
+            raise CircuitOpenError(
+                f"VictoriaMetrics at {self.base_url} is unavailable (circuit open)"
+            )
+
+        if retries is None:
+            retries = self.retries if method.upper() in RETRY_METHODS else 0
+        attempts = 1 + retries
+        timeout = self.timeout if timeout is None else timeout
+        url = self.url(path)
+        start = time.perf_counter()
+        last_exc = None
+        response = None
+
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(self._backoff(attempt - 1))
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_exc = e
+                response = None
+                continue
+            except Exception as e:
+                # Not retried, but counted so a half-open trial is released
+                self.breaker.record_failure()
+                self._record(
+                    path,
+                    (time.perf_counter() - start) * 1000,
+                    error=e,
+                    retries=attempt,
+                )
+                raise
+            if response.status_code in RETRY_STATUS_CODES and attempt < attempts - 1:
+                response.close()
+                continue
+            break
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        retried = attempt
+
+        if response is None:
+            self.breaker.record_failure()
+            self._record(path, elapsed_ms, error=last_exc, retries=retried)
+            raise last_exc
+
+        if response.status_code in RETRY_STATUS_CODES:
+            self.breaker.record_failure()
+            self._record(
+                path, elapsed_ms, error=f"HTTP {response.status_code}", retries=retried
+            )
+        else:
+            self.breaker.record_success()
+            error = (
+                f"HTTP {response.status_code}" if response.status_code >= 400 else None
+            )
+            self._record(path, elapsed_ms, error=error, retries=retried)
+        return response
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def query(self, query: str, **kwargs) -> requests.Response:
+        """Instant query via /api/v1/query."""
+        params = {"query": query, **kwargs.pop("params", {})}
+        return self.get("/api/v1/query", params=params, **kwargs)
+
+    def query_range(self, query: str, start, end, step, **kwargs) -> requests.Response:
+        """Range query via /api/v1/query_range."""
+        params = {"query": query, "start": start, "end": end, "step": step}
+        params.update(kwargs.pop("params", {}))
+        return self.get("/api/v1/query_range", params=params, **kwargs)
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            endpoints = {path: s.to_dict() for path, s in self._stats.items()}
+        return {
+            "base_url": self.base_url,
+            "circuit": self.breaker.to_dict(),
+            "endpoints": endpoints,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_clients: Dict[str, VMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_vm_client(url: Optional[str] = None) -> VMClient:
+    """
+    Return the shared client for a metrics URL, creating it on first use.
+
+    Write URLs such as ``http://host:8428/write`` map to the same client as
+    their base URL, so a changed configuration transparently gets a new pool.
+    """
+    base_url = normalize_base_url(url)
+    client = _clients.get(base_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(base_url)
+            if client is None:
+                client = _clients[base_url] = VMClient(base_url)
+    return client
+
+
+def get_all_stats() -> Dict:
+    """Statistics of every client created in this process."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.base_url: client.get_stats() for client in clients}
@@ -8,6 +8,7 @@ from flask import (
     abort,
     send_from_directory,
     send_file,
+    stream_with_context,
 )
 from flask_socketio import SocketIO
 from waitress import serve
@@ -18,6 +19,7 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 from .technician_auth import calculate_codes
 from .config import config
+from .db import db
 from .sensor_addresses import SensorFeatures
 from .const import HEAT_PUMP_MODELS, HEAT_PUMP_MANUFACTURERS
 from .log_handler import memory_handler
@@ -35,11 +37,43 @@ from .update_manager import (
     check_docker_updates,
 )
 from .alerts import alert_manager
+from .alert_rules import AGGREGATES as ALERT_AGGREGATES
+from .alert_digest import SEVERITIES as ALERT_SEVERITIES
 from .dashboard_config import dashboard_manager
 from .templates import get_alert_templates
 from .annotations import AnnotationManager
 from .variables import VariableManager
-from .expression_parser import ExpressionParser
+from .expression_parser import ExpressionParser, snap_to_step
+from .export import ColumnarExporter, COLUMNAR_FORMATS, parse_step
+from .vm_client import get_vm_client, get_all_stats as get_vm_client_stats
+from .live_state import live_state
+from .history_buffer import history_buffer
+from .sse import parse_metric_filter, stream_broker
+from .ip_filter import IPAccessFilter
+from .lru_cache import LRUCache
+from .http_cache import (
+    COMPRESS_MIN_SIZE,
+    compress_response,
+    etag_matches,
+    make_conditional,
+)
+from .metric_catalog import metric_catalog
+from .server_mode import (
+    GEVENT,
+    WAITRESS_THREADS,
+    WERKZEUG,
+    max_stream_clients,
+    resolve_mode,
+    serve_gevent,
+    socketio_async_mode,
+)
+from .downsample import (
+    METHODS as DOWNSAMPLE_METHODS,
+    DEFAULT_METHOD as DEFAULT_DOWNSAMPLE_METHOD,
+    downsample_matrix,
+    downsample_values,
+    parse_max_points,
+)
 from .websocket_handler import websocket_handler
 from .sharing import SharingManager
 from .telemetry import telemetry_manager
@@ -56,8 +90,10 @@ import time
 import re
 import pandas as pd
 import io
-from datetime import datetime
+import tempfile
+from datetime import datetime, timezone
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -159,7 +195,7 @@ if _cors_origins == "*":
 socketio = SocketIO(
     app,
     cors_allowed_origins=_cors_origins,
-    async_mode="threading",
+    async_mode=socketio_async_mode(),
     logger=False,
     engineio_logger=False,
     ping_timeout=60,
@@ -181,6 +217,10 @@ app.config["SWAGGER"] = {
 swagger = Swagger(app)
 
 # Rate Limiter Configuration
+# RATELIMIT_ENABLED=false disables limits, e.g. for scripts/load_test.py runs
+app.config["RATELIMIT_ENABLED"] = os.environ.get(
+    "RATELIMIT_ENABLED", "true"
+).lower() not in ("false", "0", "no")
 limiter = Limiter(
     get_remote_address,
     app=app,
@@ -199,6 +239,8 @@ expression_parser = ExpressionParser()
 
 # WebSocket Handler
 websocket_handler.init_app(app, socketio)
+# SSE streams share the per-cycle change detection of the WebSocket fan-out
+websocket_handler.add_listener(stream_broker.publish)
 
 # Sharing Manager
 sharing_manager = SharingManager(config)
@@ -210,48 +252,48 @@ modbus_client_instance = None
 scheduler_instance = None
 metrics_writer_instance = None
 
-# Cache for network security objects to avoid re-parsing on every request
-_net_sec_cache = {
-    "whitelist_ref": None,
-    "whitelist_nets": [],
-    "blacklist_ref": None,
-    "blacklist_nets": [],
-    "ip_results": {},  # Performance: Cache IP check results {ip_str: (allowed, timestamp)}
-    "ip_cache_ttl": 300,  # Cache results for 5 minutes
-}
+# Compiled whitelist/blacklist matcher with a bounded result cache
+ip_filter = IPAccessFilter()
+_NO_NETWORKS = ()
+_whitelist_setting = config.accessor("network_security.whitelist", _NO_NETWORKS)
+_blacklist_setting = config.accessor("network_security.blacklist", _NO_NETWORKS)
 
-# AI Status Cache
-_ai_status_lock = threading.Lock()
-_ai_status_cache = {
-    "service": "ml-service (River/HST)",
-    "online": False,
-    "score": 0.0,
-    "is_anomaly": False,
-    "last_update": None,
-    "error": None,
-}
+# Derived series evaluated server-side, keyed by expression + query key
+EXPRESSION_CACHE_TTL = 60
+_expression_cache = LRUCache(capacity=256, ttl=EXPRESSION_CACHE_TTL)
+
+# Range queries of one batch request run concurrently on the pooled VM client
+MAX_BATCH_QUERIES = 20
+_query_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vm-query")
+
+# AI status lives in live_state (pushed by the ML service, VM as fallback)
 _ai_status_stop_event = threading.Event()  # For graceful shutdown of AI status thread
 
 
+def _vm_client():
+    """Shared VictoriaMetrics client for the configured metrics URL."""
+    return get_vm_client(
+        config.data.get("metrics", {}).get("url", "http://victoriametrics:8428/write")
+    )
+
+
 def _update_ai_status_once():
     """Perform a single update of the AI status."""
-    try:
-        metrics_url = config.data.get("metrics", {}).get(
-            "url", "http://victoriametrics:8428/write"
-        )
-        base_url = metrics_url.replace("/write", "")
-        query_url = f"{base_url}/api/v1/query"
+    if live_state.ai_push_is_fresh():
+        # ML service pushes its scores directly, no need to poll VictoriaMetrics
+        return
 
+    try:
         query = (
             'last_over_time({__name__=~"idm_anomaly_score.*|idm_anomaly_flag.*"}[2h])'
         )
         try:
-            response = requests.get(query_url, params={"query": query}, timeout=10)
+            # Background poll: no retries, the loop backs off on its own
+            response = _vm_client().query(query, retries=0)
         except requests.RequestException as e:
             # Log specific network error but don't crash loop
             logger.debug(f"AI status update network error: {e}")
-            with _ai_status_lock:
-                _ai_status_cache["online"] = False
+            live_state.set_ai_offline()
             return
 
         new_status = {
@@ -267,10 +309,16 @@ def _update_ai_status_once():
             data = response.json()
             if data.get("status") == "success":
                 results = data.get("data", {}).get("result", [])
+                anomaly_metrics = {}
                 for res in results:
                     name = res["metric"].get("__name__", "")
                     val = res["value"][1]  # [timestamp, value]
                     timestamp = res["value"][0]
+                    if name:
+                        anomaly_metrics[name] = {
+                            "value": float(val),
+                            "timestamp": timestamp,
+                        }
 
                     if "idm_anomaly_score" in name:
                         new_status["score"] = float(val)
@@ -278,11 +326,12 @@ def _update_ai_status_once():
                         new_status["online"] = True
                     elif "idm_anomaly_flag" in name:
                         new_status["is_anomaly"] = float(val) > 0.5
+                # /api/metrics/current shows the scores without a push too
+                live_state.merge_external(anomaly_metrics)
         else:
             new_status["error"] = f"VictoriaMetrics error: {response.status_code}"
 
-        with _ai_status_lock:
-            _ai_status_cache.update(new_status)
+        live_state.set_ai_status(new_status)
 
     except Exception as e:
         logger.error(f"Error in AI status update loop: {e}")
@@ -300,8 +349,7 @@ def _update_ai_status_loop():
         try:
             _update_ai_status_once()
             # Check if service is online
-            with _ai_status_lock:
-                is_online = _ai_status_cache.get("online", False)
+            is_online = live_state.get_ai_status().get("online", False)
 
             if is_online:
                 # Reset backoff on success
@@ -348,19 +396,12 @@ def _stop_ai_status_thread():
     logger.info("AI status thread shutdown requested")
 
 
-@functools.lru_cache(maxsize=128)
-def get_ip_obj(ip_str):
-    """Cached IP object creation."""
-    try:
-        return ipaddress.ip_address(ip_str)
-    except ValueError:
-        return None
-
-
 def update_current_data(data):
     with data_lock:
         current_data.clear()
         current_data.update(data)
+    live_state.update_sensors(data)
+    history_buffer.append(data)
 
     # Broadcast updates via WebSocket
     try:
@@ -391,78 +432,13 @@ def check_ip_whitelist():
     if not client_ip:
         return
 
-    # Performance: Check IP result cache first (O(1) lookup)
-    now = time.time()
-    cached = _net_sec_cache["ip_results"].get(client_ip)
-    if cached:
-        allowed, cached_time = cached
-        if now - cached_time < _net_sec_cache["ip_cache_ttl"]:
-            if not allowed:
-                abort(403)
-            return
-        # Cache expired, remove entry
-        del _net_sec_cache["ip_results"][client_ip]
-
-    ip = get_ip_obj(client_ip)
-    if not ip:
-        logger.warning(f"Invalid client IP: {client_ip}")
-        _net_sec_cache["ip_results"][client_ip] = (False, now)
+    # Accessors return the same list until it changes, so ip_filter's
+    # identity check only rebuilds the tries after an edit
+    whitelist = _whitelist_setting()
+    blacklist = _blacklist_setting()
+    if not ip_filter.is_allowed(client_ip, whitelist, blacklist):
         abort(403)
 
-    whitelist = config.get("network_security.whitelist", [])
-    blacklist = config.get("network_security.blacklist", [])
-
-    # Update blacklist cache if needed
-    if blacklist is not _net_sec_cache["blacklist_ref"]:
-        new_blacklist_nets = []
-        for block in blacklist:
-            try:
-                new_blacklist_nets.append(
-                    (ipaddress.ip_network(block, strict=False), block)
-                )
-            except ValueError:
-                logger.error(f"Invalid blacklist entry: {block}")
-
-        _net_sec_cache["blacklist_nets"] = new_blacklist_nets
-        _net_sec_cache["blacklist_ref"] = blacklist
-
-    # Check blacklist first
-    for net, original_block in _net_sec_cache["blacklist_nets"]:
-        if ip in net:
-            logger.warning(
-                f"Blocked IP {client_ip} (matched blacklist {original_block})"
-            )
-            _net_sec_cache["ip_results"][client_ip] = (False, now)
-            abort(403)
-
-    # Update whitelist cache if needed
-    if whitelist is not _net_sec_cache["whitelist_ref"]:
-        new_whitelist_nets = []
-        for allow in whitelist:
-            try:
-                new_whitelist_nets.append(ipaddress.ip_network(allow, strict=False))
-            except ValueError:
-                logger.error(f"Invalid whitelist entry: {allow}")
-
-        _net_sec_cache["whitelist_nets"] = new_whitelist_nets
-        _net_sec_cache["whitelist_ref"] = whitelist
-
-    # Check whitelist if it exists and is not empty
-    if whitelist:
-        is_allowed = False
-        for net in _net_sec_cache["whitelist_nets"]:
-            if ip in net:
-                is_allowed = True
-                break
-
-        if not is_allowed:
-            logger.warning(f"Blocked IP {client_ip} (not in whitelist)")
-            _net_sec_cache["ip_results"][client_ip] = (False, now)
-            abort(403)
-
-    # Cache successful result
-    _net_sec_cache["ip_results"][client_ip] = (True, now)
-
 
 # Default CSP - can be overridden via config
 # Note: 'unsafe-inline' for styles is needed for Vue/PrimeVue dynamic styles
@@ -482,8 +458,27 @@ _DEFAULT_CSP = (
 )
 
 
+# Stable GET resources that get a content hash ETag (304 on revalidation)
+_ETAG_ENDPOINTS = frozenset(
+    {
+        "get_templates",
+        "control_page",
+        "get_variables",
+    }
+)
+
+
 @app.after_request
 def add_security_headers(response):
+    response = make_conditional(
+        response, request, add_etag=request.endpoint in _ETAG_ENDPOINTS
+    )
+    if config.get("web.compression_enabled", True):
+        response = compress_response(
+            response,
+            request,
+            min_size=config.get("web.compression_min_size", COMPRESS_MIN_SIZE),
+        )
     response.headers["X-Content-Type-Options"] = "nosniff"
     response.headers["X-Frame-Options"] = "SAMEORIGIN"
     response.headers["X-XSS-Protection"] = "1; mode=block"
@@ -572,6 +567,8 @@ def setup():
             config.data["idm"]["circuits"] = data["circuits"]
         if "zones" in data:
             config.data["idm"]["zones"] = data["zones"]
+        if "circuits" in data or "zones" in data:
+            metric_catalog.invalidate()
 
         if "hp_model" in data:
             if data["hp_model"] in HEAT_PUMP_MODELS:
@@ -683,64 +680,172 @@ def get_data():
         return jsonify(current_data)
 
 
-@app.route("/api/metrics/current")
+@app.route("/api/stream")
 @login_required
-def get_current_metrics():
+def stream_data():
     """
-    Get current values for all metrics from VictoriaMetrics.
-    Returns the latest value for each metric.
+    Live stream of current sensor data (Server-Sent Events).
+    ---
+    tags:
+      - Data
+    parameters:
+      - name: metrics
+        in: query
+        type: string
+        description: Comma-separated sensor or metric names (default all)
+      - name: rate
+        in: query
+        type: number
+        description: Maximum events per second (default every poll cycle)
+      - name: Last-Event-ID
+        in: header
+        type: integer
+        description: Resume after this event (sent by EventSource on reconnect)
+    responses:
+      200:
+        description: text/event-stream with a snapshot event, then delta events
+      401:
+        description: Not logged in
+      503:
+        description: Too many stream clients
     """
+    # On the threaded servers each stream blocks a worker thread; the slot
+    # is taken atomically and given back when the response is closed
+    if not stream_broker.acquire(
+        max_stream_clients(config.get("web.sse_max_clients", 50))
+    ):
+        return jsonify({"error": "Live-Stream nicht verfügbar"}), 503
+
+    rate = request.args.get("rate", type=float)
+    interval = 1.0 / rate if rate and rate > 0 else 0.0
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+        "last_event_id"
+    )
     try:
-        metrics_url = config.data.get("metrics", {}).get(
-            "url", "http://victoriametrics:8428/write"
-        )
-        base_url = metrics_url.replace("/write", "").replace("/api/v1/write", "")
-        query_url = f"{base_url}/api/v1/query"
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
 
-        # Query for latest values of all idm_heatpump and idm_anomaly metrics
-        query = '{__name__=~"idm_heatpump.*|idm_anomaly.*"}'
-        response = requests.get(query_url, params={"query": query}, timeout=10)
+    events = stream_broker.stream(
+        metrics=parse_metric_filter(request.args.get("metrics")),
+        interval=interval,
+        last_event_id=last_event_id,
+    )
+    response = app.response_class(
+        stream_with_context(events), mimetype="text/event-stream"
+    )
+    response.call_on_close(stream_broker.release)
+    response.headers["Cache-Control"] = "no-cache"
+    # Disable response buffering in nginx
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
-        if response.status_code != 200:
-            logger.error(f"VictoriaMetrics query failed: {response.status_code}")
-            return jsonify({"error": "Failed to query current values"}), 500
 
-        data = response.json()
-        if data.get("status") != "success":
-            return jsonify({})
+# All metrics of this application, and those the poll loop does not push
+_ALL_METRICS = '{__name__=~"idm_heatpump.*|idm_anomaly_.*|idm_ml_.*"}'
+_EXTERNAL_METRICS = '{__name__=~"idm_anomaly_.*|idm_ml_.*"}'
 
-        result = data.get("data", {}).get("result", [])
 
-        # Format: {metric_name: {value: 123, timestamp: 1234567890}}
-        metrics = {}
-        for item in result:
-            metric = item.get("metric", {})
-            name = metric.get("__name__", "")
-            value = item.get("value", [None, None])[1]
+def _fetch_current_from_vm(query=_EXTERNAL_METRICS):
+    """Latest values of a selector from VictoriaMetrics, or None on error."""
+    response = _vm_client().query(query)
+
+    if response.status_code != 200:
+        logger.error(f"VictoriaMetrics query failed: {response.status_code}")
+        return None
+
+    data = response.json()
+    if data.get("status") != "success":
+        return {}
+
+    # Format: {metric_name: {value: 123, timestamp: 1234567890}}
+    metrics = {}
+    for item in data.get("data", {}).get("result", []):
+        name = item.get("metric", {}).get("__name__", "")
+        value = item.get("value", [None, None])[1]
+
+        if name and value is not None:
+            # Remove labels for display, keep value
+            try:
+                metrics[name] = {
+                    "value": float(value),
+                    "timestamp": item.get("value", [None, None])[0],
+                }
+            except (ValueError, TypeError):
+                pass
+    return metrics
 
-            if name and value is not None:
-                # Remove labels for display, keep value
-                try:
-                    num_value = float(value)
-                    metrics[name] = {
-                        "value": num_value,
-                        "timestamp": item.get("value", [None, None])[0],
-                    }
-                except (ValueError, TypeError):
-                    pass
 
-        return jsonify(metrics)
+@app.route("/api/metrics/current")
+@login_required
+def get_current_metrics():
+    """
+    Get current values for all metrics.
+    Served from the in-process last-value store. Metrics the store does not
+    get pushed (e.g. ML scores) are merged in from VictoriaMetrics at most
+    every 30 seconds. Supports conditional requests via ETag/Last-Modified.
+    """
+    try:
+        if live_state.external_refresh_due():
+            # Heat pump values come from the poll loop once it is running
+            selector = _EXTERNAL_METRICS if live_state.polled() else _ALL_METRICS
+            try:
+                external = _fetch_current_from_vm(selector)
+            except requests.RequestException as e:
+                logger.warning(f"Could not read current values from VM: {e}")
+                external = None
+            if external is not None:
+                live_state.merge_external(external)
+            elif live_state.is_empty():
+                return jsonify({"error": "Failed to query current values"}), 500
+
+        etag, last_modified = live_state.validators()
+        if etag_matches(request.if_none_match, etag) or (
+            last_modified
+            and not request.if_none_match
+            and request.if_modified_since
+            and request.if_modified_since.timestamp() >= int(last_modified)
+        ):
+            response = app.response_class(status=304)
+        else:
+            metrics, etag, last_modified = live_state.snapshot()
+            response = jsonify(metrics)
+
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = datetime.fromtimestamp(
+                int(last_modified), tz=timezone.utc
+            )
+        response.headers["Cache-Control"] = "no-cache"
+        return response
     except Exception as e:
         logger.error(f"Failed to fetch current metrics: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
+def _dashboards_response(load, etag):
+    """Answer with 304 if the dashboards did not change since the client's ETag."""
+    if etag_matches(request.if_none_match, etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(load())
+    if etag:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @app.route("/api/dashboards", methods=["GET", "POST"])
 @login_required
 def dashboards_api():
-    """Get all dashboards or create a new one."""
+    """
+    Get all dashboards or create a new one.
+    GET supports conditional requests via ETag (from the dashboard revisions).
+    """
     if request.method == "GET":
-        return jsonify(dashboard_manager.get_all_dashboards())
+        return _dashboards_response(
+            dashboard_manager.get_all_dashboards, dashboard_manager.etag()
+        )
 
     if request.method == "POST":
         data = request.get_json()
@@ -756,10 +861,12 @@ def dashboards_api():
 def dashboard_api(dashboard_id):
     """Get, update or delete a specific dashboard."""
     if request.method == "GET":
-        dashboard = dashboard_manager.get_dashboard(dashboard_id)
-        if not dashboard:
+        etag = dashboard_manager.etag(dashboard_id)
+        if etag is None:
             return jsonify({"error": "Dashboard not found"}), 404
-        return jsonify(dashboard)
+        return _dashboards_response(
+            lambda: dashboard_manager.get_dashboard(dashboard_id), etag
+        )
 
     if request.method == "PUT":
         updates = request.get_json()
@@ -816,98 +923,42 @@ def chart_api(dashboard_id, chart_id):
         return jsonify({"success": True})
 
 
+def _fetch_metric_names_from_vm():
+    """Metric names stored in VictoriaMetrics (cheap label values lookup)."""
+    response = _vm_client().get(
+        "/api/v1/label/__name__/values",
+        params={"match[]": _ALL_METRICS},
+        timeout=10,
+        retries=0,
+    )
+    if response.status_code != 200:
+        logger.debug(f"Metric name lookup returned {response.status_code}")
+        return []
+    return response.json().get("data", [])
+
+
+metric_catalog.add_source(live_state.metric_names)
+metric_catalog.add_source(_fetch_metric_names_from_vm)
+
+
 @app.route("/api/metrics/available")
 @login_required
 def get_available_metrics():
     """
-    Get list of all available metrics from VictoriaMetrics.
-    Groups metrics by type (temp, power, pressure, etc.)
+    Get list of all available metrics, grouped by type (temp, power, ...).
+    Served from the in-memory metric catalogue (sensor registry, ML metrics
+    and names seen in VictoriaMetrics), which is refreshed in the background.
+    Supports conditional requests via ETag.
     """
     try:
-        metrics_url = config.data.get("metrics", {}).get(
-            "url", "http://victoriametrics:8428/write"
-        )
-        # Build base URL correctly
-        base_url = metrics_url.replace("/write", "").replace("/api/v1/write", "")
-
-        # Use series endpoint to get all metrics with idm_heatpump_ prefix
-        query_url = f"{base_url}/api/v1/series"
-        params = {
-            "match[]": '{__name__=~"idm_heatpump.*|idm_anomaly_.*"}',
-            "limit": "1000",
-        }
-
-        logger.debug(f"Fetching metrics from: {query_url} with params: {params}")
-
-        response = requests.get(query_url, params=params, timeout=10)
-
-        if response.status_code != 200:
-            logger.error(
-                f"VictoriaMetrics returned {response.status_code}: {response.text}"
-            )
-            return jsonify(
-                {"error": f"Failed to query metrics: {response.status_code}"}
-            ), 500
-
-        data = response.json()
-        # series endpoint returns array of objects with __name__ field
-        if isinstance(data, dict):
-            series_data = data.get("data", [])
+        body, etag = metric_catalog.get()
+        if etag_matches(request.if_none_match, etag):
+            response = app.response_class(status=304)
         else:
-            series_data = data
-
-        # Extract unique metric names
-        metric_names = set()
-        for series in series_data:
-            if isinstance(series, dict) and "__name__" in series:
-                metric_names.add(series["__name__"])
-
-        metric_names = sorted(metric_names)
-        logger.debug(f"Found {len(metric_names)} unique metrics")
-
-        # Group metrics by type
-        grouped = {
-            "temperature": [],
-            "power": [],
-            "pressure": [],
-            "energy": [],
-            "flow": [],
-            "status": [],
-            "mode": [],
-            "control": [],
-            "state": [],
-            "ai": [],
-            "other": [],
-        }
-
-        for name in metric_names:
-            # Remove 'idm_heatpump_' prefix for display
-            display_name = name.replace("idm_heatpump_", "")
-
-            if name.startswith("idm_anomaly_"):
-                grouped["ai"].append({"name": name, "display": name})
-            elif display_name.startswith("temp_"):
-                grouped["temperature"].append({"name": name, "display": display_name})
-            elif display_name.startswith("power_"):
-                grouped["power"].append({"name": name, "display": display_name})
-            elif display_name.startswith("pressure_"):
-                grouped["pressure"].append({"name": name, "display": display_name})
-            elif display_name.startswith("energy_"):
-                grouped["energy"].append({"name": name, "display": display_name})
-            elif display_name.startswith("flow_"):
-                grouped["flow"].append({"name": name, "display": display_name})
-            elif display_name.startswith("status_"):
-                grouped["status"].append({"name": name, "display": display_name})
-            elif display_name.startswith("mode_"):
-                grouped["mode"].append({"name": name, "display": display_name})
-            elif display_name.startswith("control_"):
-                grouped["control"].append({"name": name, "display": display_name})
-            elif display_name.startswith("state_"):
-                grouped["state"].append({"name": name, "display": display_name})
-            else:
-                grouped["other"].append({"name": name, "display": display_name})
-
-        return jsonify(grouped)
+            response = app.response_class(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
     except Exception as e:
         logger.error(f"Failed to fetch available metrics: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
@@ -917,11 +968,46 @@ def get_available_metrics():
 @login_required
 def get_ai_status():
     """
-    Get current AI service status from VictoriaMetrics.
+    Get current AI service status.
+    Pushed by the ML service, polled from VictoriaMetrics as a fallback.
+    """
+    return jsonify(live_state.get_ai_status())
+
+
+def _downsample_options(args):
+    """
+    Read max_points/width and method from request arguments.
+
+    Returns:
+        (max_points, method); max_points is 0 if no downsampling is requested.
+
+    Raises:
+        ValueError: Invalid parameter values.
+    """
+    max_points = parse_max_points(args.get("max_points") or args.get("width"))
+    method = (args.get("method") or DEFAULT_DOWNSAMPLE_METHOD).lower()
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unsupported downsampling method: {method}")
+    return max_points, method
+
+
+def _query_range(query, start, end, step, max_points=0, method="lttb"):
+    """
+    Run a range query and downsample the result.
+
+    Returns:
+        (payload, status_code)
     """
-    with _ai_status_lock:
-        status = _ai_status_cache.copy()
-    return jsonify(status)
+    params = {"query": query, "start": start, "end": end, "step": step}
+    response = _vm_client().get("/api/v1/query_range", params=params)
+    if response.status_code != 200:
+        logger.error(f"VictoriaMetrics query failed: {response.text}")
+        return {"status": "error", "error": response.text}, response.status_code
+
+    payload = response.json()
+    if max_points:
+        downsample_matrix(payload, max_points, method)
+    return payload, 200
 
 
 @app.route("/api/metrics/query_range", methods=["GET"])
@@ -929,31 +1015,88 @@ def get_ai_status():
 def query_metrics_range():
     """
     Proxy request to VictoriaMetrics /api/v1/query_range
+
+    Optional parameters:
+        max_points (or width): Downsample each series to this many points,
+            typically the chart width in pixels.
+        method: "lttb" (default) or "m4" (min/max preserving).
     """
     try:
-        metrics_url = config.data.get("metrics", {}).get(
-            "url", "http://victoriametrics:8428/write"
+        try:
+            max_points, method = _downsample_options(request.args)
+        except ValueError as e:
+            return jsonify({"status": "error", "error": str(e)}), 400
+
+        payload, status = _query_range(
+            request.args.get("query"),
+            request.args.get("start"),
+            request.args.get("end"),
+            request.args.get("step"),
+            max_points,
+            method,
         )
-        base_url = metrics_url.replace("/write", "")
-        query_url = f"{base_url}/api/v1/query_range"
-
-        # Forward parameters
-        params = {
-            "query": request.args.get("query"),
-            "start": request.args.get("start"),
-            "end": request.args.get("end"),
-            "step": request.args.get("step"),
-        }
+        return jsonify(payload), status
+    except Exception as e:
+        logger.error(f"Metrics query failed: {e}")
+        return jsonify({"status": "error", "error": str(e)}), 500
+
+
+@app.route("/api/metrics/query_range/batch", methods=["POST"])
+@login_required
+def query_metrics_range_batch():
+    """
+    Run several range queries for one chart in a single request.
 
-        response = requests.get(query_url, params=params, timeout=10)
-        if response.status_code != 200:
-            logger.error(f"VictoriaMetrics query failed: {response.text}")
+    Expects JSON:
+    {
+        "queries": ["metric_a", "metric_b"],
+        "start": 1700000000,
+        "end": 1700086400,
+        "step": "60",
+        "max_points": 800,       // optional, chart width in pixels
+        "method": "lttb|m4"      // optional
+    }
+
+    Returns:
+    {"status": "success", "data": [{"query": "metric_a", "status": ..., "data": ...}]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        queries = data.get("queries")
+        if not isinstance(queries, list) or not queries:
+            return jsonify({"status": "error", "error": "queries are required"}), 400
+        if len(queries) > MAX_BATCH_QUERIES:
             return jsonify(
-                {"status": "error", "error": response.text}
-            ), response.status_code
-        return jsonify(response.json())
+                {
+                    "status": "error",
+                    "error": f"At most {MAX_BATCH_QUERIES} queries per batch",
+                }
+            ), 400
+
+        try:
+            max_points, method = _downsample_options(data)
+        except (TypeError, ValueError) as e:
+            return jsonify({"status": "error", "error": str(e)}), 400
+
+        def run(query):
+            try:
+                payload, _status = _query_range(
+                    query,
+                    data.get("start"),
+                    data.get("end"),
+                    data.get("step"),
+                    max_points,
+                    method,
+                )
+            except Exception as e:
+                logger.warning(f"Batch query {query!r} failed: {e}")
+                payload = {"status": "error", "error": str(e)}
+            return {"query": query, **payload}
+
+        results = list(_query_executor.map(run, queries))
+        return jsonify({"status": "success", "data": results})
     except Exception as e:
-        logger.error(f"Metrics query failed: {e}")
+        logger.error(f"Batch metrics query failed: {e}")
         return jsonify({"status": "error", "error": str(e)}), 500
 
 
@@ -961,11 +1104,14 @@ def query_metrics_range():
 @login_required
 def export_metrics_data():
     """
-    Export metrics data in various formats (CSV, Excel, JSON).
+    Export metrics data in various formats (CSV, Excel, JSON, Parquet, Arrow).
+
+    Parquet and Arrow produce one wide, typed table (one column per metric)
+    written in row groups, see idm_logger/export.py.
 
     Expects JSON:
     {
-        "format": "csv|excel|json",
+        "format": "csv|excel|json|parquet|arrow",
         "metrics": ["metric1", "metric2", ...] or "all",
         "start": timestamp or ISO string,
         "end": timestamp or ISO string,
@@ -988,25 +1134,28 @@ def export_metrics_data():
         dashboard_name = data.get("dashboard_name", "metrics")
 
         # Validate format
-        if export_format not in ["csv", "excel", "json"]:
+        if export_format not in ["csv", "excel", "json", *COLUMNAR_FORMATS]:
             return jsonify({"error": f"Unsupported format: {export_format}"}), 400
 
         # Validate time range
         if not start or not end:
             return jsonify({"error": "start and end timestamps are required"}), 400
 
-        # Get VictoriaMetrics URL
-        metrics_url = config.data.get("metrics", {}).get(
-            "url", "http://victoriametrics:8428/write"
-        )
-        base_url = metrics_url.replace("/write", "").replace("/api/v1/write", "")
+        vm = _vm_client()
+
+        if export_format in COLUMNAR_FORMATS:
+            return _export_columnar(
+                vm.base_url, export_format, metrics, start, end, step, dashboard_name
+            )
 
         # Build metrics list
         if metrics == "all":
-            # Query all available idm metrics
-            query_url = f"{base_url}/api/v1/query"
-            query = '{__name__=~"idm_heatpump.*|idm_anomaly.*"}'
-            response = requests.get(query_url, params={"query": query}, timeout=10)
+            # Names of all available idm metrics (label values, no samples)
+            response = vm.get(
+                "/api/v1/label/__name__/values",
+                params={"match[]": _ALL_METRICS},
+                timeout=10,
+            )
 
             if response.status_code != 200:
                 return jsonify({"error": "Failed to fetch available metrics"}), 500
@@ -1015,28 +1164,16 @@ def export_metrics_data():
             if result_data.get("status") != "success":
                 return jsonify({"error": "Failed to query metrics"}), 500
 
-            metrics = [
-                item.get("metric", {}).get("__name__", "")
-                for item in result_data.get("data", {}).get("result", [])
-            ]
-            metrics = [m for m in metrics if m]  # Filter empty names
+            metrics = [m for m in result_data.get("data", []) if m]
 
         if not metrics:
             return jsonify({"error": "No metrics selected"}), 400
 
         # Fetch data for each metric
         all_data = []
-        query_range_url = f"{base_url}/api/v1/query_range"
 
         for metric in metrics:
-            params = {
-                "query": metric,
-                "start": start,
-                "end": end,
-                "step": step,
-            }
-
-            response = requests.get(query_range_url, params=params, timeout=30)
+            response = vm.query_range(metric, start, end, step, timeout=30)
             if response.status_code != 200:
                 logger.warning(f"Failed to fetch {metric}: {response.status_code}")
                 continue
@@ -1179,13 +1316,102 @@ def export_metrics_data():
         return jsonify({"error": f"Export failed: {str(e)}"}), 500
 
 
+def _export_columnar(base_url, export_format, metrics, start, end, step, name):
+    """Stream a wide Parquet/Arrow table into a temp file and send it."""
+    exporter = ColumnarExporter(base_url, metrics=metrics, step=step)
+    # Spill to disk so large ranges don't have to fit in memory
+    output = tempfile.TemporaryFile()
+    try:
+        summary = exporter.export(output, start, end, export_format)
+    except ValueError as e:
+        output.close()
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        output.close()
+        raise
+
+    if summary["rows"] == 0:
+        output.close()
+        return jsonify(
+            {"error": "No data found for selected metrics and time range"}
+        ), 404
+
+    output.seek(0)
+    timestamp_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    safe_name = re.sub(r"[^a-zA-Z0-9_-]", "_", name)
+    extension, mimetype = {
+        "parquet": ("parquet", "application/vnd.apache.parquet"),
+        "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+    }[export_format]
+    return send_file(
+        output,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=f"{safe_name}_export_{timestamp_str}.{extension}",
+    )
+
+
+def _parse_step_seconds(step):
+    """Step in seconds ("60", "5m", 300), or None if it cannot be parsed."""
+    if step is None:
+        return None
+    try:
+        return parse_step(step)
+    except ValueError:
+        return None
+
+
+def _is_query_definition(value):
+    return isinstance(value, str) or (
+        isinstance(value, dict) and isinstance(value.get("query"), str)
+    )
+
+
+def _fetch_expression_series(definitions, start, end, step):
+    """
+    Fetch the queries of an expression concurrently.
+
+    Args:
+        definitions: Label -> PromQL query string.
+
+    Returns:
+        Label -> [(timestamp, value), ...] aligned to the step grid.
+
+    Raises:
+        ValueError: A query failed or does not return exactly one series.
+    """
+    labels = sorted(definitions)
+
+    def run(label):
+        return _query_range(definitions[label], start, end, step)
+
+    step_seconds = _parse_step_seconds(step)
+    try:
+        origin = float(start)
+    except (TypeError, ValueError):
+        # RFC3339 or relative start: VictoriaMetrics aligns to step multiples
+        origin = 0.0
+    results = {}
+    for label, (payload, status) in zip(labels, _query_executor.map(run, labels)):
+        if status != 200 or payload.get("status") != "success":
+            raise ValueError(f"Query {label} failed: {payload.get('error', status)}")
+        series = payload.get("data", {}).get("result", [])
+        if len(series) > 1:
+            raise ValueError(
+                f"Query {label} returns {len(series)} series, expected one"
+            )
+        values = series[0].get("values", []) if series else []
+        results[label] = snap_to_step(values, step_seconds, origin)
+    return results
+
+
 @app.route("/api/query/evaluate", methods=["POST"])
 @login_required
 def evaluate_expression():
     """
     Evaluate a mathematical expression on query results.
 
-    Expects JSON:
+    Expects JSON with either the query results:
     {
         "expression": "A/B",  // Expression to evaluate
         "queries": {           // Query results for each label
@@ -1194,6 +1420,16 @@ def evaluate_expression():
         }
     }
 
+    or query definitions, which are fetched from VictoriaMetrics on the server:
+    {
+        "expression": "A/B",
+        "queries": {"A": "idm_heatpump_power_current", "B": {"query": "..."}},
+        "start": 1700000000,
+        "end": 1700086400,
+        "step": "60",
+        "max_points": 800      // optional, downsample the derived series
+    }
+
     Returns:
     {
         "status": "success",
@@ -1221,40 +1457,138 @@ def evaluate_expression():
         if not is_valid:
             return jsonify({"status": "error", "error": error_msg}), 400
 
-        # Set query results
-        expression_parser.set_query_results(queries)
-
-        # Evaluate expression
-        results = expression_parser.evaluate_expression_series(expression)
+        if not isinstance(queries, dict):
+            return jsonify({"status": "error", "error": "Invalid queries"}), 400
+        if not any(_is_query_definition(q) for q in queries.values()):
+            # Per-request context: concurrent requests never share results
+            context = expression_parser.context(queries)
+            results = context.evaluate_series(expression)
+            return jsonify({"status": "success", "data": {"values": results}})
 
-        return jsonify({"status": "success", "data": {"values": results}})
+        return _evaluate_query_definitions(expression, queries, data)
     except Exception as e:
         logger.error(f"Expression evaluation failed: {e}")
         return jsonify({"status": "error", "error": str(e)}), 500
 
 
-@app.route("/api/internal/ml_alert", methods=["POST"])
-@limiter.limit("60 per minute")  # Rate limit internal API
-def ml_alert_endpoint():
+def _evaluate_query_definitions(expression, queries, data):
+    """Fetch the queries of an expression and evaluate it server-side."""
+    if not all(_is_query_definition(q) for q in queries.values()):
+        return jsonify(
+            {"status": "error", "error": "Do not mix query results and definitions"}
+        ), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify(
+            {
+                "status": "error",
+                "error": f"At most {MAX_BATCH_QUERIES} queries per expression",
+            }
+        ), 400
+    try:
+        max_points, method = _downsample_options(data)
+        compiled = expression_parser.compile(expression)
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    definitions = {
+        label: (q if isinstance(q, str) else q["query"]).strip()
+        for label, q in queries.items()
+    }
+    start, end, step = data.get("start"), data.get("end"), data.get("step")
+    cache_key = (
+        "".join(expression.split()),
+        tuple(sorted(definitions.items())),
+        str(start),
+        str(end),
+        str(step),
+        max_points,
+        method,
+    )
+    missing = set(compiled.labels) - set(definitions)
+    if missing:
+        return jsonify(
+            {
+                "status": "error",
+                "error": f"Missing queries: {', '.join(sorted(missing))}",
+            }
+        ), 400
+
+    values = _expression_cache.get(cache_key)
+    if values is None:
+        # Only the labels the expression uses are fetched
+        needed = {label: definitions[label] for label in compiled.labels}
+        try:
+            series = _fetch_expression_series(needed, start, end, step)
+        except ValueError as e:
+            return jsonify({"status": "error", "error": str(e)}), 400
+        values = expression_parser.context(series).evaluate_compiled(compiled)
+        if max_points:
+            values = downsample_values(values, max_points, method)
+        _expression_cache.put(cache_key, values)
+    return jsonify({"status": "success", "data": {"values": values}})
+
+
+def _check_internal_secret(endpoint_name):
     """
-    Internal endpoint for ML service to send anomaly alerts.
-    Protected by shared secret if configured.
+    Verify the shared secret of an internal (service-to-service) request.
+
+    Returns:
+        None if authorized, otherwise an error response tuple.
     """
     import hmac
 
-    # Security Check
     internal_key = config.get("internal_api_key")
     if not internal_key:
-        logger.error("INTERNAL_API_KEY not configured - rejecting ML alert")
+        logger.error(f"INTERNAL_API_KEY not configured - rejecting {endpoint_name}")
         return jsonify({"error": "Configuration Error: INTERNAL_API_KEY not set"}), 503
 
     auth_header = request.headers.get("X-Internal-Secret")
     # Use constant-time comparison to prevent timing attacks
     if not auth_header or not hmac.compare_digest(auth_header, internal_key):
         logger.warning(
-            f"Unauthorized access attempt to ml_alert from {request.remote_addr}"
+            f"Unauthorized access attempt to {endpoint_name} from {request.remote_addr}"
         )
         return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+
+@app.route("/api/internal/ml_score", methods=["POST"])
+@limiter.limit("120 per minute")  # ML service pushes once per update interval
+def ml_score_endpoint():
+    """
+    Internal endpoint for the ML service to push its latest anomaly score.
+    Feeds the last-value store behind /api/ai/status and /api/metrics/current.
+    """
+    error = _check_internal_secret("ml_score")
+    if error:
+        return error
+
+    data = request.get_json(silent=True)
+    if not data or "score" not in data:
+        return jsonify({"error": "score is required"}), 400
+
+    try:
+        live_state.push_ai_status(
+            score=float(data["score"]),
+            is_anomaly=bool(data.get("is_anomaly", False)),
+            timestamp=data.get("timestamp"),
+            mode=data.get("mode"),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid score payload: {e}"}), 400
+    return jsonify({"status": "success"}), 200
+
+
+@app.route("/api/internal/ml_alert", methods=["POST"])
+@limiter.limit("60 per minute")  # Rate limit internal API
+def ml_alert_endpoint():
+    """
+    Internal endpoint for ML service to send anomaly alerts.
+    Protected by shared secret if configured.
+    """
+    error = _check_internal_secret("ml_alert")
+    if error:
+        return error
 
     try:
         data = request.get_json()
@@ -1350,6 +1684,27 @@ def websocket_stats():
     return jsonify(websocket_handler.get_stats())
 
 
+@app.route("/api/stream/stats")
+@login_required
+def stream_stats():
+    """Get SSE stream statistics (clients, sequence, resumes)."""
+    return jsonify(stream_broker.get_stats())
+
+
+@app.route("/api/victoriametrics/stats")
+@login_required
+def victoriametrics_stats():
+    """Get VictoriaMetrics client statistics (latency, errors, circuit state)."""
+    return jsonify(get_vm_client_stats())
+
+
+@app.route("/api/network_security/stats")
+@login_required
+def network_security_stats():
+    """Get IP filter statistics (compiled networks, result cache hit rate)."""
+    return jsonify(ip_filter.get_stats())
+
+
 @app.route("/api/logs")
 @login_required
 def logs_page():
@@ -1472,6 +1827,8 @@ def config_page():
                 config.data["idm"]["circuits"] = data["circuits"]
             if "zones" in data:
                 config.data["idm"]["zones"] = data["zones"]
+            if "circuits" in data or "zones" in data:
+                metric_catalog.invalidate()
             if "write_enabled" in data:
                 config.data["web"]["write_enabled"] = bool(data["write_enabled"])
             if "logging_interval" in data:
@@ -2114,6 +2471,25 @@ def schedule_page():
     return jsonify({"jobs": jobs, "sensors": writable_sensors})
 
 
+def _validate_alert_options(data):
+    """Error message for invalid windowed alert or severity settings, or None."""
+    aggregate = data.get("aggregate") or "value"
+    if aggregate not in ALERT_AGGREGATES:
+        return "Ungültige Auswertung"
+    try:
+        window_seconds = int(data.get("window_seconds") or 0)
+        for_seconds = int(data.get("for_seconds") or 0)
+    except (TypeError, ValueError):
+        return "Zeitfenster muss eine Zahl sein"
+    if window_seconds < 0 or for_seconds < 0:
+        return "Zeitfenster darf nicht negativ sein"
+    if aggregate != "value" and window_seconds <= 0:
+        return "Zeitfenster fehlt"
+    if data.get("severity") and data["severity"] not in ALERT_SEVERITIES:
+        return "Ungültiger Schweregrad"
+    return None
+
+
 @app.route("/api/alerts", methods=["GET", "POST", "PUT", "DELETE"])
 @login_required
 def alerts_api():
@@ -2129,6 +2505,9 @@ def alerts_api():
             return jsonify({"error": "Ungültiger Typ"}), 400
         if data["type"] == "threshold" and not data.get("sensor"):
             return jsonify({"error": "Sensor fehlt"}), 400
+        error = _validate_alert_options(data)
+        if error:
+            return jsonify({"error": error}), 400
 
         try:
             alert = alert_manager.add_alert(data)
@@ -2141,6 +2520,9 @@ def alerts_api():
         alert_id = data.get("id")
         if not alert_id:
             return jsonify({"error": "ID fehlt"}), 400
+        error = _validate_alert_options(data)
+        if error:
+            return jsonify({"error": error}), 400
 
         try:
             alert_manager.update_alert(alert_id, data)
@@ -2160,6 +2542,34 @@ def alerts_api():
             return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/alerts/stats")
+@login_required
+def alerts_stats():
+    """Get alert engine statistics (compiled rules, active rules, timers)."""
+    return jsonify(alert_manager.get_stats())
+
+
+@app.route("/api/notifications/stats")
+@login_required
+def notifications_stats():
+    """Get notification delivery statistics (queues, retries, latency)."""
+    return jsonify(notification_manager.get_stats())
+
+
+@app.route("/api/config/stats")
+@login_required
+def config_stats():
+    """Get configuration statistics (snapshot version, subscribers, saves)."""
+    return jsonify(config.get_stats())
+
+
+@app.route("/api/database/stats")
+@login_required
+def database_stats():
+    """Get SQLite statistics (read pool, group commits, per-query timing)."""
+    return jsonify(db.get_stats())
+
+
 @app.route("/api/alerts/templates", methods=["GET"])
 @login_required
 def get_templates():
@@ -2279,12 +2689,13 @@ def delete_backup(filename):
 @login_required
 def delete_database():
     try:
-        metrics_url = config.data.get("metrics", {}).get(
-            "url", "http://victoriametrics:8428/write"
+        # Destructive admin call: never retry
+        response = _vm_client().post(
+            "/api/v1/admin/tsdb/delete_series",
+            params={"match[]": '{__name__!=""}'},
+            retries=0,
+            timeout=60,
         )
-        base_url = metrics_url.replace("/write", "")
-        delete_url = f"{base_url}/api/v1/admin/tsdb/delete_series"
-        response = requests.post(delete_url, params={"match[]": '{__name__!=""}'})
         if response.status_code == 204 or response.status_code == 200:
             return jsonify(
                 {"success": True, "message": "Datenbank erfolgreich bereinigt"}
@@ -2349,25 +2760,45 @@ def check_telemetry_model():
 # ============================================================================
 
 
+ANNOTATIONS_PAGE_SIZE = 1000
+
+
 @app.route("/api/annotations", methods=["GET"])
 @login_required
 def get_annotations():
-    """Get all annotations or filter by dashboard and time range"""
+    """
+    Get annotations, newest first, filtered by dashboard, time range, tag and
+    acknowledged state. Paginated with limit/offset; the total count is in
+    the X-Total-Count header and the next offset in X-Next-Offset.
+    """
     try:
-        dashboard_id = request.args.get("dashboard_id")
         start = request.args.get("start", type=int)
         end = request.args.get("end", type=int)
+        limit = request.args.get("limit", ANNOTATIONS_PAGE_SIZE, type=int)
+        offset = request.args.get("offset", 0, type=int)
+        if limit < 1 or offset < 0:
+            return jsonify({"error": "Ungültige Seitenangabe"}), 400
+        limit = min(limit, ANNOTATIONS_PAGE_SIZE)
+
+        acknowledged = request.args.get("acknowledged")
+        if acknowledged is not None:
+            acknowledged = acknowledged.lower() in ("1", "true", "yes")
+
+        annotations, total = annotation_manager.query(
+            start=start,
+            end=end,
+            dashboard_id=request.args.get("dashboard_id") or None,
+            tag=request.args.get("tag") or None,
+            acknowledged=acknowledged,
+            limit=limit,
+            offset=offset,
+        )
 
-        if dashboard_id:
-            annotations = annotation_manager.get_annotations_for_dashboard(dashboard_id)
-        elif start and end:
-            annotations = annotation_manager.get_annotations_for_time_range(
-                start, end, dashboard_id
-            )
-        else:
-            annotations = annotation_manager.get_all_annotations()
-
-        return jsonify([a.to_dict() for a in annotations])
+        response = jsonify([a.to_dict() for a in annotations])
+        response.headers["X-Total-Count"] = str(total)
+        if offset + len(annotations) < total:
+            response.headers["X-Next-Offset"] = str(offset + len(annotations))
+        return response
     except Exception as e:
         logger.error(f"Failed to get annotations: {e}")
         return jsonify({"error": str(e)}), 500
@@ -2770,9 +3201,19 @@ def run_web(modbus_client, scheduler):
 
         # Check if WebSocket is enabled
         websocket_enabled = config.get("web.websocket_enabled", True)
+        server_mode = resolve_mode(websocket_enabled)
 
         try:
-            if websocket_enabled:
+            if server_mode == GEVENT:
+                logger.info(
+                    f"Starting production web server (gevent) with WebSocket "
+                    f"support on {host}:{port}"
+                )
+                # Each request runs in its own greenlet; blocking I/O is
+                # monkey patched, so slow VictoriaMetrics calls do not queue
+                # other requests behind a fixed thread pool.
+                serve_gevent(app, host, port)
+            elif server_mode == WERKZEUG:
                 logger.info(
                     f"Starting web server with WebSocket support on {host}:{port}"
                 )
@@ -2792,7 +3233,7 @@ def run_web(modbus_client, scheduler):
                     app,
                     host=host,
                     port=port,
-                    threads=4,
+                    threads=WAITRESS_THREADS,
                     channel_timeout=60,
                     url_scheme="http",
                 )
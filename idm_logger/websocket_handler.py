@@ -4,15 +4,108 @@ WebSocket Handler for real-time data updates.
 
 This module provides WebSocket support for pushing real-time metric updates
 to connected clients without requiring polling.
+
+Every poll cycle, each connected client receives a single ``metrics_batch``
+frame with the changed metrics it subscribed to, instead of one
+``metric_update`` event per metric. Clients that subscribe with
+``"encoding": "msgpack"`` get the frame as msgpack bytes (if the msgpack
+package is installed). Right after subscribing, a client receives a
+``metrics_snapshot`` with the current values and a backfill of recent points
+from the in-memory history buffer.
+
+Slow consumers are handled per client: a subscription can declare a maximum
+update rate (``max_rate`` in frames per second), values are coalesced to the
+latest one per metric between sends, and clients that acknowledge frames
+(``"ack": true``) have their backlog tracked. While the backlog is above
+``MAX_BACKLOG`` no further frames are queued for them and their interval is
+doubled; clients that keep falling behind are disconnected. Server memory
+per client is therefore bounded by its number of subscribed metrics.
 """
 
 import logging
-from typing import Dict, Set
+import threading
+import time
+from typing import Callable, Dict, List, Set
 from flask_socketio import emit, join_room, leave_room
 from flask import request
 
+from .config import config
+from .history_buffer import history_buffer
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Same naming as the metrics writer: measurement "idm_heatpump" + "_" + field
+METRIC_PREFIX = "idm_heatpump_"
+
+_MISSING = object()
+
+# Unacknowledged frames before a client counts as slow
+MAX_BACKLOG = 5
+# Slow cycles in a row before a client is disconnected
+MAX_STRIKES = 10
+# Longest interval a slow client is downgraded to (seconds)
+MAX_DOWNGRADE_INTERVAL = 60.0
+
+
+class ClientState:
+    """Per-session delivery state (rate limit, coalescing buffer, backlog)."""
+
+    __slots__ = (
+        "encoding",
+        "requested_interval",
+        "interval",
+        "ack",
+        "pending",
+        "last_sent",
+        "backlog",
+        "strikes",
+        "coalesced",
+        "skipped",
+    )
+
+    def __init__(self, encoding: str = "json", interval: float = 0.0, ack=False):
+        self.encoding = encoding
+        self.requested_interval = interval
+        self.interval = interval
+        self.ack = ack
+        self.pending: Dict[str, object] = {}
+        self.last_sent = float("-inf")
+        self.backlog = 0
+        self.strikes = 0
+        self.coalesced = 0
+        self.skipped = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "encoding": self.encoding,
+            "interval": self.interval,
+            "requested_interval": self.requested_interval,
+            "backlog": self.backlog,
+            "pending": len(self.pending),
+            "strikes": self.strikes,
+            "coalesced": self.coalesced,
+            "skipped": self.skipped,
+        }
+
+
+def _subscription_interval(data: Dict) -> float:
+    """Minimum seconds between frames from a subscribe message (0 = every cycle)."""
+    try:
+        max_rate = float(data.get("max_rate") or 0)
+    except (TypeError, ValueError):
+        max_rate = 0
+    if max_rate > 0:
+        return min(1.0 / max_rate, MAX_DOWNGRADE_INTERVAL)
+    return 0.0
+
 
 class WebSocketHandler:
     """Handler for WebSocket connections and real-time updates."""
@@ -31,6 +124,15 @@ class WebSocketHandler:
         self.dashboard_subscriptions: Dict[
             str, Set[str]
         ] = {}  # dashboard_id -> set of session ids
+        self.client_metrics: Dict[str, Set[str]] = {}  # session id -> metrics
+        self.clients: Dict[str, ClientState] = {}  # session id -> delivery state
+        self._lock = threading.Lock()
+        self._last_values: Dict[str, object] = {}
+        self._frames_sent = 0
+        self._broadcast_cycles = 0
+        self._dropped_clients = 0
+        self._downgrades = 0
+        self._listeners: List[Callable[[int, Dict], None]] = []
 
         if app:
             self.init_app(app, socketio)
@@ -73,7 +175,11 @@ class WebSocketHandler:
             Handle subscription to specific metrics.
 
             Args:
-                data: { 'metrics': ['metric1', 'metric2'], 'dashboard_id': '...' }
+                data: { 'metrics': ['metric1', 'metric2'], 'dashboard_id': '...',
+                        'max_rate': 0.2,         # optional, frames per second
+                        'ack': true,             # optional, client acks frames
+                        'backfill': 900,         # optional, seconds of history
+                        'encoding': 'msgpack' }  # optional
             """
             sid = request.sid
             metrics = data.get("metrics", [])
@@ -82,10 +188,25 @@ class WebSocketHandler:
             logger.info(f"Client {sid} subscribing to metrics: {metrics}")
 
             # Subscribe to metrics
+            with self._lock:
+                for metric in metrics:
+                    self.subscriptions.setdefault(metric, set()).add(sid)
+                    self.client_metrics.setdefault(sid, set()).add(metric)
+                encoding = (
+                    "msgpack"
+                    if data.get("encoding") == "msgpack" and MSGPACK_AVAILABLE
+                    else "json"
+                )
+                state = self.clients.setdefault(sid, ClientState())
+                # Options of a later subscribe update the existing state
+                if "encoding" in data:
+                    state.encoding = encoding
+                if "max_rate" in data:
+                    state.requested_interval = _subscription_interval(data)
+                    state.interval = state.requested_interval
+                if "ack" in data:
+                    state.ack = bool(data["ack"])
             for metric in metrics:
-                if metric not in self.subscriptions:
-                    self.subscriptions[metric] = set()
-                self.subscriptions[metric].add(sid)
                 join_room(metric)
 
             # Subscribe to dashboard room
@@ -96,6 +217,8 @@ class WebSocketHandler:
                 join_room(f"dashboard_{dashboard_id}")
 
             emit("subscribed", {"metrics": metrics, "dashboard_id": dashboard_id})
+            if metrics:
+                emit("metrics_snapshot", self._snapshot(metrics, data.get("backfill")))
 
         @self.socketio.on("unsubscribe")
         def handle_unsubscribe(data):
@@ -112,9 +235,20 @@ class WebSocketHandler:
             logger.info(f"Client {sid} unsubscribing from metrics: {metrics}")
 
             # Unsubscribe from metrics
+            with self._lock:
+                client = self.client_metrics.get(sid, set())
+                for metric in metrics:
+                    client.discard(metric)
+                    sids = self.subscriptions.get(metric)
+                    if sids is not None:
+                        sids.discard(sid)
+                        if not sids:
+                            del self.subscriptions[metric]
+                if not client:
+                    self.client_metrics.pop(sid, None)
+                    self.clients.pop(sid, None)
             for metric in metrics:
-                if metric in self.subscriptions:
-                    self.subscriptions[metric].discard(sid)
+                leave_room(metric)
 
             # Unsubscribe from dashboard room
             if dashboard_id:
@@ -136,17 +270,21 @@ class WebSocketHandler:
         Args:
             sid: Session ID to clean up
         """
-        # Remove from metric subscriptions
-        for metric in list(self.subscriptions.keys()):
-            self.subscriptions[metric].discard(sid)
-            if not self.subscriptions[metric]:
-                del self.subscriptions[metric]
-
-        # Remove from dashboard subscriptions
-        for dashboard_id in list(self.dashboard_subscriptions.keys()):
-            self.dashboard_subscriptions[dashboard_id].discard(sid)
-            if not self.dashboard_subscriptions[dashboard_id]:
-                del self.dashboard_subscriptions[dashboard_id]
+        with self._lock:
+            # Only the client's own metrics (reverse index), not all metrics
+            for metric in self.client_metrics.pop(sid, ()):
+                sids = self.subscriptions.get(metric)
+                if sids is not None:
+                    sids.discard(sid)
+                    if not sids:
+                        del self.subscriptions[metric]
+            self.clients.pop(sid, None)
+
+            # Remove from dashboard subscriptions
+            for dashboard_id in list(self.dashboard_subscriptions.keys()):
+                self.dashboard_subscriptions[dashboard_id].discard(sid)
+                if not self.dashboard_subscriptions[dashboard_id]:
+                    del self.dashboard_subscriptions[dashboard_id]
 
     def broadcast_metric_update(self, metric: str, value: float, timestamp: int):
         """
@@ -163,25 +301,160 @@ class WebSocketHandler:
         data = {"metric": metric, "value": value, "timestamp": timestamp}
         self.socketio.emit("metric_update", data, room=metric)
 
+    def _snapshot(self, metrics, backfill=None) -> Dict:
+        """
+        Current values plus recent history of newly subscribed metrics.
+
+        Sent right after subscribing, so a live chart can draw the last
+        minutes without waiting for the next poll cycle or querying
+        VictoriaMetrics.
+        """
+        window = config.get("web.websocket_backfill_window", history_buffer.window)
+        try:
+            if backfill is not None:
+                window = min(float(backfill), window)
+        except (TypeError, ValueError):
+            pass
+        return {
+            "timestamp": int(time.time()),
+            "metrics": history_buffer.latest(metrics),
+            "backfill": history_buffer.backfill(metrics, window) if window > 0 else {},
+            "window": window,
+        }
+
+    def _changed_metrics(self, data: Dict) -> Dict[str, object]:
+        """
+        Metrics whose value changed since the previous cycle, by sensor name.
+        """
+        delta = {}
+        for key, value in data.items():
+            # Skip internal fields or non-metric data if any
+            if not isinstance(key, str) or key.endswith("_str"):
+                continue
+            if self._last_values.get(key, _MISSING) == value:
+                continue
+            self._last_values[key] = value
+            delta[key] = value
+        return delta
+
+    def add_listener(self, listener: Callable[[int, Dict], None]):
+        """
+        Register a callback for each cycle's changed values.
+
+        Listeners (e.g. the SSE broker) receive ``(timestamp, delta)`` with
+        the delta keyed by sensor name, computed once for all consumers.
+        """
+        self._listeners.append(listener)
+
+    def _encode(self, payload: Dict, encoding: str):
+        if encoding == "msgpack":
+            return msgpack.packb(payload, use_bin_type=True)
+        return payload
+
     def broadcast_metrics(self, data: Dict):
         """
-        Broadcast multiple metric updates to subscribed clients.
+        Send each client one frame with its changed, subscribed metrics.
+
+        Changes are coalesced per client (latest value wins) until its
+        rate limit allows the next frame and its backlog is drained.
 
         Args:
             data: Dictionary of metric values {metric_name: value, ...}
         """
-        import time
-
         timestamp = int(time.time())
+        now = time.monotonic()
+        self._broadcast_cycles += 1
+        delta = self._changed_metrics(data)
+        for listener in self._listeners:
+            try:
+                listener(timestamp, delta)
+            except Exception as e:
+                logger.error(f"Metrics listener failed: {e}")
+
+        # Readings are keyed by sensor name, subscriptions usually by metric
+        # name (idm_heatpump_<sensor>), so both names are provided
+        changed = dict(delta)
+        for key, value in delta.items():
+            if not key.startswith(METRIC_PREFIX):
+                changed[f"{METRIC_PREFIX}{key}"] = value
+
+        with self._lock:
+            clients = [
+                (sid, frozenset(metrics), self.clients.setdefault(sid, ClientState()))
+                for sid, metrics in self.client_metrics.items()
+            ]
+
+        # Clients of the same dashboard share subscriptions, build each subset once
+        subsets = {}
+        for sid, metrics, state in clients:
+            if changed:
+                if metrics not in subsets:
+                    if len(metrics) < len(changed):
+                        subset = {m: changed[m] for m in metrics if m in changed}
+                    else:
+                        subset = {m: v for m, v in changed.items() if m in metrics}
+                    subsets[metrics] = subset
+                subset = subsets[metrics]
+                if subset:
+                    state.coalesced += len(state.pending.keys() & subset.keys())
+                    state.pending.update(subset)
+            self._deliver(sid, state, timestamp, now)
+
+    def _deliver(self, sid: str, state: ClientState, timestamp: int, now: float):
+        """Send the coalesced values of one client if its limits allow it."""
+        if not state.pending:
+            return
+        if state.backlog >= MAX_BACKLOG:
+            state.skipped += 1
+            self._handle_slow_client(sid, state)
+            return
+        if state.interval and now - state.last_sent < state.interval:
+            return
 
-        for metric, value in data.items():
-            # Skip internal fields or non-metric data if any
-            if not isinstance(metric, str):
-                continue
-
-            if metric in self.subscriptions and self.subscriptions[metric]:
-                payload = {"metric": metric, "value": value, "timestamp": timestamp}
-                self.socketio.emit("metric_update", payload, room=metric)
+        frame = self._encode(
+            {"timestamp": timestamp, "metrics": state.pending}, state.encoding
+        )
+        state.pending = {}
+        state.last_sent = now
+        if state.ack:
+            state.backlog += 1
+            self.socketio.emit(
+                "metrics_batch",
+                frame,
+                to=sid,
+                callback=lambda *args: self._frame_acked(state),
+            )
+        else:
+            self.socketio.emit("metrics_batch", frame, to=sid)
+        self._frames_sent += 1
+
+    def _frame_acked(self, state: ClientState):
+        """Client confirmed a frame; recover the requested rate once drained."""
+        state.backlog = max(0, state.backlog - 1)
+        if state.backlog == 0:
+            state.strikes = 0
+            if state.interval > state.requested_interval:
+                state.interval = max(state.requested_interval, state.interval / 2)
+
+    def _handle_slow_client(self, sid: str, state: ClientState):
+        """Downgrade a client whose backlog does not drain, drop it eventually."""
+        state.strikes += 1
+        if state.strikes >= MAX_STRIKES:
+            logger.warning(
+                f"Dropping slow WebSocket client {sid} (backlog {state.backlog})"
+            )
+            self._dropped_clients += 1
+            self._cleanup_subscriptions(sid)
+            try:
+                self.socketio.server.disconnect(sid)
+            except Exception as e:
+                logger.debug(f"Failed to disconnect {sid}: {e}")
+            return
+        interval = min(max(state.interval * 2, 1.0), MAX_DOWNGRADE_INTERVAL)
+        if interval != state.interval:
+            state.interval = interval
+            self._downgrades += 1
+            logger.info(f"Slow WebSocket client {sid}, interval now {interval:.0f}s")
 
     def broadcast_dashboard_update(self, dashboard_id: str, data: dict):
         """
@@ -200,8 +473,19 @@ class WebSocketHandler:
         Returns:
             Dictionary with stats
         """
+        with self._lock:
+            clients = dict(self.clients)
         return {
             "total_connections": len(self.socketio.manager.get_namespaces()),
+            "subscribed_clients": len(self.client_metrics),
+            "broadcast_cycles": self._broadcast_cycles,
+            "frames_sent": self._frames_sent,
+            "msgpack_available": MSGPACK_AVAILABLE,
+            "history": history_buffer.get_stats(),
+            "dropped_clients": self._dropped_clients,
+            "downgrades": self._downgrades,
+            "total_backlog": sum(state.backlog for state in clients.values()),
+            "clients": {sid: state.to_dict() for sid, state in clients.items()},
             "metric_subscriptions": {
                 metric: len(sids) for metric, sids in self.subscriptions.items()
             },
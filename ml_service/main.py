@@ -35,6 +35,7 @@ from idm_logger.sensor_addresses import (
     HeatingCircuit,
 )
 from idm_logger.const import HeatPumpStatus
+from idm_logger.vm_client import VMClient
 
 # Configuration
 METRICS_URL = os.environ.get("METRICS_URL", "http://victoriametrics:8428")
@@ -66,6 +67,9 @@ RETRY_MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", "60.0"))
 RETRY_MULTIPLIER = float(os.environ.get("RETRY_MULTIPLIER", "2.0"))
 RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", "3"))
 
+# Pooled VictoriaMetrics client (keep-alive, jittered retries, circuit breaker)
+vm = VMClient(METRICS_URL, retries=RETRY_MAX_ATTEMPTS - 1)
+
 # Circuit and Zone configuration
 ML_CIRCUITS = os.environ.get("ML_CIRCUITS", "A").split(",")
 ML_ZONES = [
@@ -129,6 +133,7 @@ def health():
                 "metrics_failures": connection_stats["metrics_consecutive_failures"],
                 "total_errors": connection_stats["total_fetch_errors"]
                 + connection_stats["total_write_errors"],
+                "victoriametrics": vm.get_stats(),
             },
         }
     ), 200
@@ -382,82 +387,61 @@ def enrich_features(data: dict) -> dict:
 def fetch_latest_data():
     """
     Fetch the latest values for the selected sensors from VictoriaMetrics.
-    Uses exponential backoff retry on transient failures.
+    Transient failures are retried by the shared VM client.
     """
-    query_url = f"{METRICS_URL.rstrip('/')}/api/v1/query"
     data_point = {}
 
     # Query regex to match all relevant metrics
     regex = "|".join([f"{MEASUREMENT_NAME}_{s}" for s in SENSORS])
     query = f'{{__name__=~"{regex}"}}'
 
-    delay = RETRY_BASE_DELAY
-    last_error = None
-
-    for attempt in range(RETRY_MAX_ATTEMPTS):
-        try:
-            response = requests.get(query_url, params={"query": query}, timeout=10)
-            if response.status_code != 200:
-                last_error = f"HTTP {response.status_code}: {response.text[:100]}"
-                if attempt < RETRY_MAX_ATTEMPTS - 1:
-                    logger.debug(f"Fetch attempt {attempt + 1} failed: {last_error}")
-                    time.sleep(delay)
-                    delay = min(delay * RETRY_MULTIPLIER, RETRY_MAX_DELAY)
-                    continue
-                logger.error(
-                    f"Failed to fetch data after {RETRY_MAX_ATTEMPTS} attempts: {last_error}"
-                )
-                connection_stats["total_fetch_errors"] += 1
-                connection_stats["metrics_consecutive_failures"] += 1
-                return None
-
-            json_data = response.json()
-            if json_data.get("status") != "success":
-                logger.error(f"Query returned error status: {json_data}")
-                connection_stats["total_fetch_errors"] += 1
-                return None
-
-            results = json_data.get("data", {}).get("result", [])
-
-            for result in results:
-                metric_name = result["metric"].get("__name__", "")
-                # Extract sensor name by removing prefix
-                sensor_name = metric_name.replace(f"{MEASUREMENT_NAME}_", "")
-
-                if "value" in result:
-                    # PromQL instant query value is [timestamp, "value"]
-                    val = result["value"][1]
-                    try:
-                        data_point[sensor_name] = float(val)
-                    except (ValueError, TypeError):
-                        pass
-
-            # Success - update connection stats
-            connection_stats["metrics_connected"] = True
-            connection_stats["metrics_last_success"] = time.time()
-            connection_stats["metrics_consecutive_failures"] = 0
-            return data_point
-
-        except requests.exceptions.ConnectionError as e:
-            last_error = str(e)
-            if attempt < RETRY_MAX_ATTEMPTS - 1:
-                logger.debug(
-                    f"Connection error on attempt {attempt + 1}, retrying in {delay:.1f}s"
-                )
-                time.sleep(delay)
-                delay = min(delay * RETRY_MULTIPLIER, RETRY_MAX_DELAY)
-                continue
-            logger.error(f"Connection error after {RETRY_MAX_ATTEMPTS} attempts: {e}")
-            connection_stats["metrics_connected"] = False
-            connection_stats["metrics_consecutive_failures"] += 1
+    try:
+        response = vm.query(query)
+        if response.status_code != 200:
+            logger.error(
+                f"Failed to fetch data: HTTP {response.status_code}: {response.text[:100]}"
+            )
             connection_stats["total_fetch_errors"] += 1
+            connection_stats["metrics_consecutive_failures"] += 1
             return None
-        except Exception as e:
-            logger.error(f"Exception fetching data: {e}")
+
+        json_data = response.json()
+        if json_data.get("status") != "success":
+            logger.error(f"Query returned error status: {json_data}")
             connection_stats["total_fetch_errors"] += 1
             return None
 
-    return None
+        results = json_data.get("data", {}).get("result", [])
+
+        for result in results:
+            metric_name = result["metric"].get("__name__", "")
+            # Extract sensor name by removing prefix
+            sensor_name = metric_name.replace(f"{MEASUREMENT_NAME}_", "")
+
+            if "value" in result:
+                # PromQL instant query value is [timestamp, "value"]
+                val = result["value"][1]
+                try:
+                    data_point[sensor_name] = float(val)
+                except (ValueError, TypeError):
+                    pass
+
+        # Success - update connection stats
+        connection_stats["metrics_connected"] = True
+        connection_stats["metrics_last_success"] = time.time()
+        connection_stats["metrics_consecutive_failures"] = 0
+        return data_point
+
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        logger.error(f"Connection error fetching data: {e}")
+        connection_stats["metrics_connected"] = False
+        connection_stats["metrics_consecutive_failures"] += 1
+        connection_stats["total_fetch_errors"] += 1
+        return None
+    except Exception as e:
+        logger.error(f"Exception fetching data: {e}")
+        connection_stats["total_fetch_errors"] += 1
+        return None
 
 
 def write_metrics(
@@ -469,9 +453,9 @@ def write_metrics(
 ):
     """
     Write anomaly and ML performance metrics to VictoriaMetrics.
-    Uses retry logic for transient failures.
+    Not retried: a write that timed out may have landed, and the next
+    update writes fresh values anyway.
     """
-    write_url = f"{METRICS_URL.rstrip('/')}/write"
 
     lines = [
         f"idm_anomaly_score,mode={mode} value={score}",
@@ -482,37 +466,42 @@ def write_metrics(
     ]
 
     data = "\n".join(lines)
-    delay = RETRY_BASE_DELAY
 
-    for attempt in range(RETRY_MAX_ATTEMPTS):
-        try:
-            response = requests.post(write_url, data=data, timeout=5)
-            if response.status_code in (200, 204):
-                return  # Success
-            if attempt < RETRY_MAX_ATTEMPTS - 1:
-                logger.debug(
-                    f"Write attempt {attempt + 1} failed with {response.status_code}"
-                )
-                time.sleep(delay)
-                delay = min(delay * RETRY_MULTIPLIER, RETRY_MAX_DELAY)
-                continue
-            logger.error(
-                f"Failed to write metrics after {RETRY_MAX_ATTEMPTS} attempts: {response.status_code}"
-            )
-            connection_stats["total_write_errors"] += 1
-        except requests.exceptions.ConnectionError:
-            if attempt < RETRY_MAX_ATTEMPTS - 1:
-                time.sleep(delay)
-                delay = min(delay * RETRY_MULTIPLIER, RETRY_MAX_DELAY)
-                continue
-            logger.error(
-                f"Connection error writing metrics after {RETRY_MAX_ATTEMPTS} attempts"
-            )
-            connection_stats["total_write_errors"] += 1
-        except Exception as e:
-            logger.error(f"Exception writing metrics: {e}")
+    try:
+        response = vm.post("/write", data=data, timeout=5)
+        if response.status_code not in (200, 204):
+            logger.error(f"Failed to write metrics: {response.status_code}")
             connection_stats["total_write_errors"] += 1
-            return
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        logger.error(f"Connection error writing metrics: {e}")
+        connection_stats["total_write_errors"] += 1
+    except Exception as e:
+        logger.error(f"Exception writing metrics: {e}")
+        connection_stats["total_write_errors"] += 1
+
+
+def push_score(score: float, is_anomaly: bool, mode: str):
+    """
+    Push the latest score to the IDM Logger so /api/ai/status is served from
+    memory. Best effort: the logger falls back to VictoriaMetrics.
+    """
+    if not INTERNAL_API_KEY:
+        return
+
+    try:
+        requests.post(
+            f"{IDM_LOGGER_URL}/api/internal/ml_score",
+            json={
+                "score": round(score, 4),
+                "is_anomaly": is_anomaly,
+                "mode": mode,
+                "timestamp": int(time.time()),
+            },
+            headers={"X-Internal-Secret": INTERNAL_API_KEY},
+            timeout=2,
+        )
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"Could not push score to IDM Logger: {e}")
 
 
 def get_top_features(model, data, n=3):
@@ -714,6 +703,7 @@ def job():
 
         # Write metrics
         write_metrics(score, is_anomaly, len(data), processing_time, mode)
+        push_score(score, is_anomaly, mode)
 
         # Send alert if anomaly detected AND confirmed (debounce) AND warmed up
         if is_anomaly and model_trained:
@@ -747,7 +737,6 @@ def wait_for_connection():
     Wait for VictoriaMetrics to be reachable.
     Uses exponential backoff to avoid overwhelming the service during startup.
     """
-    query_url = f"{METRICS_URL.rstrip('/')}/api/v1/query"
     delay = RETRY_BASE_DELAY
     attempt = 0
 
@@ -756,7 +745,8 @@ def wait_for_connection():
     while True:
         attempt += 1
         try:
-            response = requests.get(query_url, params={"query": "up"}, timeout=5)
+            # Probe without client retries, this loop does its own backoff
+            response = vm.query("up", retries=0, timeout=5)
             if response.status_code == 200:
                 logger.info(
                     f"Successfully connected to VictoriaMetrics after {attempt} attempt(s)."
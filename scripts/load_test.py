@@ -0,0 +1,150 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+"""
+Simple HTTP load test for the IDM Logger web UI.
+
+Simulates dashboards polling the API at increasing concurrency and prints
+throughput and latency percentiles per step. Run it once per server mode
+to compare concurrency headroom, e.g.:
+
+    # threaded servers
+    WEB_SERVER=waitress RATELIMIT_ENABLED=false python -m idm_logger
+    python scripts/load_test.py --password secret --label waitress
+
+    # gevent
+    WEB_SERVER=gevent RATELIMIT_ENABLED=false python -m idm_logger
+    python scripts/load_test.py --password secret --label gevent
+
+The default mix contains a long range query (slow VictoriaMetrics call)
+next to cheap endpoints, which is where a fixed thread pool starts to
+queue requests. Rate limiting (200/min per client) must be disabled with
+RATELIMIT_ENABLED=false, otherwise most requests are answered with 429.
+"""
+
+import argparse
+import itertools
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+DEFAULT_PATHS = [
+    "/api/health",
+    "/api/metrics/current",
+    "/api/ai/status",
+    "/api/metrics/query_range?query=idm_heatpump_temp_outside"
+    "&start={week_ago}&end={now}&step=60&max_points=1000",
+]
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _login(session, base_url, password):
+    if not password:
+        return
+    response = session.post(
+        f"{base_url}/login", json={"password": password}, timeout=10
+    )
+    if response.status_code != 200:
+        sys.exit(f"Login failed: HTTP {response.status_code}")
+
+
+def run_step(base_url, password, paths, concurrency, duration):
+    """Run `concurrency` workers for `duration` seconds and collect results."""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset):
+        session = requests.Session()
+        _login(session, base_url, password)
+        for path in itertools.islice(itertools.cycle(paths), offset, None):
+            if time.monotonic() >= deadline:
+                break
+            now = int(time.time())
+            url = base_url + path.format(now=now, week_ago=now - 7 * 86400)
+            start = time.perf_counter()
+            try:
+                status = session.get(url, timeout=60).status_code
+            except requests.RequestException:
+                status = "error"
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), daemon=True)
+        for i in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50": _percentile(latencies, 50),
+        "p95": _percentile(latencies, 95),
+        "p99": _percentile(latencies, 99),
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+        "statuses": statuses,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--password", help="Admin password (for /api endpoints)")
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,8,16,32",
+        help="Comma separated list of concurrent clients per step",
+    )
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per step")
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        help="Request path (repeatable), default is a dashboard-like mix",
+    )
+    parser.add_argument("--label", default="", help="Label printed with results")
+    args = parser.parse_args(argv)
+
+    base_url = args.url.rstrip("/")
+    paths = args.paths or DEFAULT_PATHS
+    steps = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    print(f"Load test {args.label} against {base_url} ({args.duration:.0f}s/step)")
+    print(
+        f"{'clients':>7} {'requests':>9} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8}  status codes"
+    )
+    for concurrency in steps:
+        result = run_step(base_url, args.password, paths, concurrency, args.duration)
+        codes = ", ".join(
+            f"{k}: {v}" for k, v in sorted(result["statuses"].items(), key=str)
+        )
+        print(
+            f"{result['concurrency']:>7} {result['requests']:>9} "
+            f"{result['rps']:>8.1f} {result['p50']:>8.1f} "
+            f"{result['p95']:>8.1f} {result['p99']:>8.1f}  {codes}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ import os
 # Add repo root to path
 sys.path.append(os.getcwd())
 
+from idm_logger.alert_rules import SensorWindow, TimerWheel
 from idm_logger.alerts import AlertManager
 
 
@@ -110,6 +111,202 @@ class TestAlertManager(unittest.TestCase):
             "Status OK", subject="IDM Alert: Status Report"
         )
 
+    def _threshold_alert(self, alert_id, sensor, condition, threshold, interval=60):
+        return {
+            "id": alert_id,
+            "name": f"Alert {alert_id}",
+            "type": "threshold",
+            "sensor": sensor,
+            "condition": condition,
+            "threshold": threshold,
+            "message": "{sensor}={value}",
+            "enabled": True,
+            "interval_seconds": interval,
+            "last_triggered": 0,
+        }
+
+    def test_only_rules_of_changed_sensors_are_evaluated(self):
+        self.alert_manager.alerts = [
+            self._threshold_alert("1", "temp", ">", "50"),
+            self._threshold_alert("2", "mode", "=", "heating"),
+        ]
+        with patch(
+            "idm_logger.alert_rules.CompiledRule.matches", autospec=True
+        ) as matches:
+            matches.return_value = False
+            self.alert_manager.check_alerts({"temp": 40, "mode": "off"})
+            self.assertEqual(matches.call_count, 2)
+            self.alert_manager.check_alerts({"temp": 41, "mode": "off"})
+            self.assertEqual(matches.call_count, 3)
+
+    def test_string_condition_and_disabled_rules(self):
+        disabled = self._threshold_alert("2", "temp", ">", "0")
+        disabled["enabled"] = False
+        self.alert_manager.alerts = [
+            self._threshold_alert("1", "mode", "=", "heating"),
+            disabled,
+        ]
+        self.alert_manager.check_alerts({"mode": "heating", "temp": 20})
+        self.mock_notification_manager.send_all.assert_called_once_with(
+            "mode=heating", subject="IDM Alert: Alert 1"
+        )
+        self.assertEqual(self.alert_manager.get_stats()["compiled_rules"], 1)
+
+    def test_update_recompiles_rule(self):
+        self.alert_manager.alerts = [self._threshold_alert("1", "temp", ">", "50")]
+        self.alert_manager.check_alerts({"temp": 40})
+        self.alert_manager.update_alert("1", {"threshold": "30"})
+        self.alert_manager.check_alerts({"temp": 40})
+        self.mock_notification_manager.send_all.assert_called_once()
+
+    def test_status_alert_waits_for_interval(self):
+        alert = {
+            "id": "2",
+            "name": "Status Report",
+            "type": "status",
+            "message": "Status OK",
+            "enabled": True,
+            "interval_seconds": 3600,
+            "last_triggered": 0,
+        }
+        self.alert_manager.alerts = [alert]
+        now = time.time()
+        with patch("idm_logger.alerts.time.time", return_value=now):
+            self.alert_manager.check_alerts({})
+        with patch("idm_logger.alerts.time.time", return_value=now + 1800):
+            self.alert_manager.check_alerts({})
+        self.assertEqual(self.mock_notification_manager.send_all.call_count, 1)
+        with patch("idm_logger.alerts.time.time", return_value=now + 3601):
+            self.alert_manager.check_alerts({})
+        self.assertEqual(self.mock_notification_manager.send_all.call_count, 2)
+
+    def _run(self, samples, start=1_000_000.0):
+        """Feed (offset_seconds, value) samples at patched times."""
+        for offset, value in samples:
+            with patch("idm_logger.alerts.time.time", return_value=start + offset):
+                self.alert_manager.check_alerts({"temp": value})
+
+    def test_for_seconds_requires_condition_to_hold(self):
+        alert = self._threshold_alert("1", "temp", ">", "50", interval=0)
+        alert["for_seconds"] = 30
+        self.alert_manager.alerts = [alert]
+
+        # Drops below in between, so the hold time starts over
+        self._run([(0, 60), (20, 60), (25, 40), (30, 60), (55, 61)])
+        self.mock_notification_manager.send_all.assert_not_called()
+        self._run([(60, 61)])
+        self.mock_notification_manager.send_all.assert_called_once_with(
+            "temp=61", subject="IDM Alert: Alert 1"
+        )
+
+    def test_rolling_mean_ignores_single_spike(self):
+        alert = self._threshold_alert("1", "temp", ">", "50")
+        alert.update(aggregate="mean", window_seconds=60)
+        self.alert_manager.alerts = [alert]
+
+        self._run([(t, 40) for t in range(0, 50, 10)] + [(50, 90)])
+        self.mock_notification_manager.send_all.assert_not_called()
+        self._run([(60, 90)])
+        # Window [0, 60]: five times 40 and twice 90
+        self.mock_notification_manager.send_all.assert_called_once_with(
+            "temp=54.29", subject="IDM Alert: Alert 1"
+        )
+
+    def test_delta_over_window(self):
+        alert = self._threshold_alert("1", "temp", "<", "-5")
+        alert.update(aggregate="delta", window_seconds=120)
+        self.alert_manager.alerts = [alert]
+
+        self._run([(0, 50), (60, 48), (120, 46)])
+        self.mock_notification_manager.send_all.assert_not_called()
+        self._run([(130, 42)])
+        self.mock_notification_manager.send_all.assert_called_once()
+
+    def test_windows_survive_recompile(self):
+        alert = self._threshold_alert("1", "temp", ">", "50")
+        alert.update(aggregate="max", window_seconds=300)
+        self.alert_manager.alerts = [alert]
+        self._run([(0, 45)])
+        self.alert_manager.update_alert("1", {"threshold": "40"})
+        self._run([(10, 30)])
+        self.mock_notification_manager.send_all.assert_called_once_with(
+            "temp=45", subject="IDM Alert: Alert 1"
+        )
+
+    def test_alerts_of_one_cycle_are_sent_as_digest(self):
+        alerts = [
+            self._threshold_alert("1", "temp_flow", ">", "50"),
+            self._threshold_alert("2", "pressure", ">", "3"),
+            self._threshold_alert("3", "temp_flow", ">", "40"),
+        ]
+        alerts[1]["severity"] = "critical"
+        self.alert_manager.alerts = alerts
+
+        self.alert_manager.check_alerts({"temp_flow": 60, "pressure": 4})
+        self.mock_notification_manager.send_all.assert_called_once()
+        message = self.mock_notification_manager.send_all.call_args.args[0]
+        subject = self.mock_notification_manager.send_all.call_args.kwargs["subject"]
+        self.assertEqual(subject, "IDM Alert: 3 Alarme")
+        lines = message.splitlines()
+        self.assertIn("1 Kritisch, 2 Warnung", lines[0])
+        # Critical first, then grouped by sensor
+        self.assertEqual(lines[2:5], ["[Kritisch]", "pressure", "- pressure=4"])
+        # Two rules on the same sensor share one heading
+        self.assertEqual(
+            lines[6:], ["[Warnung]", "temp_flow", "- temp_flow=60", "- temp_flow=60"]
+        )
+
+    def test_digest_window_collapses_repeats(self):
+        alert = self._threshold_alert("1", "temp", ">", "50", interval=0)
+        self.alert_manager.alerts = [alert]
+        with patch("idm_logger.alerts.config.get", return_value=60):
+            self._run([(0, 60), (1, 61), (2, 62)])
+        self.mock_notification_manager.send_all.assert_not_called()
+
+        self.alert_manager.digest.flush()
+        message = self.mock_notification_manager.send_all.call_args.args[0]
+        self.assertTrue(message.endswith("- temp=62 (3x)"))
+        self.assertEqual(
+            self.alert_manager.get_stats()["digest"]["repeats_collapsed"], 2
+        )
+
+
+class TestSensorWindow(unittest.TestCase):
+    def test_matches_brute_force(self):
+        import random
+
+        rng = random.Random(7)
+        window = SensorWindow(30)
+        samples = []
+        for t in range(500):
+            value = rng.uniform(-10, 10)
+            window.push(float(t), value)
+            samples.append((t, value))
+            current = [v for ts, v in samples if ts >= t - 30]
+            self.assertAlmostEqual(
+                window.aggregate("mean"), sum(current) / len(current)
+            )
+            self.assertEqual(window.aggregate("max"), max(current))
+            self.assertEqual(window.aggregate("min"), min(current))
+            self.assertEqual(window.aggregate("delta"), current[-1] - current[0])
+
+        window.expire(1000.0)
+        self.assertIsNone(window.aggregate("mean"))
+
+
+class TestTimerWheel(unittest.TestCase):
+    def test_timers_beyond_one_revolution(self):
+        wheel = TimerWheel(now=1000, slots=8)
+        wheel.schedule(1003, "a")
+        wheel.schedule(1020, "b")  # same slot as 1004 after wrapping
+        wheel.schedule(900, "late")
+
+        self.assertEqual(wheel.advance(1001), ["late"])
+        self.assertEqual(wheel.advance(1010), ["a"])
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(1019), [])
+        self.assertEqual(wheel.advance(5000), ["b"])
+
 
 if __name__ == "__main__":
     unittest.main()
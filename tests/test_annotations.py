@@ -0,0 +1,112 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from idm_logger.annotations import AnnotationManager
+from idm_logger.db import Database
+
+
+class FakeConfig:
+    def __init__(self, data=None, settings=None):
+        self.data = data or {}
+        self.settings = settings or {}
+        self.save = MagicMock()
+
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
+
+
+# Recent enough to survive the default retention
+NOW = int(time.time())
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "annotations.db"))
+    yield database
+    database.close()
+
+
+def test_legacy_annotations_are_moved_out_of_config(database):
+    config = FakeConfig(
+        {
+            "annotations": [
+                {"id": "a", "time": NOW - 100, "text": "Filter gewechselt"},
+                {"id": "b", "time": NOW - 50, "text": "Wartung", "dashboard_id": "d1"},
+            ]
+        }
+    )
+    manager = AnnotationManager(config, database=database)
+
+    assert "annotations" not in config.data
+    config.save.assert_called_once()
+    assert [a.id for a in manager.get_all_annotations()] == ["b", "a"]
+
+    # A second start finds nothing left to migrate
+    AnnotationManager(config, database=database)
+    assert config.save.call_count == 1
+
+
+def test_query_filters_and_pagination(database):
+    manager = AnnotationManager(FakeConfig(), database=database)
+    manager.add_annotation(time=NOW + 100, text="global")
+    manager.add_annotation(time=NOW + 200, text="d1", dashboard_id="d1")
+    manager.add_annotation(time=NOW + 300, text="d2", dashboard_id="d2")
+    anomaly = manager.add_annotation(time=NOW + 400, text="ML", tags=["ai", "anomaly"])
+
+    texts = [a.text for a in manager.get_annotations_for_dashboard("d1")]
+    assert texts == ["ML", "d1", "global"]
+    texts = [
+        a.text for a in manager.get_annotations_for_time_range(NOW + 150, NOW + 350)
+    ]
+    assert texts == ["d2", "d1"]
+    texts = [
+        a.text
+        for a in manager.get_annotations_for_time_range(NOW + 150, NOW + 350, "d1")
+    ]
+    assert texts == ["d1"]
+
+    page, total = manager.query(limit=2, offset=1)
+    assert total == 4
+    assert [a.text for a in page] == ["d2", "d1"]
+
+    unacknowledged, total = manager.query(tag="anomaly", acknowledged=False)
+    assert [a.id for a in unacknowledged] == [anomaly.id] and total == 1
+    assert manager.update_annotation(anomaly.id, acknowledged=True).acknowledged
+    assert manager.query(tag="anomaly", acknowledged=False) == ([], 0)
+
+
+def test_update_and_delete(database):
+    manager = AnnotationManager(FakeConfig(), database=database)
+    annotation = manager.add_annotation(time=NOW + 100, text="alt", tags=["x"])
+
+    updated = manager.update_annotation(annotation.id, text="neu", tags=["y"])
+    assert updated.text == "neu" and updated.tags == ["y"] and updated.time == NOW + 100
+    assert manager.update_annotation("missing", text="x") is None
+
+    assert manager.delete_annotation(annotation.id) is True
+    assert manager.delete_annotation(annotation.id) is False
+    assert manager.get_annotation(annotation.id) is None
+
+
+def test_retention(database):
+    config = FakeConfig(
+        settings={"annotations.retention_days": 1, "annotations.max_count": 2}
+    )
+    manager = AnnotationManager(config, database=database)
+    now = NOW
+    database.add_annotations(
+        [
+            {"id": str(offset), "time": now - offset, "text": str(offset)}
+            for offset in (2 * 86400, 3600, 60, 1)
+        ]
+    )
+
+    assert manager.prune(now=now) == 2
+    assert [a.text for a in manager.get_all_annotations()] == ["1", "60"]
+
+    config.settings = {"annotations.retention_days": 0, "annotations.max_count": 0}
+    assert manager.prune(now=now * 2) == 0
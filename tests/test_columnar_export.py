@@ -0,0 +1,171 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import io
+import pytest
+from unittest.mock import MagicMock, patch
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+
+from idm_logger import export  # noqa: E402
+from idm_logger.export import ColumnarExporter, build_schema, parse_step  # noqa: E402
+
+
+def _response(payload, status=200):
+    response = MagicMock()
+    response.status_code = status
+    response.json.return_value = payload
+    return response
+
+
+def _fake_vm(names, start, step, points):
+    """Return a session.request side effect serving label values and query_range."""
+
+    def get(method, url, params=None, timeout=None):
+        if url.endswith("/api/v1/label/__name__/values"):
+            return _response({"status": "success", "data": names})
+        window_start = float(params["start"])
+        window_end = float(params["end"])
+        result = []
+        for i, name in enumerate(names):
+            values = [
+                [start + n * step, str(float(i * 100 + n))]
+                for n in range(points)
+                if window_start <= start + n * step <= window_end
+            ]
+            result.append({"metric": {"__name__": name}, "values": values})
+        return _response({"status": "success", "data": {"result": result}})
+
+    return get
+
+
+class TestColumnarExport:
+    def test_parse_step(self):
+        assert parse_step("30s") == 30
+        assert parse_step("1m") == 60
+        assert parse_step("2h") == 7200
+        assert parse_step(15) == 15
+        with pytest.raises(ValueError):
+            parse_step("abc")
+
+    def test_schema_types_follow_sensor_definitions(self):
+        schema = build_schema(
+            [
+                "idm_heatpump_temp_outside",
+                "idm_heatpump_status_heat_pump",
+                "idm_heatpump_failure_heat_pump",
+                "idm_anomaly_score_value",
+            ]
+        )
+        assert schema.field("timestamp").type == pa.timestamp("ms", tz="UTC")
+        assert schema.field("idm_heatpump_temp_outside").type == pa.float32()
+        assert schema.field("idm_heatpump_status_heat_pump").type == pa.uint16()
+        assert schema.field("idm_heatpump_failure_heat_pump").type == pa.bool_()
+        assert schema.field("idm_anomaly_score_value").type == pa.float32()
+
+    def test_parquet_written_in_row_groups(self, monkeypatch):
+        monkeypatch.setattr(export, "ROW_GROUP_POINTS", 10)
+        names = ["idm_heatpump_temp_outside", "idm_heatpump_status_heat_pump"]
+        exporter = ColumnarExporter("http://vm:8428", step="1m")
+
+        with patch.object(
+            exporter.client.session,
+            "request",
+            side_effect=_fake_vm(names, 1000, 60, 25),
+        ):
+            sink = io.BytesIO()
+            summary = exporter.export(sink, 1000, 1000 + 24 * 60, "parquet")
+
+        assert summary["rows"] == 25
+        assert summary["row_groups"] == 3
+
+        sink.seek(0)
+        parquet_file = pq.ParquetFile(sink)
+        assert parquet_file.metadata.num_row_groups == 3
+        assert parquet_file.metadata.row_group(0).column(1).compression == "ZSTD"
+
+        table = parquet_file.read()
+        assert table.column_names == ["timestamp", *sorted(names)]
+        temps = table.column("idm_heatpump_temp_outside").to_pylist()
+        assert temps == [float(n) for n in range(25)]
+        status = table.column("idm_heatpump_status_heat_pump").to_pylist()
+        assert status[:3] == [100, 101, 102]
+
+    def test_arrow_ipc_with_gaps(self):
+        exporter = ColumnarExporter(
+            "http://vm:8428", metrics=["idm_heatpump_temp_outside", "other"], step=60
+        )
+        results = {
+            "idm_heatpump_temp_outside": [[1000, "1.5"], [1120, "2.5"]],
+            "other": [[1060, "7"]],
+        }
+
+        def get(method, url, params=None, timeout=None):
+            values = results[params["query"]]
+            return _response(
+                {
+                    "status": "success",
+                    "data": {"result": [{"metric": {}, "values": values}]},
+                }
+            )
+
+        with patch.object(exporter.client.session, "request", side_effect=get):
+            sink = io.BytesIO()
+            summary = exporter.export(sink, 1000, 1120, "arrow")
+
+        assert summary["rows"] == 3
+        sink.seek(0)
+        table = pa.ipc.open_file(sink).read_all()
+        assert table.column("idm_heatpump_temp_outside").to_pylist() == [
+            1.5,
+            None,
+            2.5,
+        ]
+        assert table.column("other").to_pylist() == [None, 7.0, None]
+
+    def test_export_endpoint_parquet(self):
+        from idm_logger import web
+
+        web.app.config["TESTING"] = True
+        client = web.app.test_client()
+        with client.session_transaction() as sess:
+            sess["logged_in"] = True
+
+        names = ["idm_heatpump_temp_outside"]
+        with patch(
+            "idm_logger.vm_client.requests.Session.request",
+            side_effect=_fake_vm(names, 1000, 60, 5),
+        ):
+            response = client.post(
+                "/api/export/data",
+                json={"format": "parquet", "start": 1000, "end": 1240, "step": "1m"},
+            )
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/vnd.apache.parquet"
+        table = pq.read_table(io.BytesIO(response.data))
+        assert table.num_rows == 5
+
+
+def test_cli_normalizes_base_url(tmp_path):
+    exporter = MagicMock()
+    exporter.return_value.export.return_value = {
+        "rows": 0,
+        "columns": 0,
+        "row_groups": 0,
+    }
+    with patch.object(export, "ColumnarExporter", exporter):
+        code = export.main(
+            [
+                "--start",
+                "1000",
+                "--url",
+                "http://proxy/write-gateway/vm/api/v1/write/",
+                "-o",
+                str(tmp_path / "out.parquet"),
+            ]
+        )
+
+    assert code == 0
+    # Only the write endpoint is stripped, not "/write" inside the path
+    assert exporter.call_args[0][0] == "http://proxy/write-gateway/vm"
@@ -0,0 +1,136 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import json
+from unittest.mock import patch
+
+import pytest
+
+import idm_logger.config as config_module
+from idm_logger.config import Config
+
+
+class FakeSettings:
+    def __init__(self):
+        self.values = {}
+        self.writes = 0
+
+    def get_setting(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set_setting(self, key, value):
+        self.writes += 1
+        self.values[key] = value
+
+
+@pytest.fixture
+def settings(tmp_path):
+    settings = FakeSettings()
+    with (
+        patch.object(config_module, "db", settings),
+        patch.object(config_module, "KEY_FILE", str(tmp_path / ".secret.key")),
+        patch.object(config_module, "SAVE_DEBOUNCE", 60.0),
+    ):
+        yield settings
+
+
+def test_get_reads_snapshot(settings):
+    config = Config()
+    assert config.get("logging.interval") == 30
+    assert config.get("logging.missing", "x") == "x"
+    assert config.get("idm.circuits") == ["A"]
+
+    # Containers are copies, the snapshot cannot be changed through them
+    config.get("idm.circuits").append("B")
+    assert config.get("idm.circuits") == ["A"]
+
+    version = config.snapshot.version
+    config.set("logging.interval", 10)
+    assert config.get("logging.interval") == 10
+    assert config.snapshot.version > version
+
+    config.data["internal_api_key"] = "secret"
+    assert config.get("internal_api_key") == "secret"
+
+    # Nested in-place edits are published with save()
+    config.data["logging"]["interval"] = 5
+    assert config.get("logging.interval") == 10
+    config.save()
+    assert config.get("logging.interval") == 5
+
+
+def test_accessor_and_subscriptions(settings):
+    config = Config()
+    interval = config.accessor("logging.interval", 60)
+    assert interval() == 30
+
+    calls = []
+    unsubscribe = config.subscribe(["mqtt"], calls.append)
+    config.set("logging.interval", 15)
+    assert interval() == 15
+    assert calls == []
+
+    config.set("mqtt.broker", "broker.local")
+    config.get("mqtt.broker")
+    assert len(calls) == 1
+    assert calls[0].get("mqtt.broker") == "broker.local"
+
+    unsubscribe()
+    config.set("mqtt.port", 1884)
+    config.get("mqtt.port")
+    assert len(calls) == 1
+
+
+def test_saves_are_debounced_and_diff_based(settings):
+    config = Config()
+    writes = settings.writes
+
+    config.set("mqtt.password", "geheim")
+    config.save()
+    config.save()
+    assert settings.writes == writes
+    config.flush()
+    assert settings.writes == writes + 1
+
+    stored = json.loads(settings.values["config"])
+    assert "password" not in stored["mqtt"]
+    token = stored["mqtt"]["encrypted_password"]
+
+    # Unchanged data is not written again
+    config.save()
+    config.flush()
+    assert settings.writes == writes + 1
+    assert config.saves_skipped == 1
+
+    # Only changed secrets get a new token
+    config.set("email.password", "anders")
+    config.save(immediate=True)
+    stored = json.loads(settings.values["config"])
+    assert stored["mqtt"]["encrypted_password"] == token
+
+    reloaded = Config()
+    assert reloaded.get("mqtt.password") == "geheim"
+    assert reloaded.get("email.password") == "anders"
+
+
+def test_failed_save_stays_pending(settings):
+    config = Config()
+    writes = settings.writes
+    set_setting = settings.set_setting
+
+    def fail(key, value):
+        raise OSError("disk full")
+
+    settings.set_setting = fail
+
+    config.set("logging.interval", 45)
+    config.save()
+    with pytest.raises(OSError):
+        config.flush()
+    assert config.get_stats()["save_pending"] is True
+    assert config._save_timer is not None
+
+    settings.set_setting = set_setting
+    config.flush()
+    assert settings.writes == writes + 1
+    assert json.loads(settings.values["config"])["logging"]["interval"] == 45
+    assert config._save_timer is None
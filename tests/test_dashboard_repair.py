@@ -1,23 +1,33 @@
 # Xerolux 2026
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 import sys
 import os
+import shutil
+import tempfile
 
 sys.path.append(os.getcwd())
 
 from idm_logger.dashboard_config import DashboardManager, get_default_dashboards
+from idm_logger.db import Database
+
+
+class FakeConfig:
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.save = MagicMock()
 
 
 class TestDashboardRepair(unittest.TestCase):
     def setUp(self):
-        self.mock_config = MagicMock()
-        # Mock the config.data dictionary
-        self.mock_config.data = {}
-        self.mock_config.save = MagicMock()
+        self.tmpdir = tempfile.mkdtemp()
+        self.database = Database(os.path.join(self.tmpdir, "dashboards.db"))
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self.tmpdir)
 
-    @patch("idm_logger.dashboard_config.config", new_callable=MagicMock)
-    def test_repair_broken_dashboard(self, mock_config_module):
+    def test_repair_broken_dashboard(self):
         # Setup broken dashboard data
         broken_dashboard = {
             "id": "default",
@@ -27,19 +37,16 @@ class TestDashboardRepair(unittest.TestCase):
                 {"title": "Some Other Chart", "id": "2", "queries": [], "hours": 24},
             ],
         }
+        config = FakeConfig({"dashboards": [broken_dashboard]})
 
-        # Configure the mock config to return this data
-        mock_config_module.data = {"dashboards": [broken_dashboard]}
-        mock_config_module.save = MagicMock()
+        manager = DashboardManager(config, database=self.database)
 
-        # Initialize manager - this triggers __init__ which calls _repair_broken_dashboards
-        _ = DashboardManager()
+        # Dashboards were moved out of the config
+        config.save.assert_called_once()
+        self.assertNotIn("dashboards", config.data)
 
-        # Verify that save was called (implying a change was made)
-        mock_config_module.save.assert_called()
-
-        # Verify that the dashboard was replaced
-        dashboards = mock_config_module.data["dashboards"]
+        # Repaired when loaded
+        dashboards = manager.get_all_dashboards()
         self.assertEqual(len(dashboards), 1)
         self.assertEqual(dashboards[0]["name"], "Home Dashboard")  # Default name
 
@@ -47,29 +54,111 @@ class TestDashboardRepair(unittest.TestCase):
         titles = [c["title"] for c in dashboards[0]["charts"]]
         self.assertNotIn("Underfloor Heating", titles)
         self.assertIn("Wärmepumpe Temperaturen", titles)
+        self.assertEqual(self.database.get_dashboards(), dashboards)
 
-    @patch("idm_logger.dashboard_config.config", new_callable=MagicMock)
-    def test_no_repair_needed(self, mock_config_module):
+    def test_no_repair_needed(self):
         # Setup good dashboard data
         good_dashboard = get_default_dashboards()[0]
+        config = FakeConfig({"dashboards": [good_dashboard]})
 
-        mock_config_module.data = {"dashboards": [good_dashboard]}
-        mock_config_module.save = MagicMock()
-
-        _ = DashboardManager()
-
-        # Verify that save was NOT called (implying no change needed)
-        # Wait, _ensure_dashboards_key calls save if key is missing, but here it is present.
-        # But _repair_broken_dashboards only calls save if repaired=True.
-        # However, verifying save not called might be tricky if other methods call it.
-        # Let's verify the data hasn't changed.
+        manager = DashboardManager(config, database=self.database)
+        revisions = self.database.get_dashboard_revisions()
+        dashboards = manager.get_all_dashboards()
 
-        dashboards = mock_config_module.data["dashboards"]
+        # Loading did not write anything
+        self.assertEqual(self.database.get_dashboard_revisions(), revisions)
         self.assertEqual(dashboards[0]["id"], good_dashboard["id"])
         self.assertEqual(
             dashboards[0]["charts"][0]["title"], good_dashboard["charts"][0]["title"]
         )
 
+    def test_defaults_without_dashboards(self):
+        manager = DashboardManager(FakeConfig(), database=self.database)
+        self.assertEqual([d["id"] for d in manager.get_all_dashboards()], ["default"])
+
+
+class TestDashboardStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.database = Database(os.path.join(self.tmpdir, "dashboards.db"))
+        self.manager = DashboardManager(FakeConfig(), database=self.database)
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_chart_changes_count_the_dashboard_revision(self):
+        other = self.manager.create_dashboard("Other")
+        revision = self.manager.get_dashboard(other["id"])["revision"]
+        etag_all = self.manager.etag()
+        etag_default = self.manager.etag("default")
+        etag_other = self.manager.etag(other["id"])
+        self.assertEqual(self.manager.etag(), etag_all)
+
+        chart = self.manager.add_chart(other["id"], "Neu", [{"query": "a"}], 6)
+        updated = self.manager.update_chart(other["id"], chart["id"], {"hours": 48})
+        self.assertEqual(updated["hours"], 48)
+        self.assertEqual(updated["title"], "Neu")
+
+        self.assertNotEqual(self.manager.etag(other["id"]), etag_other)
+        self.assertNotEqual(self.manager.etag(), etag_all)
+        self.assertEqual(self.manager.etag("default"), etag_default)
+        self.assertGreater(
+            self.manager.get_dashboard(other["id"])["revision"], revision
+        )
+
+        self.assertIsNone(self.manager.update_chart(other["id"], "missing", {}))
+        self.assertIsNone(self.manager.add_chart("missing", "x", [], 1))
+        self.assertIsNone(self.manager.etag("missing"))
+        self.assertTrue(self.manager.delete_chart(other["id"], chart["id"]))
+        self.assertFalse(self.manager.delete_chart(other["id"], chart["id"]))
+
+    def test_update_dashboard_keeps_chart_order(self):
+        dashboard = self.manager.get_dashboard("default")
+        charts = list(reversed(dashboard["charts"]))
+
+        updated = self.manager.update_dashboard(
+            "default", {"charts": charts, "customCss": "body {}", "revision": 99}
+        )
+        self.assertEqual(updated["charts"], charts)
+        self.assertEqual(updated["customCss"], "body {}")
+        self.assertGreater(updated["revision"], dashboard["revision"])
+        self.assertIsNone(self.manager.update_dashboard("missing", {"name": "x"}))
+
+    def test_delete_and_restore(self):
+        self.assertFalse(self.manager.delete_dashboard("default"))
+        other = self.manager.create_dashboard("Other")
+        self.assertTrue(self.manager.delete_dashboard("default"))
+        self.assertEqual(
+            [d["id"] for d in self.manager.get_all_dashboards()], [other["id"]]
+        )
+
+        etag = self.manager.etag()
+        self.manager.restore([other, get_default_dashboards()[0]])
+        self.assertEqual(
+            [d["id"] for d in self.manager.get_all_dashboards()],
+            [other["id"], "default"],
+        )
+        # A restored dashboard does not reuse an old revision
+        self.assertNotEqual(self.manager.etag(), etag)
+
+    def test_recreated_dashboard_gets_new_etag(self):
+        etag = self.manager.etag("default")
+        self.manager.create_dashboard("Other")
+        self.manager.delete_dashboard("default")
+        self.manager.restore(
+            [d for d in self.manager.get_all_dashboards()] + get_default_dashboards()
+        )
+        self.assertNotEqual(self.manager.etag("default"), etag)
+
+    def test_fresh_database_does_not_reuse_revisions(self):
+        etag = self.manager.etag()
+        self.database.close()
+        os.remove(os.path.join(self.tmpdir, "dashboards.db"))
+        self.database = Database(os.path.join(self.tmpdir, "dashboards.db"))
+        manager = DashboardManager(FakeConfig(), database=self.database)
+        self.assertNotEqual(manager.etag(), etag)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,146 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import sqlite3
+import threading
+
+import pytest
+
+from idm_logger.db import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "test.db"), read_pool_size=2)
+    yield database
+    database.close()
+
+
+def test_wal_mode_and_roundtrip(database):
+    assert database.journal_mode == "wal"
+    database.set_setting("config", '{"a": 1}')
+    assert database.get_setting("config") == '{"a": 1}'
+    assert database.get_setting("missing", "default") == "default"
+
+    database.set_settings({"one": "1", "two": "2"})
+    settings = database.get_all_settings()
+    assert settings["one"] == "1" and settings["two"] == "2"
+
+
+def test_reads_do_not_wait_for_writes(database):
+    database.set_setting("key", "old")
+    inside_write = threading.Event()
+    release_write = threading.Event()
+
+    def slow_write(conn):
+        conn.execute("UPDATE settings SET value='new' WHERE key='key'")
+        inside_write.set()
+        release_write.wait(5)
+
+    writer = threading.Thread(target=database._write, args=("slow", slow_write))
+    writer.start()
+    try:
+        assert inside_write.wait(5)
+        # The write is not committed yet; the reader sees the last commit
+        assert database.get_setting("key") == "old"
+    finally:
+        release_write.set()
+        writer.join(5)
+    assert database.get_setting("key") == "new"
+
+
+def test_read_connections_are_read_only(database):
+    with pytest.raises(sqlite3.OperationalError):
+        database._read(
+            "bad", lambda conn: conn.execute("DELETE FROM settings").fetchall()
+        )
+
+
+def test_queued_writes_share_one_transaction(database):
+    blocking = threading.Event()
+    release = threading.Event()
+
+    def block(conn):
+        blocking.set()
+        release.wait(5)
+
+    blocker = threading.Thread(target=database._write, args=("block", block))
+    blocker.start()
+    assert blocking.wait(5)
+    threads = [
+        threading.Thread(target=database.set_setting, args=(f"k{i}", str(i)))
+        for i in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    while database._write_queue.qsize() < 10:
+        threading.Event().wait(0.01)
+    transactions = database.transactions
+    release.set()
+    blocker.join(5)
+    for thread in threads:
+        thread.join(5)
+
+    assert database.transactions - transactions == 2
+    assert database.max_group == 10
+    assert len(database.get_all_settings()) == 10
+
+
+def test_failed_write_does_not_undo_others(database):
+    database.add_job(
+        {
+            "id": "job1",
+            "sensor": "s",
+            "value": 1,
+            "time": "08:00",
+            "days": ["Mon"],
+            "enabled": True,
+        }
+    )
+    with pytest.raises(sqlite3.IntegrityError):
+        database.add_job(
+            {
+                "id": "job1",
+                "sensor": "s",
+                "value": 1,
+                "time": "08:00",
+                "days": [],
+                "enabled": True,
+            }
+        )
+    database.update_job("job1", {"enabled": False, "bogus": 1})
+    jobs = database.get_jobs()
+    assert len(jobs) == 1 and jobs[0]["enabled"] == 0
+
+
+def test_query_stats(database):
+    database.set_setting("a", "1")
+    database.get_setting("a")
+    database.get_setting("a")
+    database.checkpoint()
+
+    stats = database.get_stats()
+    assert stats["queries"]["get_setting"]["count"] == 2
+    assert stats["queries"]["set_setting"]["count"] == 1
+    assert "checkpoint" in stats["queries"]
+    assert stats["read_pool"]["open"] == 1
+    assert stats["writer"]["running"] is True
+
+
+def test_share_access_counters(database):
+    database.save_share_access([("t1", 3, 100), ("t2", 1, 50)])
+    database.save_share_access([("t1", 5, 200)])
+    counters = database.get_share_access()
+    assert counters["t1"]["access_count"] == 5
+    assert counters["t1"]["last_accessed"] == 200
+    assert counters["t2"]["access_count"] == 1
+
+    database.delete_share_access(["t1"])
+    assert list(database.get_share_access()) == ["t2"]
+
+
+def test_memory_database(tmp_path):
+    database = Database(":memory:")
+    database.set_setting("a", "1")
+    assert database.get_setting("a") == "1"
+    assert database.get_stats()["read_pool"]["open"] == 0
+    database.close()
@@ -0,0 +1,122 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from idm_logger import web
+from idm_logger.downsample import (
+    downsample_matrix,
+    lttb_indices,
+    m4_indices,
+    parse_max_points,
+)
+
+
+def _series(n=5000, dip_at=3000):
+    x = np.arange(n, dtype=np.float64) * 60
+    y = 35 + np.sin(np.arange(n) / 100.0)
+    y[dip_at] = 5.0  # defrost dip
+    return x, y
+
+
+def _matrix(x, y):
+    values = [[float(t), str(v)] for t, v in zip(x, y)]
+    return {
+        "status": "success",
+        "data": {
+            "resultType": "matrix",
+            "result": [
+                {"metric": {"__name__": "idm_heatpump_temp_flow"}, "values": values}
+            ],
+        },
+    }
+
+
+class TestDownsample:
+    def test_lttb_keeps_endpoints_and_dip(self):
+        x, y = _series()
+        idx = lttb_indices(x, y, 300)
+        assert len(idx) == 300
+        assert idx[0] == 0 and idx[-1] == len(x) - 1
+        assert np.all(np.diff(idx) > 0)
+        assert 3000 in idx
+
+    def test_m4_keeps_extremes(self):
+        x, y = _series()
+        idx = m4_indices(x, y, 400)
+        assert len(idx) <= 400
+        assert y[idx].min() == y.min()
+        assert y[idx].max() == y.max()
+
+    def test_matrix_skips_nan_and_keeps_strings(self):
+        x, y = _series(1000, dip_at=500)
+        payload = _matrix(x, y)
+        payload["data"]["result"][0]["values"][10][1] = "NaN"
+
+        downsample_matrix(payload, 100, "lttb")
+
+        values = payload["data"]["result"][0]["values"]
+        assert len(values) == 100
+        assert all(isinstance(v[1], str) and v[1] != "NaN" for v in values)
+
+    def test_parse_max_points(self):
+        assert parse_max_points(None) == 0
+        assert parse_max_points("0") == 0
+        assert parse_max_points("1") == 3
+        assert parse_max_points("999999") == 10000
+        with pytest.raises(ValueError):
+            parse_max_points("wide")
+
+
+class TestDownsampleEndpoints:
+    def setup_method(self):
+        web.app.config["TESTING"] = True
+        self.client = web.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["logged_in"] = True
+
+    def _vm(self):
+        response = MagicMock()
+        response.status_code = 200
+        response.json.side_effect = lambda: _matrix(*_series())
+        vm = MagicMock()
+        vm.get.return_value = response
+        return vm
+
+    def test_query_range_max_points(self):
+        with patch.object(web, "_vm_client", return_value=self._vm()):
+            response = self.client.get(
+                "/api/metrics/query_range",
+                query_string={"query": "x", "step": "60", "max_points": 250},
+            )
+        assert response.status_code == 200
+        values = response.get_json()["data"]["result"][0]["values"]
+        assert len(values) == 250
+
+    def test_query_range_rejects_unknown_method(self):
+        response = self.client.get(
+            "/api/metrics/query_range",
+            query_string={"query": "x", "max_points": 250, "method": "avg"},
+        )
+        assert response.status_code == 400
+
+    def test_batch_endpoint(self):
+        with patch.object(web, "_vm_client", return_value=self._vm()):
+            response = self.client.post(
+                "/api/metrics/query_range/batch",
+                json={
+                    "queries": ["a", "b"],
+                    "start": 0,
+                    "end": 300000,
+                    "step": "60",
+                    "max_points": 200,
+                    "method": "m4",
+                },
+            )
+        assert response.status_code == 200
+        results = response.get_json()["data"]
+        assert [r["query"] for r in results] == ["a", "b"]
+        for result in results:
+            assert len(result["data"]["result"][0]["values"]) <= 200
@@ -0,0 +1,185 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from idm_logger import web
+from idm_logger.expression_parser import (
+    CompiledExpression,
+    ExpressionParser,
+    align_series,
+    compile_expression,
+)
+
+
+@pytest.fixture
+def parser():
+    parser = ExpressionParser()
+    parser.set_query_results(
+        {
+            "A": [(1000, 10.0), (2000, 20.0), (3000, 30.0)],
+            "B": [(1000, 2.0), (2000, 4.0), (3000, 6.0)],
+            "C": [(1000, 5.0), (2000, 10.0), (3000, 15.0)],
+        }
+    )
+    return parser
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("A/B", [5.0, 5.0, 5.0]),
+        ("A*100", [1000.0, 2000.0, 3000.0]),
+        ("(A+B)/2", [6.0, 12.0, 18.0]),
+        ("-A+abs(-B)", [-8.0, -16.0, -24.0]),
+        ("avg(A,B,C)", [17 / 3, 34 / 3, 17.0]),
+        ("sum(A,B)", [12.0, 24.0, 36.0]),
+        ("min(A,B,12)", [2.0, 4.0, 6.0]),
+        ("max(A,25)", [25.0, 25.0, 30.0]),
+    ],
+)
+def test_series_results(parser, expression, expected):
+    result = parser.evaluate_expression_series(expression)
+    assert [ts for ts, _ in result] == [1000, 2000, 3000]
+    assert [v for _, v in result] == pytest.approx(expected)
+
+
+def test_merge_join_skips_missing_and_unsorted_points():
+    parser = ExpressionParser()
+    parser.set_query_results(
+        {
+            # VictoriaMetrics sends values as strings
+            "A": [[3000, "30"], [1000, "10"], [2000, "20"], [1000, "99"]],
+            "B": [[2000, "0"], [3000, "NaN"], [1000, "5"], [4000, "1"]],
+        }
+    )
+    # 2000: division by zero, 3000: NaN, 4000: no A value
+    assert parser.evaluate_expression_series("A/B") == [(1000, 2.0)]
+
+
+def test_constant_expression_uses_all_timestamps(parser):
+    result = parser.evaluate_expression_series("2*3")
+    assert result == [(1000, 6.0), (2000, 6.0), (3000, 6.0)]
+
+
+def test_unknown_label_gives_empty_result(parser):
+    assert parser.evaluate_expression_series("A+D") == []
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["__import__('os')", "A.real", "pow(A,2)", "A**2", "x+A", "A if B else C"],
+)
+def test_compile_rejects_unsafe_expressions(expression):
+    with pytest.raises(ValueError):
+        CompiledExpression(expression)
+
+
+def test_compiled_expression_is_immutable():
+    compiled = CompiledExpression("A/B")
+    assert compiled.labels == ("A", "B")
+    with pytest.raises(AttributeError):
+        compiled.labels = ("C",)
+
+
+def test_single_timestamp(parser):
+    assert parser.evaluate_expression("A/B", 2000) == 5.0
+    assert parser.evaluate_expression("A/B", 2500) is None
+
+
+def test_align_series_float_timestamps():
+    timestamps, aligned = align_series(
+        {"A": [(1.5, 1), (2.5, 2)], "B": [(2.5, 3)]}, ("A", "B")
+    )
+    assert timestamps.tolist() == [2.5]
+    assert aligned["A"].tolist() == [2.0]
+
+
+class TestEvaluateEndpoint:
+    def setup_method(self):
+        web.app.config["TESTING"] = True
+        web._expression_cache.clear()
+        self.client = web.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["logged_in"] = True
+
+    def _vm(self):
+        series = {
+            "power": [[1000, "10"], [1060, "20"], [1120, "30"]],
+            # Slightly off-grid timestamps and a gap
+            "cop": [[1000.004, "2"], [1119.998, "5"]],
+        }
+
+        def get(path, params=None, **kwargs):
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {
+                "status": "success",
+                "data": {
+                    "resultType": "matrix",
+                    "result": [{"metric": {}, "values": series[params["query"]]}],
+                },
+            }
+            return response
+
+        vm = MagicMock()
+        vm.get.side_effect = get
+        return vm
+
+    def _post(self, **body):
+        payload = {"expression": "A/B", "start": 1000, "end": 1120, "step": "1m"}
+        payload.update(body)
+        return self.client.post("/api/query/evaluate", json=payload)
+
+    def test_raw_arrays_still_supported(self):
+        response = self._post(queries={"A": [[1, "4"]], "B": [[1, "2"]]})
+        assert response.get_json()["data"]["values"] == [[1, 2.0]]
+
+    def test_query_definitions_are_fetched_and_cached(self):
+        vm = self._vm()
+        with patch.object(web, "_vm_client", return_value=vm):
+            queries = {"A": "power", "B": {"query": "cop"}, "C": "unused"}
+            first = self._post(queries=queries)
+            second = self._post(queries=queries, expression="A / B")
+
+        assert first.status_code == 200
+        assert first.get_json()["data"]["values"] == [[1000, 5.0], [1120, 6.0]]
+        assert second.get_json() == first.get_json()
+        # A and B once each, C is not referenced, second request is cached
+        assert vm.get.call_count == 2
+
+    def test_missing_definition(self):
+        response = self._post(queries={"A": "power"})
+        assert response.status_code == 400
+        assert "B" in response.get_json()["error"]
+
+
+def test_compiled_expressions_are_shared():
+    assert compile_expression("A / B") is compile_expression("A/B")
+
+
+def test_concurrent_contexts_do_not_interfere():
+    parser = ExpressionParser()
+
+    def run(i):
+        queries = {
+            "A": [(t, i * 10) for t in range(200)],
+            "B": [(t, i) for t in range(200)],
+        }
+        for _ in range(20):
+            values = parser.context(queries).evaluate_series("A/B+B")
+            assert {v for _, v in values} == {10.0 + i}
+        return i
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert sorted(pool.map(run, range(1, 17))) == list(range(1, 17))
+
+
+def test_step_parsing_matches_export():
+    assert web._parse_step_seconds("5m") == 300
+    assert web._parse_step_seconds(60) == 60
+    assert web._parse_step_seconds("1.5h") == 5400
+    assert web._parse_step_seconds("soon") is None
+    assert web._parse_step_seconds(None) is None
@@ -0,0 +1,51 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import time
+
+from idm_logger.history_buffer import HistoryBuffer
+
+
+def test_ring_wraps_and_keeps_order():
+    buffer = HistoryBuffer(window=900, capacity=4)
+    now = time.time()
+    for i in range(6):
+        buffer.append({"temp": float(i)}, timestamp=now - 6 + i)
+
+    points = buffer.backfill(["temp"])["temp"]
+    assert [v for _, v in points] == [2.0, 3.0, 4.0, 5.0]
+    assert points == sorted(points)
+    assert buffer.get_stats()["rows"] == 4
+
+
+def test_skips_strings_and_gaps():
+    buffer = HistoryBuffer()
+    now = time.time()
+    buffer.append({"temp": 1.0, "mode": "heat", "mode_str": "Heizen"}, now - 2)
+    buffer.append({"power": 3, "pump": True}, now - 1)
+
+    backfill = buffer.backfill(["temp", "power", "pump", "mode"])
+    assert [v for _, v in backfill["temp"]] == [1.0]
+    assert [v for _, v in backfill["power"]] == [3.0]
+    assert [v for _, v in backfill["pump"]] == [1.0]
+    assert "mode" not in backfill
+
+
+def test_backfill_window_and_metric_names():
+    buffer = HistoryBuffer(window=300)
+    now = time.time()
+    buffer.append({"temp": 1.0}, timestamp=now - 200)
+    buffer.append({"temp": 2.0}, timestamp=now - 30)
+
+    assert len(buffer.backfill(["temp"], seconds=60)["temp"]) == 1
+    # Requests beyond the window are capped
+    assert (
+        len(buffer.backfill(["idm_heatpump_temp"], seconds=3600)["idm_heatpump_temp"])
+        == 2
+    )
+    assert buffer.latest(["idm_heatpump_temp", "unknown"]) == {"idm_heatpump_temp": 2.0}
+
+
+def test_many_columns():
+    buffer = HistoryBuffer(capacity=2)
+    buffer.append({f"sensor_{i}": float(i) for i in range(150)})
+    assert buffer.latest(["sensor_149"]) == {"sensor_149": 149.0}
@@ -0,0 +1,67 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import gzip
+
+from idm_logger import web
+
+
+class TestHttpCache:
+    def setup_method(self):
+        web.app.config["TESTING"] = True
+        self.client = web.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["logged_in"] = True
+
+    def test_large_json_is_gzipped(self):
+        response = self.client.get(
+            "/api/alerts/templates", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert gzip.decompress(response.data).startswith(b"[")
+        assert response.headers["ETag"].endswith('-gzip"')
+
+    def test_uncompressed_without_accept_encoding(self):
+        response = self.client.get(
+            "/api/alerts/templates", headers={"Accept-Encoding": "identity"}
+        )
+        assert "Content-Encoding" not in response.headers
+        assert response.get_json()
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(
+            "/api/auth/check", headers={"Accept-Encoding": "gzip"}
+        )
+        assert "Content-Encoding" not in response.headers
+
+    def test_etag_revalidation_across_encodings(self):
+        first = self.client.get(
+            "/api/alerts/templates", headers={"Accept-Encoding": "gzip"}
+        )
+        etag = first.headers["ETag"]
+
+        for encoding in ("gzip", "identity"):
+            cached = self.client.get(
+                "/api/alerts/templates",
+                headers={"Accept-Encoding": encoding, "If-None-Match": etag},
+            )
+            assert cached.status_code == 304
+            assert cached.data == b""
+
+    def test_dashboards_have_etag(self):
+        response = self.client.get("/api/dashboards")
+        assert response.status_code == 200
+        assert response.headers.get("ETag")
+        assert response.headers["Cache-Control"] == "no-cache"
+
+    def test_dashboards_revalidate_until_changed(self):
+        etag = self.client.get("/api/dashboards").headers["ETag"]
+        cached = self.client.get("/api/dashboards", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+
+        dashboard_id = self.client.get("/api/dashboards").get_json()[0]["id"]
+        single = self.client.get(f"/api/dashboards/{dashboard_id}")
+        assert single.status_code == 200 and single.headers.get("ETag")
+        assert self.client.get("/api/dashboards/missing").status_code == 404
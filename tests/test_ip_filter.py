@@ -0,0 +1,126 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import ipaddress
+
+from idm_logger.ip_filter import IPAccessFilter, PrefixTrie
+from idm_logger.lru_cache import LRUCache
+
+
+class TestPrefixTrie:
+    def test_longest_prefix_match(self):
+        trie = PrefixTrie.build(["10.0.0.0/8", "10.1.0.0/16", "2001:db8::/32"])
+        assert trie.match(ipaddress.ip_address("10.1.2.3")) == "10.1.0.0/16"
+        assert trie.match(ipaddress.ip_address("10.2.2.3")) == "10.0.0.0/8"
+        assert trie.match(ipaddress.ip_address("11.0.0.1")) is None
+        assert trie.match(ipaddress.ip_address("2001:db8::1")) == "2001:db8::/32"
+        assert trie.match(ipaddress.ip_address("2001:db9::1")) is None
+
+    def test_default_route_and_host(self):
+        trie = PrefixTrie.build(["0.0.0.0/0", "192.168.1.10"])
+        assert trie.match(ipaddress.ip_address("8.8.8.8")) == "0.0.0.0/0"
+        assert trie.match(ipaddress.ip_address("192.168.1.10")) == "192.168.1.10"
+
+    def test_ipv4_mapped_address(self):
+        trie = PrefixTrie.build(["192.168.0.0/16"])
+        assert trie.match(ipaddress.ip_address("::ffff:192.168.1.1")) is not None
+
+    def test_ipv4_mapped_entries(self):
+        trie = PrefixTrie.build(["::ffff:192.168.0.0/112", "::ffff:10.0.0.1"])
+        assert trie.match(ipaddress.ip_address("192.168.1.1")) == (
+            "::ffff:192.168.0.0/112"
+        )
+        assert trie.match(ipaddress.ip_address("::ffff:192.168.1.1")) == (
+            "::ffff:192.168.0.0/112"
+        )
+        assert trie.match(ipaddress.ip_address("::ffff:10.0.0.1")) is not None
+        assert trie.match(ipaddress.ip_address("10.0.0.2")) is None
+        assert len(trie) == 2
+
+        everything = PrefixTrie.build(["::/0"])
+        assert everything.match(ipaddress.ip_address("::ffff:8.8.8.8")) == "::/0"
+        assert everything.match(ipaddress.ip_address("2001:db8::1")) == "::/0"
+
+    def test_invalid_entries_are_skipped(self):
+        trie = PrefixTrie.build(["not-a-net", "10.0.0.0/8"])
+        assert len(trie) == 1
+
+
+class TestLRUCache:
+    def test_capacity_and_hit_rate(self):
+        cache = LRUCache(capacity=2, ttl=60)
+        cache.put("a", True, now=0)
+        cache.put("b", True, now=0)
+        assert cache.get("a", now=1) is True  # "b" is now least recently used
+        cache.put("c", False, now=1)
+        assert cache.get("b", now=1) is None
+        assert len(cache) == 2
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_ttl(self):
+        cache = LRUCache(capacity=2, ttl=10)
+        cache.put("a", True, now=0)
+        assert cache.get("a", now=11) is None
+
+
+class TestIPAccessFilter:
+    def test_blacklist_wins_over_whitelist(self):
+        ip_filter = IPAccessFilter()
+        whitelist = ["192.168.0.0/16"]
+        blacklist = ["192.168.1.66/32"]
+        assert ip_filter.is_allowed("192.168.1.1", whitelist, blacklist)
+        assert not ip_filter.is_allowed("192.168.1.66", whitelist, blacklist)
+        assert not ip_filter.is_allowed("10.0.0.1", whitelist, blacklist)
+        assert not ip_filter.is_allowed("garbage", whitelist, blacklist)
+
+    def test_empty_whitelist_allows_all(self):
+        ip_filter = IPAccessFilter()
+        assert ip_filter.is_allowed("203.0.113.5", [], [])
+
+    def test_list_change_invalidates_cache(self):
+        ip_filter = IPAccessFilter()
+        whitelist, blacklist = [], []
+        assert ip_filter.is_allowed("203.0.113.5", whitelist, blacklist)
+        assert ip_filter.is_allowed("203.0.113.5", whitelist, blacklist)
+        assert ip_filter.get_stats()["cache"]["hits"] == 1
+
+        assert not ip_filter.is_allowed("203.0.113.5", whitelist, ["203.0.113.0/24"])
+        assert ip_filter.get_stats()["rebuilds"] == 2
+
+    def test_cache_is_bounded(self):
+        ip_filter = IPAccessFilter(cache_size=100)
+        whitelist, blacklist = [], []
+        for i in range(1000):
+            ip_filter.is_allowed(f"198.51.{i // 256}.{i % 256}", whitelist, blacklist)
+        assert ip_filter.get_stats()["cache"]["size"] == 100
+
+
+def test_filter_through_config_rebuilds_only_on_change():
+    from idm_logger import web
+    from idm_logger.config import config
+
+    section = config.data.get("network_security")
+    config.data["network_security"] = {
+        "enabled": True,
+        "whitelist": ["127.0.0.0/8"],
+        "blacklist": [],
+    }
+    try:
+        client = web.app.test_client()
+        rebuilds = web.ip_filter.get_stats()["rebuilds"]
+        for _ in range(5):
+            assert client.get("/api/auth/check").status_code != 403
+        stats = web.ip_filter.get_stats()
+        assert stats["rebuilds"] == rebuilds + 1
+        assert stats["cache"]["hits"] >= 4
+
+        # Unrelated changes publish a new snapshot but keep the lists
+        config.set("logging.level", config.get("logging.level"))
+        client.get("/api/auth/check")
+        assert web.ip_filter.get_stats()["rebuilds"] == rebuilds + 1
+
+        config.set("network_security.blacklist", ["127.0.0.1/32"])
+        assert client.get("/api/auth/check").status_code == 403
+    finally:
+        config.data["network_security"] = section
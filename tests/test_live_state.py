@@ -0,0 +1,141 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from idm_logger import web
+from idm_logger.live_state import LastValueStore
+
+
+@pytest.fixture
+def store():
+    store = LastValueStore()
+    with patch.object(web, "live_state", store):
+        yield store
+
+
+@pytest.fixture
+def client():
+    web.app.config["TESTING"] = True
+    client = web.app.test_client()
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+    return client
+
+
+def test_current_metrics_served_from_poll_loop(store, client):
+    with patch.object(web.websocket_handler, "broadcast_metrics"):
+        web.update_current_data(
+            {"temp_outside": 4.5, "status_heat_pump": 1, "mode_str": "Heizen"}
+        )
+
+    # VictoriaMetrics is older for polled sensors, but has the ML scores
+    external = {
+        "idm_heatpump_temp_outside": {"value": 1.0, "timestamp": 1000},
+        "idm_anomaly_score_value": {"value": 0.4, "timestamp": 1000},
+    }
+    with patch.object(
+        web, "_fetch_current_from_vm", return_value=external
+    ) as mock_fetch:
+        response = client.get("/api/metrics/current")
+
+    # Only the metrics the poll loop does not push are read
+    mock_fetch.assert_called_once_with(web._EXTERNAL_METRICS)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["idm_heatpump_temp_outside"]["value"] == 4.5
+    assert data["idm_anomaly_score_value"]["value"] == 0.4
+    assert data["idm_heatpump_status_heat_pump"]["value"] == 1.0
+    assert "idm_heatpump_mode_str" not in data
+    assert response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+
+def test_conditional_get_returns_304(store, client):
+    store.update_sensors({"temp_outside": 4.5})
+    store.external_refresh_due()
+    etag = client.get("/api/metrics/current").headers["ETag"]
+
+    response = client.get("/api/metrics/current", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    store.update_sensors({"temp_outside": 5.0})
+    response = client.get("/api/metrics/current", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_seeded_from_victoriametrics_when_empty(store, client):
+    seed = {"idm_heatpump_temp_outside": {"value": 3.0, "timestamp": 1000}}
+    with patch.object(web, "_fetch_current_from_vm", return_value=seed) as mock_fetch:
+        first = client.get("/api/metrics/current").get_json()
+        client.get("/api/metrics/current")
+
+    assert first == seed
+    mock_fetch.assert_called_once_with(web._ALL_METRICS)
+
+    # Fresh poll data wins over the seeded snapshot
+    store.update_sensors({"temp_outside": 7.0})
+    data = client.get("/api/metrics/current").get_json()
+    assert data["idm_heatpump_temp_outside"]["value"] == 7.0
+
+    # Later refreshes keep the polled value
+    store.merge_external(seed)
+    assert store.snapshot()[0]["idm_heatpump_temp_outside"]["value"] == 7.0
+
+
+def test_anomaly_metrics_from_ai_status_poll(store, client):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {
+        "status": "success",
+        "data": {
+            "result": [
+                {
+                    "metric": {"__name__": "idm_anomaly_score_value"},
+                    "value": [1000, "0.9"],
+                },
+                {
+                    "metric": {"__name__": "idm_anomaly_flag_value"},
+                    "value": [1000, "1"],
+                },
+            ]
+        },
+    }
+    with patch.object(web, "_vm_client") as mock_vm:
+        mock_vm.return_value.query.return_value = response
+        web._update_ai_status_once()
+
+    metrics = store.snapshot()[0]
+    assert metrics["idm_anomaly_score_value"]["value"] == 0.9
+    assert metrics["idm_anomaly_flag_value"]["value"] == 1.0
+    assert store.get_ai_status()["is_anomaly"] is True
+
+
+def test_ml_score_push_updates_ai_status(store, client):
+    web.config.data["internal_api_key"] = "push-secret"
+    try:
+        response = client.post(
+            "/api/internal/ml_score",
+            json={"score": 0.81, "is_anomaly": True, "mode": "heating"},
+            headers={"X-Internal-Secret": "push-secret"},
+        )
+        assert response.status_code == 200
+
+        with patch.object(web, "_vm_client") as mock_vm:
+            web._update_ai_status_once()
+        mock_vm.assert_not_called()
+
+        status = client.get("/api/ai/status").get_json()
+        assert status["online"] is True
+        assert status["score"] == 0.81
+        assert status["is_anomaly"] is True
+
+        response = client.post(
+            "/api/internal/ml_score",
+            json={"score": 0.1},
+            headers={"X-Internal-Secret": "wrong"},
+        )
+        assert response.status_code == 401
+    finally:
+        web.config.data.pop("internal_api_key", None)
@@ -0,0 +1,81 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import json
+from unittest.mock import patch
+
+from idm_logger import web
+from idm_logger.metric_catalog import MetricCatalog, classify, registry_entries
+
+
+def _catalog(*sources):
+    catalog = MetricCatalog()
+    for source in sources:
+        catalog.add_source(source)
+    # Build synchronously so tests do not depend on the refresh thread
+    catalog.rebuild()
+    return catalog
+
+
+class TestMetricCatalog:
+    def test_registry_entries_are_enriched(self):
+        entries = registry_entries()
+        outside = entries["idm_heatpump_temp_outside"]
+        assert outside["category"] == "temperature"
+        assert outside["unit"] == "°C"
+        assert outside["writable"] is False
+        assert entries["idm_heatpump_power_solar_production"]["writable"] is True
+        assert entries["idm_anomaly_score_value"]["category"] == "ai"
+
+    def test_classify(self):
+        assert classify("idm_heatpump_flow_rate") == ("flow", "flow_rate")
+        assert classify("idm_heatpump_foo") == ("other", "foo")
+        assert classify("idm_ml_model_updates_value")[0] == "ai"
+
+    def test_grouped_body_and_sources(self):
+        catalog = _catalog(lambda: ["idm_heatpump_temp_legacy", "idm_heatpump_x_str"])
+        body, _ = catalog.get()
+        grouped = json.loads(body)
+        assert list(grouped)[0] == "temperature" and "other" in grouped
+        names = [e["name"] for e in grouped["temperature"]]
+        assert "idm_heatpump_temp_legacy" in names
+        assert names == sorted(names)
+        assert "idm_heatpump_x_str" not in catalog.entries()
+
+    def test_version_only_changes_on_new_names(self):
+        catalog = _catalog()
+        _, etag = catalog.get()
+        assert catalog.rebuild() is False
+        assert catalog.etag() == etag
+
+        assert catalog.observe(["idm_heatpump_temp_new"]) == 1
+        assert catalog.observe(["idm_heatpump_temp_new"]) == 0
+        assert catalog.etag() != etag
+
+    def test_failing_source_is_ignored(self):
+        def broken():
+            raise ConnectionError("vm down")
+
+        catalog = _catalog(broken)
+        assert "idm_heatpump_temp_outside" in catalog.entries()
+
+
+class TestAvailableMetricsEndpoint:
+    def setup_method(self):
+        web.app.config["TESTING"] = True
+        self.client = web.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["logged_in"] = True
+
+    def test_served_from_catalog_with_etag(self):
+        catalog = _catalog()
+        with patch.object(web, "metric_catalog", catalog):
+            response = self.client.get("/api/metrics/available")
+            assert response.status_code == 200
+            data = response.get_json()
+            assert {"name", "display", "unit", "writable"} <= set(data["power"][0])
+
+            cached = self.client.get(
+                "/api/metrics/available",
+                headers={"If-None-Match": response.headers["ETag"]},
+            )
+            assert cached.status_code == 304
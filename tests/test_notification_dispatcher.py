@@ -0,0 +1,144 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import time
+from unittest.mock import patch
+
+import pytest
+
+from idm_logger.db import Database
+from idm_logger.notifications import dispatcher as dispatcher_module
+from idm_logger.notifications.base import DeliveryUnknownError, PermanentDeliveryError
+from idm_logger.notifications.dispatcher import NotificationDispatcher
+
+
+class FakeProvider:
+    def __init__(self, name, results=None, enabled=True, delay=0.0):
+        self.name = name
+        self.enabled = enabled
+        self.results = list(results or [])
+        self.delay = delay
+        self.sent = []
+
+    def send(self, message, **kwargs):
+        time.sleep(self.delay)
+        ok = self.results.pop(0) if self.results else True
+        if isinstance(ok, Exception):
+            raise ok
+        if ok:
+            self.sent.append((message, kwargs))
+        return ok
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Database(str(tmp_path / "outbox.db"))
+
+
+def test_enqueue_returns_immediately_and_delivers(outbox):
+    slow = FakeProvider("signal", delay=0.3)
+    fast = FakeProvider("discord")
+    disabled = FakeProvider("email", enabled=False)
+    dispatcher = NotificationDispatcher([slow, fast, disabled], outbox=outbox)
+
+    started = time.monotonic()
+    assert dispatcher.enqueue("Alarm", subject="IDM Alert") == 2
+    assert time.monotonic() - started < 0.2
+
+    # The slow provider does not hold up the others
+    time.sleep(0.1)
+    assert fast.sent == [("Alarm", {"subject": "IDM Alert"})]
+    assert dispatcher.flush(5)
+    assert slow.sent == [("Alarm", {"subject": "IDM Alert"})]
+    assert disabled.sent == []
+    assert outbox.get_outbox_entries() == []
+
+    stats = dispatcher.get_stats()["providers"]
+    assert stats["signal"]["sent"] == 1
+    assert stats["signal"]["latency_max_s"] >= 0.3
+    dispatcher.stop()
+
+
+def test_retries_with_backoff(outbox):
+    provider = FakeProvider("telegram", results=[False, False, True])
+    dispatcher = NotificationDispatcher([provider], outbox=outbox)
+    with patch.object(dispatcher_module, "backoff_delay", return_value=0.05):
+        dispatcher.enqueue("Retry me")
+        time.sleep(0.02)
+        assert dispatcher.flush(5)
+
+    assert provider.sent == [("Retry me", {})]
+    stats = dispatcher.get_stats()["providers"]["telegram"]
+    assert stats["retries"] == 2
+    assert stats["failed"] == 0
+    dispatcher.stop()
+
+
+def test_gives_up_after_max_attempts(outbox):
+    provider = FakeProvider("discord", results=[False] * 10)
+    dispatcher = NotificationDispatcher([provider], outbox=outbox)
+    with patch.object(dispatcher_module, "backoff_delay", return_value=0.0):
+        dispatcher.enqueue("Never")
+        assert dispatcher.flush(5)
+
+    stats = dispatcher.get_stats()["providers"]["discord"]
+    assert stats["failed"] == 1
+    assert stats["retries"] == dispatcher_module.MAX_ATTEMPTS - 1
+    assert outbox.get_outbox_entries() == []
+    dispatcher.stop()
+
+
+def test_permanent_failure_is_not_retried(outbox):
+    provider = FakeProvider(
+        "signal", results=[PermanentDeliveryError("not configured"), True]
+    )
+    dispatcher = NotificationDispatcher([provider], outbox=outbox)
+    with patch.object(dispatcher_module, "backoff_delay", return_value=0.0):
+        dispatcher.enqueue("Misconfigured")
+        assert dispatcher.flush(5)
+
+    assert provider.sent == []
+    stats = dispatcher.get_stats()["providers"]["signal"]
+    assert stats["failed"] == 1
+    assert stats["retries"] == 0
+    assert stats["last_error"] == "not configured"
+    assert outbox.get_outbox_entries() == []
+    dispatcher.stop()
+
+
+def test_unknown_delivery_is_not_retried(outbox):
+    provider = FakeProvider("signal", results=[DeliveryUnknownError("timeout"), True])
+    dispatcher = NotificationDispatcher([provider], outbox=outbox)
+    with patch.object(dispatcher_module, "backoff_delay", return_value=0.0):
+        dispatcher.enqueue("Maybe sent")
+        assert dispatcher.flush(5)
+
+    assert provider.sent == []
+    stats = dispatcher.get_stats()["providers"]["signal"]
+    assert stats["unknown"] == 1
+    assert stats["retries"] == 0
+    assert stats["failed"] == 0
+    assert outbox.get_outbox_entries() == []
+    dispatcher.stop()
+
+
+def test_outbox_survives_restart(outbox):
+    provider = FakeProvider("signal", results=[False])
+    dispatcher = NotificationDispatcher([provider], outbox=outbox)
+    with patch.object(dispatcher_module, "backoff_delay", return_value=60.0):
+        dispatcher.enqueue("Persistent")
+        time.sleep(0.1)
+    dispatcher.stop()
+
+    (entry,) = outbox.get_outbox_entries()
+    assert entry["attempts"] == 1
+    assert entry["last_error"]
+
+    # Make the stored retry due and start a new dispatcher
+    outbox.update_outbox_entry(entry["id"], 1, time.time(), entry["last_error"])
+    provider = FakeProvider("signal")
+    restarted = NotificationDispatcher([provider], outbox=outbox)
+    restarted.start()
+    assert restarted.flush(5)
+    assert provider.sent == [("Persistent", {})]
+    assert outbox.get_outbox_entries() == []
+    restarted.stop()
@@ -0,0 +1,133 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import smtplib
+import sys
+import textwrap
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from idm_logger.notifications.base import DeliveryUnknownError, PermanentDeliveryError
+from idm_logger.notifications.email import SMTPConnection
+from idm_logger.notifications.signal import (
+    SignalDaemon,
+    SignalDaemonError,
+    SignalProvider,
+    send_via_signal_cli,
+)
+
+FAKE_SIGNAL_CLI = """
+import json, sys
+for line in sys.stdin:
+    request = json.loads(line)
+    # Unsolicited notification, must be ignored by the client
+    print(json.dumps({"jsonrpc": "2.0", "method": "receive", "params": {}}))
+    if request["params"]["message"] == "fail":
+        reply = {"error": {"code": -1, "message": "Unregistered user"}}
+    else:
+        reply = {"result": {"timestamp": 1, "recipients": request["params"]["recipient"]}}
+    reply.update(jsonrpc="2.0", id=request["id"])
+    print(json.dumps(reply), flush=True)
+"""
+
+
+@pytest.fixture
+def fake_cli(tmp_path):
+    script = tmp_path / "signal-cli"
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent(FAKE_SIGNAL_CLI))
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_signal_daemon_reuses_one_process(fake_cli):
+    daemon = SignalDaemon(fake_cli, "+49123456789")
+    try:
+        for _ in range(3):
+            result = daemon.send("Alarm", ["+49987654321"], timeout=10)
+            assert result["recipients"] == ["+49987654321"]
+        assert daemon.starts == 1
+
+        with pytest.raises(RuntimeError, match="Unregistered"):
+            daemon.send("fail", ["+49987654321"], timeout=10)
+        assert daemon.alive
+    finally:
+        daemon.close()
+    assert not daemon.alive
+
+
+def test_exit_of_old_process_only_fails_its_requests():
+    daemon = SignalDaemon("signal-cli", "+49123456789")
+    old_request, new_request = Future(), Future()
+    # The restarted process already has a request in flight
+    daemon._pending = {2: new_request}
+
+    daemon._read(MagicMock(stdout=iter([])), {1: old_request})
+
+    with pytest.raises(SignalDaemonError):
+        old_request.result(0)
+    assert not new_request.done()
+    assert daemon._pending == {2: new_request}
+
+
+def test_signal_configuration_errors_are_permanent():
+    settings = {"signal.enabled": True, "signal.cli_path": sys.executable}
+    with patch(
+        "idm_logger.notifications.signal.config.get",
+        side_effect=lambda key, default=None: settings.get(key, default),
+    ):
+        with pytest.raises(PermanentDeliveryError, match="not configured"):
+            SignalProvider().send("Alarm")
+        settings["signal.enabled"] = False
+        with pytest.raises(PermanentDeliveryError, match="disabled"):
+            SignalProvider().send("Alarm")
+
+
+def test_signal_timeout_is_reported_as_unknown():
+    daemon = MagicMock()
+    daemon.send.side_effect = FutureTimeout()
+    with (
+        patch("idm_logger.notifications.signal.config.get", return_value=True),
+        patch("idm_logger.notifications.signal.get_signal_daemon", return_value=daemon),
+        patch("idm_logger.notifications.signal.subprocess.run") as run,
+    ):
+        with pytest.raises(DeliveryUnknownError):
+            send_via_signal_cli("signal-cli", "+49123", ["+49456"], "Alarm")
+    # No second attempt through the one-shot send
+    run.assert_not_called()
+
+
+class TestSMTPConnection:
+    SETTINGS = ("smtp.example.com", 587, "user", "secret")
+
+    def _send(self, connection, settings=SETTINGS):
+        connection.send_message(MagicMock(), settings)
+
+    def test_connection_is_reused(self):
+        with patch("idm_logger.notifications.email.smtplib.SMTP") as smtp:
+            smtp.return_value.noop.return_value = (250, b"OK")
+            connection = SMTPConnection(idle_timeout=60)
+            for _ in range(3):
+                self._send(connection)
+            connection.close()
+
+        assert connection.connects == 1
+        smtp.return_value.login.assert_called_once_with("user", "secret")
+        assert smtp.return_value.send_message.call_count == 3
+        smtp.return_value.quit.assert_called_once()
+
+    def test_reconnects_after_drop_or_config_change(self):
+        with patch("idm_logger.notifications.email.smtplib.SMTP") as smtp:
+            server = smtp.return_value
+            server.noop.side_effect = smtplib.SMTPServerDisconnected()
+            connection = SMTPConnection(idle_timeout=60)
+            self._send(connection)
+            self._send(connection)
+            assert connection.connects == 2
+
+            server.noop.side_effect = None
+            server.noop.return_value = (250, b"OK")
+            self._send(connection, ("smtp.other.com", 465, None, None))
+            assert connection.connects == 3
+            connection.close()
@@ -0,0 +1,36 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+from unittest.mock import patch
+
+from idm_logger import server_mode
+
+
+def test_default_mode_keeps_previous_behaviour(monkeypatch):
+    monkeypatch.delenv("WEB_SERVER", raising=False)
+    assert server_mode.resolve_mode(websocket_enabled=True) == server_mode.WERKZEUG
+    assert server_mode.resolve_mode(websocket_enabled=False) == server_mode.WAITRESS
+
+
+def test_explicit_mode(monkeypatch):
+    monkeypatch.setenv("WEB_SERVER", "Waitress")
+    assert server_mode.resolve_mode(websocket_enabled=True) == server_mode.WAITRESS
+
+
+def test_unknown_mode_is_ignored(monkeypatch):
+    monkeypatch.setenv("WEB_SERVER", "uwsgi")
+    assert server_mode.requested_mode() is None
+    assert server_mode.resolve_mode(websocket_enabled=True) == server_mode.WERKZEUG
+
+
+def test_gevent_falls_back_without_monkey_patch(monkeypatch):
+    monkeypatch.setenv("WEB_SERVER", "gevent")
+    with patch.object(server_mode, "gevent_active", return_value=False):
+        assert server_mode.resolve_mode(websocket_enabled=True) == server_mode.WERKZEUG
+        assert server_mode.socketio_async_mode() == "threading"
+
+
+def test_gevent_selected_when_patched(monkeypatch):
+    monkeypatch.setenv("WEB_SERVER", "gevent")
+    with patch.object(server_mode, "gevent_active", return_value=True):
+        assert server_mode.resolve_mode(websocket_enabled=False) == server_mode.GEVENT
+        assert server_mode.socketio_async_mode() == "gevent"
@@ -0,0 +1,95 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+from unittest.mock import MagicMock
+
+import pytest
+
+from idm_logger.sharing import SharingManager
+
+
+class FakeConfig:
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.save = MagicMock()
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
+class FakeCounterStore:
+    """The share_access helpers of the Database, in memory."""
+
+    def __init__(self):
+        self.rows = {}
+        self.batches = 0
+
+    def get_share_access(self):
+        return {k: dict(v) for k, v in self.rows.items()}
+
+    def save_share_access(self, counters):
+        self.batches += 1
+        for token_id, access_count, last_accessed in counters:
+            self.rows[token_id] = {
+                "token_id": token_id,
+                "access_count": access_count,
+                "last_accessed": last_accessed,
+            }
+
+    def delete_share_access(self, token_ids):
+        for token_id in token_ids:
+            self.rows.pop(token_id, None)
+
+
+@pytest.fixture
+def database():
+    return FakeCounterStore()
+
+
+def test_access_is_counted_without_saving_config(database):
+    config = FakeConfig()
+    manager = SharingManager(config, database=database, flush_interval=3600)
+    token = manager.create_share_token("dash", "admin", is_public=True)
+    assert config.save.call_count == 1
+
+    for _ in range(50):
+        assert manager.validate_token(token.token_id)
+        manager.record_access(token.token_id)
+
+    assert config.save.call_count == 1
+    assert token.access_count == 50
+    assert database.get_share_access() == {}
+
+    manager.flush()
+    assert database.batches == 1
+    stored = database.get_share_access()[token.token_id]
+    assert stored["access_count"] == 50
+    assert stored["last_accessed"] == token.last_accessed
+    assert "access_count" not in config.data["sharing"]["tokens"][0]
+
+    # Counters survive a restart
+    reloaded = SharingManager(config, database=database)
+    assert reloaded.get_token(token.token_id).access_count == 50
+
+    assert reloaded.delete_token(token.token_id)
+    assert database.get_share_access() == {}
+
+
+def test_legacy_counters_from_config_are_kept(database):
+    config = FakeConfig(
+        {
+            "sharing": {
+                "tokens": [
+                    {
+                        "token_id": "t1",
+                        "dashboard_id": "dash",
+                        "created_by": "admin",
+                        "access_count": 7,
+                        "last_accessed": 123,
+                    }
+                ]
+            }
+        }
+    )
+    manager = SharingManager(config, database=database)
+    manager.flush()
+    assert database.get_share_access()["t1"]["access_count"] == 7
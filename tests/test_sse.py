@@ -0,0 +1,124 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+import json
+from unittest.mock import patch
+
+from idm_logger import server_mode, web
+from idm_logger.sse import StreamBroker, parse_metric_filter
+
+
+def _parse(chunk):
+    fields = dict(
+        line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line
+    )
+    if "data" in fields:
+        fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+def test_snapshot_then_filtered_deltas():
+    broker = StreamBroker()
+    broker.publish(100, {"temp": 1.0, "power": 2.0})
+    stream = broker.stream(metrics={"temp"}, heartbeat=0.01)
+
+    assert next(stream).startswith("retry:")
+    snapshot = _parse(next(stream))
+    assert snapshot["event"] == "snapshot"
+    assert snapshot["id"] == "1"
+    assert snapshot["data"]["metrics"] == {"temp": 1.0}
+
+    broker.publish(101, {"power": 3.0})
+    broker.publish(102, {"temp": 1.5})
+    delta = _parse(next(stream))
+    assert delta == {
+        "id": "3",
+        "event": "delta",
+        "data": {"timestamp": 102, "metrics": {"temp": 1.5}},
+    }
+    # Idle streams get keep-alive comments
+    assert next(stream) == ": keepalive\n\n"
+    stream.close()
+    assert broker.clients == 0
+
+
+def test_resume_from_last_event_id():
+    broker = StreamBroker(history_size=3)
+    for i in range(1, 4):
+        broker.publish(i, {"temp": float(i), f"s{i}": i})
+
+    stream = broker.stream(last_event_id=1)
+    next(stream)
+    resumed = _parse(next(stream))
+    assert resumed["event"] == "delta"
+    assert resumed["data"]["metrics"] == {"temp": 3.0, "s2": 2, "s3": 3}
+
+    # Sequence 2 drops out of the history, so resuming needs a snapshot
+    broker.publish(4, {"temp": 4.0})
+    broker.publish(5, {"temp": 5.0})
+    stream = broker.stream(last_event_id=1)
+    next(stream)
+    assert _parse(next(stream))["event"] == "snapshot"
+
+
+def test_parse_metric_filter():
+    assert parse_metric_filter(None) is None
+    assert parse_metric_filter("idm_heatpump_temp, power,") == {"temp", "power"}
+
+
+def _logged_in_client():
+    client = web.app.test_client()
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+    return client
+
+
+def test_stream_requires_login():
+    response = web.app.test_client().get("/api/stream")
+    assert response.status_code == 401
+
+
+def test_stream_limit_on_threaded_server():
+    client = _logged_in_client()
+    with (
+        patch.object(server_mode, "gevent_active", return_value=False),
+        patch.object(server_mode, "WAITRESS_THREADS", 6),
+    ):
+        assert server_mode.max_stream_clients(50) == 2
+        assert server_mode.max_stream_clients(1) == 1
+        streams = [client.get("/api/stream") for _ in range(2)]
+        assert [r.status_code for r in streams] == [200, 200]
+        third = client.get("/api/stream")
+        assert third.status_code == 503
+        assert third.get_json() == {"error": "Live-Stream nicht verfügbar"}
+        # Closing a stream gives its slot back, even if it was never read
+        # (closed in reverse order, the test client stacks request contexts)
+        streams[1].close()
+        fourth = client.get("/api/stream")
+        assert fourth.status_code == 200
+        for response in (fourth, streams[0]):
+            response.close()
+    assert web.stream_broker.clients == 0
+
+
+def test_acquire_respects_limit():
+    broker = StreamBroker()
+    assert broker.acquire(1)
+    assert not broker.acquire(1)
+    broker.release()
+    assert broker.clients == 0
+
+
+def test_stream_endpoint_fed_by_fanout():
+    web.websocket_handler.broadcast_metrics({"sse_test_value": 42.0})
+    client = _logged_in_client()
+
+    response = client.get("/api/stream?metrics=sse_test_value")
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert "Content-Encoding" not in response.headers
+
+    chunks = iter(response.response)
+    next(chunks)
+    snapshot = _parse(next(chunks).decode())
+    assert snapshot["data"]["metrics"] == {"sse_test_value": 42.0}
+    response.close()
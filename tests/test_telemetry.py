@@ -44,8 +44,9 @@ class TestTelemetry(unittest.TestCase):
         self.tm.manual_downloads_today = 0
         self.tm.last_manual_download = 0
 
+    @patch("idm_logger.telemetry.get_vm_client")
     @patch("idm_logger.telemetry.requests")
-    def test_submit_data_success(self, mock_requests):
+    def test_submit_data_success(self, mock_requests, mock_vm_client):
         # Configure the mock config for this test
         self.mock_get.side_effect = lambda k, d=None: {
             "telemetry.enabled": True,
@@ -76,21 +77,23 @@ class TestTelemetry(unittest.TestCase):
         mock_response_server = MagicMock()
         mock_response_server.status_code = 200
 
-        mock_requests.get.return_value = mock_response_vm
+        mock_vm_client.return_value.get.return_value = mock_response_vm
         mock_requests.post.return_value = mock_response_server
 
         # Run
         success = self.tm.submit_data()
 
         self.assertTrue(success)
-        mock_requests.get.assert_called()
+        mock_vm_client.assert_called_with("http://vm:8428/write")
+        mock_vm_client.return_value.get.assert_called()
         mock_requests.post.assert_called()
 
         args, kwargs = mock_requests.post.call_args
         self.assertEqual(args[0], "http://test-server/api/v1/submit")
 
+    @patch("idm_logger.telemetry.get_vm_client")
     @patch("idm_logger.telemetry.requests")
-    def test_submit_data_batching(self, mock_requests):
+    def test_submit_data_batching(self, mock_requests, mock_vm_client):
         self.mock_get.side_effect = lambda k, d=None: {
             "telemetry.enabled": True,
             "telemetry.server_url": "http://test-server",
@@ -118,7 +121,7 @@ class TestTelemetry(unittest.TestCase):
         mock_response_vm = MagicMock()
         mock_response_vm.status_code = 200
         mock_response_vm.iter_lines.return_value = records
-        mock_requests.get.return_value = mock_response_vm
+        mock_vm_client.return_value.get.return_value = mock_response_vm
         mock_requests.post.return_value = MagicMock(status_code=200)
 
         # Run
@@ -0,0 +1,123 @@
+# Xerolux 2026
+# SPDX-License-Identifier: MIT
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from idm_logger.vm_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    VMClient,
+    get_vm_client,
+    normalize_base_url,
+)
+
+
+def _response(status=200):
+    response = MagicMock()
+    response.status_code = status
+    return response
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep():
+    with patch("idm_logger.vm_client.time.sleep"):
+        yield
+
+
+class TestVMClient:
+    def test_normalize_base_url(self):
+        assert normalize_base_url("http://vm:8428/write") == "http://vm:8428"
+        assert normalize_base_url("http://vm:8428/api/v1/write") == "http://vm:8428"
+        assert normalize_base_url("http://vm:8428/") == "http://vm:8428"
+        assert normalize_base_url(None) == "http://victoriametrics:8428"
+
+    def test_shared_client_per_base_url(self):
+        client = get_vm_client("http://shared-vm:8428/write")
+        assert get_vm_client("http://shared-vm:8428") is client
+
+    def test_retries_transient_errors(self):
+        client = VMClient("http://vm:8428", retries=2)
+        with patch.object(
+            client.session,
+            "request",
+            side_effect=[requests.ConnectionError("down"), _response(503), _response()],
+        ) as mock_request:
+            response = client.query("up")
+
+        assert response.status_code == 200
+        assert mock_request.call_count == 3
+        stats = client.get_stats()["endpoints"]["/api/v1/query"]
+        assert stats["requests"] == 1
+        assert stats["retries"] == 2
+        assert stats["errors"] == 0
+
+    def test_writes_not_retried(self):
+        client = VMClient("http://vm:8428", retries=2)
+        with patch.object(
+            client.session, "request", side_effect=requests.Timeout("slow")
+        ) as mock_request:
+            with pytest.raises(requests.Timeout):
+                client.post("/write", data="m value=1")
+
+        # The write may have landed, sending it again would duplicate it
+        assert mock_request.call_count == 1
+
+    def test_client_errors_not_retried(self):
+        client = VMClient("http://vm:8428", retries=2)
+        with patch.object(
+            client.session, "request", return_value=_response(400)
+        ) as mock_request:
+            response = client.get("/api/v1/query_range")
+
+        assert response.status_code == 400
+        assert mock_request.call_count == 1
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+    def test_circuit_opens_and_fails_fast(self):
+        client = VMClient(
+            "http://vm:8428",
+            retries=0,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+        with patch.object(
+            client.session, "request", side_effect=requests.ConnectionError("down")
+        ) as mock_request:
+            for _ in range(2):
+                with pytest.raises(requests.ConnectionError):
+                    client.query("up")
+            with pytest.raises(CircuitOpenError):
+                client.query("up")
+
+        assert mock_request.call_count == 2
+        assert client.get_stats()["circuit"]["state"] == CircuitBreaker.OPEN
+
+    def test_half_open_trial_closes_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        client = VMClient("http://vm:8428", retries=0, breaker=breaker)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        with patch.object(client.session, "request", return_value=_response()):
+            client.query("up")
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_unexpected_error_releases_half_open_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        client = VMClient("http://vm:8428", retries=0, breaker=breaker)
+        breaker.record_failure()
+
+        with patch.object(
+            client.session,
+            "request",
+            side_effect=requests.exceptions.ChunkedEncodingError("cut off"),
+        ):
+            with pytest.raises(requests.exceptions.ChunkedEncodingError):
+                client.query("up")
+
+        # The next trial is let through instead of failing fast forever
+        with patch.object(client.session, "request", return_value=_response()):
+            client.query("up")
+        assert breaker.state == CircuitBreaker.CLOSED
@@ -1,4 +1,6 @@
 # Xerolux 2026
+import time
+
 import pytest
 from unittest.mock import MagicMock, patch
 import sys
@@ -10,6 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 from idm_logger.websocket_handler import WebSocketHandler
 from idm_logger.web import app
 import idm_logger.websocket_handler as websocket_handler_module
+from idm_logger.history_buffer import HistoryBuffer
 
 
 class TestWebSocketHandler:
@@ -44,10 +47,11 @@ class TestWebSocketHandler:
         # Patch join_room directly on the module object
         with (
             patch.object(websocket_handler_module, "join_room") as mock_join_room,
-            patch.object(websocket_handler_module, "emit"),
+            patch.object(websocket_handler_module, "emit") as mock_emit,
         ):
             handler = WebSocketHandler(mock_app, mock_socketio)
             handler.mock_join_room = mock_join_room
+            handler.mock_emit = mock_emit
             # We don't patch request here because we use app.test_request_context
             yield handler
 
@@ -76,30 +80,123 @@ class TestWebSocketHandler:
         assert "test_sid" in handler.subscriptions["metric2"]
 
     def test_broadcast_metrics(self, handler, mock_socketio):
-        # Setup subscriptions
-        handler.subscriptions["temp_outdoor"] = {"sid1"}
-        handler.subscriptions["power_total"] = {"sid1", "sid2"}
+        # Setup subscriptions (reverse index sid -> metrics)
+        handler.client_metrics["sid1"] = {"temp_outdoor", "power_total"}
+        handler.client_metrics["sid2"] = {"idm_heatpump_power_total"}
 
         data = {"temp_outdoor": 12.5, "power_total": 1500, "unused_metric": 0}
 
         handler.broadcast_metrics(data)
 
-        # Verify emit calls
-        # We expect emit for temp_outdoor and power_total
+        # One metrics_batch frame per client, not one emit per metric
         assert mock_socketio.emit.call_count == 2
-
-        # Check arguments
-        emitted_metrics = []
+        frames = {}
         for call in mock_socketio.emit.call_args_list:
             args, kwargs = call
-            event = args[0]
-            payload = args[1]
-            room = kwargs.get("room")
+            assert args[0] == "metrics_batch"
+            frames[kwargs["to"]] = args[1]["metrics"]
+
+        assert frames["sid1"] == {"temp_outdoor": 12.5, "power_total": 1500}
+        # Subscriptions by full metric name are matched as well
+        assert frames["sid2"] == {"idm_heatpump_power_total": 1500}
+
+    def test_broadcast_only_sends_changed_metrics(self, handler, mock_socketio):
+        handler.client_metrics["sid1"] = {"temp_outdoor", "power_total"}
+
+        handler.broadcast_metrics({"temp_outdoor": 12.5, "power_total": 1500})
+        mock_socketio.emit.reset_mock()
+        handler.broadcast_metrics({"temp_outdoor": 12.5, "power_total": 1600})
 
-            assert event == "metric_update"
-            assert payload["metric"] == room
-            emitted_metrics.append(payload["metric"])
+        args, kwargs = mock_socketio.emit.call_args
+        assert args[1]["metrics"] == {"power_total": 1600}
+
+        mock_socketio.emit.reset_mock()
+        handler.broadcast_metrics({"temp_outdoor": 12.5, "power_total": 1600})
+        mock_socketio.emit.assert_not_called()
+
+    def test_disconnect_cleans_reverse_index(self, handler, mock_socketio):
+        with app.test_request_context("/"):
+            from flask import request as flask_request
 
-        assert "temp_outdoor" in emitted_metrics
-        assert "power_total" in emitted_metrics
-        assert "unused_metric" not in emitted_metrics
+            flask_request.sid = "test_sid"
+            flask_request.namespace = "/"
+            mock_socketio.handlers["subscribe"]({"metrics": ["metric1"]})
+            mock_socketio.handlers["disconnect"]()
+
+        assert "test_sid" not in handler.client_metrics
+        assert "metric1" not in handler.subscriptions
+
+    def test_rate_limit_coalesces_latest_values(self, handler, mock_socketio):
+        handler.client_metrics["sid1"] = {"temp_outdoor"}
+        handler.clients["sid1"] = websocket_handler_module.ClientState(interval=3600)
+
+        handler.broadcast_metrics({"temp_outdoor": 1.0})
+        handler.broadcast_metrics({"temp_outdoor": 2.0})
+        handler.broadcast_metrics({"temp_outdoor": 3.0})
+
+        # First frame goes out, later values wait in the coalescing buffer
+        assert mock_socketio.emit.call_count == 1
+        state = handler.clients["sid1"]
+        assert state.pending == {"temp_outdoor": 3.0}
+        assert state.coalesced == 1
+
+    def test_slow_client_is_downgraded_then_dropped(self, handler, mock_socketio):
+        handler.client_metrics["sid1"] = {"temp_outdoor"}
+        handler.clients["sid1"] = websocket_handler_module.ClientState(ack=True)
+
+        # The client never acknowledges a frame
+        for i in range(websocket_handler_module.MAX_BACKLOG):
+            handler.broadcast_metrics({"temp_outdoor": float(i)})
+        assert handler.clients["sid1"].backlog == websocket_handler_module.MAX_BACKLOG
+
+        handler.broadcast_metrics({"temp_outdoor": 100.0})
+        assert handler.clients["sid1"].interval == 1.0
+        assert handler.get_stats()["downgrades"] == 1
+
+        for i in range(websocket_handler_module.MAX_STRIKES):
+            handler.broadcast_metrics({"temp_outdoor": 200.0 + i})
+        assert "sid1" not in handler.clients
+        assert handler.get_stats()["dropped_clients"] == 1
+        mock_socketio.server.disconnect.assert_called_once_with("sid1")
+
+    def test_ack_drains_backlog(self, handler, mock_socketio):
+        handler.client_metrics["sid1"] = {"temp_outdoor"}
+        handler.clients["sid1"] = websocket_handler_module.ClientState(ack=True)
+
+        handler.broadcast_metrics({"temp_outdoor": 1.0})
+        assert handler.clients["sid1"].backlog == 1
+        mock_socketio.emit.call_args.kwargs["callback"]()
+        assert handler.clients["sid1"].backlog == 0
+
+    def test_subscribe_sends_snapshot_with_backfill(self, handler, mock_socketio):
+        history = HistoryBuffer(window=900, capacity=8)
+        now = time.time()
+        history.append({"temp_outdoor": 4.0}, timestamp=now - 1200)
+        history.append({"temp_outdoor": 5.0}, timestamp=now - 60)
+        history.append({"temp_outdoor": 6.0, "power_total": 2.5}, timestamp=now)
+
+        with (
+            patch.object(websocket_handler_module, "history_buffer", history),
+            app.test_request_context("/"),
+        ):
+            from flask import request as flask_request
+
+            flask_request.sid = "test_sid"
+            mock_socketio.handlers["subscribe"](
+                {"metrics": ["idm_heatpump_temp_outdoor", "power_total"]}
+            )
+
+        snapshot = next(
+            call.args[1]
+            for call in handler.mock_emit.call_args_list
+            if call.args[0] == "metrics_snapshot"
+        )
+        assert snapshot["metrics"] == {
+            "idm_heatpump_temp_outdoor": 6.0,
+            "power_total": 2.5,
+        }
+        # The reading from 20 minutes ago is outside the window
+        assert [v for _, v in snapshot["backfill"]["idm_heatpump_temp_outdoor"]] == [
+            5.0,
+            6.0,
+        ]